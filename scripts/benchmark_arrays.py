@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+import argparse
+from timeit import timeit
+
+import numpy as np
+
+from ucca.ioutil import get_passages_with_progress_bar
+
+desc = """Measures the time spent analyzing the graphs of passages with the arrays exported by Passage.to_arrays,
+concatenated over all passages, compared to iterating over the Node and Edge objects of each passage as was done
+before. The arrays are exported once, and the time spent exporting them is measured separately."""
+
+
+class Corpus:
+    """Arrays of all passages, with the Node indices of each passage offset by the number of Nodes before it."""
+
+    def __init__(self, arrays):
+        offsets = np.cumsum([0] + [len(a) for a in arrays])
+        self.num_nodes = offsets[-1]
+        self.parents = np.concatenate([a.parents + offset for a, offset in zip(arrays, offsets)])
+        self.children = np.concatenate([a.children + offset for a, offset in zip(arrays, offsets)])
+        self.implicit = np.concatenate([a.implicit for a in arrays])
+        layer_ids = sorted({ID for a in arrays for ID in a.layer_ids})  # same codes in all passages
+        self.layers = np.concatenate([np.array([layer_ids.index(ID) for ID in a.layer_ids], dtype=np.int32)[a.layers]
+                                      for a in arrays])
+
+
+def objects_num_parents(passages):
+    return [[len(n.incoming) for n in passage.nodes.values() if not n.attrib.get("implicit")] for passage in passages]
+
+
+def corpus_num_parents(corpus):
+    return np.bincount(corpus.children, minlength=corpus.num_nodes)[~corpus.implicit]
+
+
+def objects_depths(passages):
+    """Distance of each Node from the nearest head of its Layer."""
+    all_depths = []
+    for passage in passages:
+        depths = {}
+        frontier = [n for layer in passage.layers for n in layer.heads]
+        depth = 0
+        while frontier:
+            for node in frontier:
+                depths[node.ID] = depth
+            depth += 1
+            frontier = list({c.ID: c for n in frontier for c in n.children if c.ID not in depths}.values())
+        all_depths.append(depths)
+    return all_depths
+
+
+def corpus_depths(corpus):
+    depths = np.full(corpus.num_nodes, -1)
+    same_layer = corpus.layers[corpus.parents] == corpus.layers[corpus.children]
+    frontier = np.setdiff1d(np.arange(corpus.num_nodes), corpus.children[same_layer])
+    depth = 0
+    while frontier.size:
+        depths[frontier] = depth
+        depth += 1
+        in_frontier = np.zeros(corpus.num_nodes, dtype=bool)
+        in_frontier[frontier] = True
+        children = corpus.children[in_frontier[corpus.parents]]
+        frontier = np.unique(children[depths[children] < 0])
+    return depths
+
+
+TASKS = (("num_parents", objects_num_parents, corpus_num_parents), ("depths", objects_depths, corpus_depths))
+
+
+def main(args):
+    passages = list(get_passages_with_progress_bar(args.filenames, desc="Loading"))
+    corpus = Corpus([passage.to_arrays() for passage in passages])
+    print("export: %.3fs" % timeit(lambda: Corpus([passage.to_arrays() for passage in passages]), number=args.number))
+    for name, objects_task, corpus_task in TASKS:
+        objects_total = timeit(lambda: objects_task(passages), number=args.number)
+        corpus_total = timeit(lambda: corpus_task(corpus), number=args.number)
+        print("%s: objects %.3fs, arrays %.3fs, speedup %.1fx" % (name, objects_total, corpus_total,
+                                                                   objects_total / corpus_total if corpus_total else 0))
+
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser(description=desc)
+    argparser.add_argument("filenames", nargs="+", help="passage file names to analyze")
+    argparser.add_argument("-n", "--number", type=int, default=10, help="number of repetitions")
+    main(argparser.parse_args())
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import sys
+from timeit import timeit
+
+from ucca import convert
+from ucca.ioutil import get_passages_with_progress_bar
+
+desc = """Measures the size and reading time of passages in the compact binary format, compared to the standard XML
+format and to pickle. Each passage is written in all formats to a temporary directory, and read back from there.
+Garbage collection is enabled while reading, as it is outside the benchmark, since creating many objects triggers it."""
+
+FORMATS = (("xml", False), ("pickle", True), ("bin", "compact"))
+
+
+def main(args):
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 100000))  # for pickling deep passages
+    passages = list(get_passages_with_progress_bar(args.filenames, desc="Loading"))
+    for suffix, binary in FORMATS:
+        filenames = [os.path.join(args.out_dir, "%s.%s" % (passage.ID, suffix)) for passage in passages]
+        for passage, filename in zip(passages, filenames):
+            convert.passage2file(passage, filename, binary=binary)
+        size = sum(map(os.path.getsize, filenames))
+        seconds = timeit(lambda: [convert.file2passage(filename) for filename in filenames], setup="gc.enable()",
+                         number=args.number)
+        print("%s: %.1fMB, %.3fs" % (suffix, size / 2 ** 20, seconds / args.number))
+        for filename in filenames:
+            os.remove(filename)
+
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser(description=desc)
+    argparser.add_argument("filenames", nargs="+", help="passage file names to read")
+    argparser.add_argument("-o", "--out-dir", default=".", help="directory to write the temporary files to")
+    argparser.add_argument("-n", "--number", type=int, default=3, help="number of repetitions")
+    main(argparser.parse_args())
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+import argparse
+from timeit import timeit
+
+from ucca import evaluation, layer1
+from ucca.ioutil import get_passages_with_progress_bar
+
+desc = """Measures the time spent reading frozen passages, with the tables computed by Passage.freeze(compile=True)
+compared to the caches which are validated and filled on access, as is done for passages frozen without compiling.
+The passages are read repeatedly, like evaluation references, and the time spent compiling them is measured
+separately."""
+
+
+def read_units(passages):
+    for passage in passages:
+        for node in passage.layer(layer1.LAYER_ID).all:
+            if node.tag == layer1.NodeTags.Foundational:
+                node.get_terminals(punct=False)
+                node.start_position, node.end_position, node.fparent, node.ftag
+                node.get_top_scene()
+
+
+def evaluate(passages):
+    for passage in passages:
+        evaluation.evaluate(passage, passage, normalize=False)
+
+
+TASKS = (read_units, evaluate)
+
+
+def main(args):
+    passages = list(get_passages_with_progress_bar(args.filenames, desc="Loading"))
+    for passage in passages:
+        passage.freeze()
+    totals = {}
+    for label, compile in (("frozen", False), ("compiled", True)):
+        for passage in passages:
+            passage.frozen = False
+        totals[label, "compile"] = timeit(lambda: [passage.freeze(compile=compile) for passage in passages], number=1)
+        for task in TASKS:
+            totals[label, task.__name__] = timeit(lambda: task(passages), number=args.number)
+    print("compile: %.3fs" % totals["compiled", "compile"])
+    for task in TASKS:
+        frozen, compiled = totals["frozen", task.__name__], totals["compiled", task.__name__]
+        print("%s: frozen %.3fs, compiled %.3fs, speedup %.1fx" % (task.__name__, frozen, compiled,
+                                                                   frozen / compiled if compiled else 0))
+
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser(description=desc)
+    argparser.add_argument("filenames", nargs="+", help="passage file names to read")
+    argparser.add_argument("-n", "--number", type=int, default=10, help="number of repetitions")
+    main(argparser.parse_args())
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+import argparse
+import pickle
+from timeit import timeit
+
+from ucca import core, evaluation, normalization
+from ucca.ioutil import get_passages_with_progress_bar
+
+desc = """Measures the time spent normalizing and evaluating passages, with the Layer reference bound to each Node
+on construction compared to the lookup by parsing the Node ID on every access that was used before."""
+
+
+def parsed_layer(node):
+    return node.root.layer(node.ID.split(core.Node.ID_SEPARATOR)[0])
+
+
+def access_layers(passages):
+    for passage in passages:
+        for node in passage.nodes.values():
+            node.layer
+
+
+def normalize_and_evaluate(passages):
+    for passage in passages:
+        normalization.normalize(passage)
+        evaluation.evaluate(passage, passage)
+
+
+TASKS = (access_layers, normalize_and_evaluate)
+
+
+def main(args):
+    passages = list(get_passages_with_progress_bar(args.filenames, desc="Loading"))
+    layers = (("parsed", property(parsed_layer)), ("cached", core.Node.layer))
+    totals = {(label, task.__name__): 0.0 for label, _ in layers for task in TASKS}
+    try:
+        for _ in range(args.number):  # alternating, so that both are measured under the same conditions
+            for label, layer in layers:
+                core.Node.layer = layer
+                # normalize() changes the passages, so every repetition works on fresh copies
+                copies = [pickle.loads(pickle.dumps(passage)) for passage in passages]
+                for task in TASKS:
+                    totals[label, task.__name__] += timeit(lambda: task(copies), number=1)
+    finally:
+        core.Node.layer = layers[-1][1]
+    for task in TASKS:
+        parsed, cached = totals["parsed", task.__name__], totals["cached", task.__name__]
+        print("%s: parsed layer %.3fs, cached layer %.3fs, speedup %.1fx" % (task.__name__, parsed, cached,
+                                                                            parsed / cached if cached else 0))
+
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser(description=desc)
+    argparser.add_argument("filenames", nargs="+", help="passage file names to normalize and evaluate")
+    argparser.add_argument("-n", "--number", type=int, default=10, help="number of repetitions")
+    main(argparser.parse_args())
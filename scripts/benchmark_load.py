@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+import argparse
+import tracemalloc
+from timeit import timeit
+from xml.etree.ElementTree import ElementTree
+
+from ucca import convert, layer0
+
+desc = """Measures the time and peak memory of loading standard XML passage files, parsing each file incrementally
+with convert.from_standard_file compared to parsing the whole element tree first and converting it with
+convert.from_standard, and loading just layer 0 with extra values decoded lazily, as text-only pipelines do."""
+
+
+def load_tree(filename):
+    with open(filename, encoding="utf-8") as f:
+        return convert.from_standard(ElementTree().parse(f))
+
+
+def load_incremental(filename):
+    return convert.from_standard_file(filename)
+
+
+def load_text(filename):
+    return convert.from_standard_file(filename, layers=(layer0.LAYER_ID,), lazy_extra=True)
+
+
+LOADERS = (load_tree, load_incremental, load_text)
+
+
+def main(args):
+    for load in LOADERS:
+        seconds = timeit(lambda: [load(filename) for filename in args.filenames], number=args.number)
+        peak = 0
+        for filename in args.filenames:
+            tracemalloc.start()
+            load(filename)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        print("%s: %.3fs, peak memory %.1fMB" % (load.__name__, seconds / args.number, peak / 2 ** 20))
+
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser(description=desc)
+    argparser.add_argument("filenames", nargs="+", help="standard XML passage file names to load")
+    argparser.add_argument("-n", "--number", type=int, default=3, help="number of repetitions")
+    main(argparser.parse_args())
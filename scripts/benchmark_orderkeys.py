@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+import argparse
+from timeit import timeit
+
+from ucca import core
+from ucca.ioutil import get_passages_with_progress_bar
+
+desc = """Measures the time spent sorting Nodes and Edges of passages by ID, with the cached integer sort keys
+compared to the string keys formatted on every call that were used before."""
+
+
+def string_id_orderkey(node):
+    layer, unique = node.ID.split(core.Node.ID_SEPARATOR)
+    return "{} {:>{}}".format(layer, unique, core.UNIQUE_ID_MAX_DIGITS)
+
+
+def string_edge_id_orderkey(edge):
+    return core.Edge.ID_FORMAT.format(string_id_orderkey(edge.parent), string_id_orderkey(edge.child))
+
+
+def sort_all(passage, node_key, edge_key):
+    """Sorts every collection that a Passage keeps ordered while it is being constructed."""
+    for layer in passage.layers:
+        sorted(layer.all, key=node_key)
+        for node in layer.all:
+            sorted(node.outgoing, key=edge_key)
+            sorted(node.incoming, key=edge_key)
+
+
+def incremental_sort_all(passage, node_key, edge_key):
+    """Sorts edge lists the way incremental construction does: once after every appended Edge."""
+    for node in passage.nodes.values():
+        for edges in (node.outgoing, node.incoming):
+            edges_so_far = []
+            for edge in edges:
+                edges_so_far.append(edge)
+                edges_so_far.sort(key=edge_key)
+
+
+def main(args):
+    totals = dict.fromkeys(("string", "cached"), 0.0)
+    for passage in get_passages_with_progress_bar(args.filenames, desc="Benchmarking"):
+        for label, node_key, edge_key in (("string", string_id_orderkey, string_edge_id_orderkey),
+                                          ("cached", core.id_orderkey, core.edge_id_orderkey)):
+            totals[label] += timeit(lambda: (sort_all(passage, node_key, edge_key),
+                                             incremental_sort_all(passage, node_key, edge_key)),
+                                    number=args.number)
+    for label, total in totals.items():
+        print("%s keys: %.3fs" % (label, total))
+    if totals["cached"]:
+        print("speedup: %.1fx" % (totals["string"] / totals["cached"]))
+
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser(description=desc)
+    argparser.add_argument("filenames", nargs="+", help="passage file names to sort")
+    argparser.add_argument("-n", "--number", type=int, default=10, help="number of repetitions per passage")
+    main(argparser.parse_args())
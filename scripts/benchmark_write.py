@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import tracemalloc
+from timeit import timeit
+from xml.etree.ElementTree import tostring
+
+from ucca import convert, textutil
+from ucca.ioutil import get_passages_with_progress_bar
+
+desc = """Measures the time and peak memory of writing passages to standard XML files, streaming them with
+convert.write_standard compared to building the element tree with convert.to_standard, serializing it to a string
+and indenting it with textutil.indent_xml."""
+
+
+def write_tree(passage, filename):
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write(textutil.indent_xml(tostring(convert.to_standard(passage)).decode()))
+
+
+def write_streaming(passage, filename):
+    with open(filename, "w", encoding="utf-8") as f:
+        convert.write_standard(passage, f)
+
+
+WRITERS = (write_tree, write_streaming)
+
+
+def main(args):
+    passages = list(get_passages_with_progress_bar(args.filenames, desc="Loading"))
+    filename = os.path.join(args.out_dir, "benchmark_write.xml")
+    for write in WRITERS:
+        seconds = timeit(lambda: [write(passage, filename) for passage in passages], number=args.number)
+        peak = 0
+        for passage in passages:
+            tracemalloc.start()
+            write(passage, filename)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        print("%s: %.3fs, peak memory %.1fMB" % (write.__name__, seconds / args.number, peak / 2 ** 20))
+    os.remove(filename)
+
+
+if __name__ == "__main__":
+    argparser = argparse.ArgumentParser(description=desc)
+    argparser.add_argument("filenames", nargs="+", help="passage file names to write")
+    argparser.add_argument("-o", "--out-dir", default=".", help="directory to write the temporary file to")
+    argparser.add_argument("-n", "--number", type=int, default=3, help="number of repetitions")
+    main(argparser.parse_args())
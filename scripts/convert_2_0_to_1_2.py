@@ -25,7 +25,7 @@ RULES = (replace_time_and_quantifier,)
 
 def convert_passage(passage, report_writer):
     for rule in RULES:
-        for node in passage.layer(layer1.LAYER_ID).all:
+        for node in passage.layer(layer1.LAYER_ID).all.snapshot():
             for edge in node:
                 parent = edge.parent
                 parent_str = str(parent)
@@ -28,7 +28,7 @@ def change_article_to_function(terminal, parent, lang):
             if not edge.attrib.get("remote"):
                 for category in edge.categories:
                     if category.tag == layer1.EdgeTags.Elaborator:
-                        category.tag = layer1.EdgeTags.Function
+                        edge.replace_category(category, tag=layer1.EdgeTags.Function)
                         return True
 
 
@@ -60,12 +60,12 @@ def change_none_to_quantifier(terminal, parent, lang):
                                 new_parent = participant_edge.child
                                 if new_parent.start_position == terminal.position + 1:
                                     if not new_parent.centers:
-                                        edges = new_parent.outgoing
+                                        edges = new_parent.outgoing.snapshot()
                                         center = new_parent.layer.add_fnode(new_parent, layer1.EdgeTags.Center)
                                         for sub_edge in edges:
                                             copy_edge(sub_edge, center)
                                             new_parent.remove(sub_edge)
-                                    category.tag = layer1.EdgeTags.Quantifier
+                                    edge.replace_category(category, tag=layer1.EdgeTags.Quantifier)
                                     participant_edge.add(layer1.EdgeTags.Adverbial)
                                     copy_edge(edge, new_parent)
                                     edge.parent.remove(edge)
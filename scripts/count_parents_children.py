@@ -5,7 +5,7 @@ import sys
 from collections import Counter, defaultdict
 
 from ucca import layer1
-from ucca.ioutil import get_passages_with_progress_bar
+from ucca.ioutil import get_passage_handles
 
 desc = """Parses XML files in UCCA standard format, and creates a histogram for the number of parents per unit."""
 
@@ -48,11 +48,11 @@ def plot_pie(counter, label, plot=None):
 
 def main(args):
     histograms = defaultdict(Counter)
-    for passage in get_passages_with_progress_bar(args.filenames):
-        for node in passage.layer(layer1.LAYER_ID).all:
-            if node.ID != "1.1":  # Exclude the root node
-                histograms["parents"][clip(node.incoming, 3)] += 1
-                histograms["children"][clip(node.outgoing, 7)] += 1
+    for handle in get_passage_handles(args.filenames, desc="Counting"):  # count edges without creating nodes
+        for node_id, num_parents, num_children in handle.degrees(layer1.LAYER_ID):
+            if node_id != "1.1":  # Exclude the root node
+                histograms["parents"][clip(num_parents, 3)] += 1
+                histograms["children"][clip(num_children, 7)] += 1
 
     for label, counter in histograms.items():
         handle = open(args.outfile + label + ".txt", "w", encoding="utf-8") if args.outfile else sys.stdout
@@ -66,8 +66,8 @@ def main(args):
             pass
 
 
-def clip(l, m):
-    return len(l) if len(l) <= m else ">%d" % m
+def clip(n, m):
+    return n if n <= m else ">%d" % m
 
 
 if __name__ == "__main__":
@@ -39,6 +39,12 @@ def match_by_id(guessed, ref):
     if len(guessed) != len(ref):
         raise ValueError("Number of passages to compare does not match: %d != %d" % (len(guessed), len(ref)))
     if len(guessed) > 1:
+        entries = {f.passage_id: f for f in guessed.files if isinstance(f, ioutil.CorpusEntry)}
+        if len(entries) == len(guessed):  # All in corpus files, so load each passage only when it is evaluated
+            try:
+                return ioutil.LazyLoadedPassages([entries[p.ID] for p in ref])
+            except KeyError as e:
+                raise ValueError("Passage IDs do not match") from e
         guessed_by_id = {}
         for g in guessed:
             print("Reading %s..." % g.ID, end="\r", flush=True)
@@ -59,7 +59,8 @@ def main(args):
                                                             desc="Indexing " + args.text, unit=" lines")
                 for spelling in alternative_spellings(line)]
     out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
-    for p in get_passages_with_progress_bar(args.filenames, desc="Matching", converters={}):
+    for p in get_passages_with_progress_bar(args.filenames, desc="Matching", converters={}, layers=(layer0.LAYER_ID,),
+                                            lazy_extra=True):
         match_passage_text(p, matchers, out)
     out.close()
 
@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+import argparse
+
+from ucca.ioutil import pack_corpus
+
+desc = """Reads passages in any format, and writes them all to a single indexed corpus file, allowing random access
+by passage ID. The corpus file can be given anywhere a passage file or directory is expected."""
+
+
+def main(args):
+    num_passages = pack_corpus(args.filenames, args.outfile, append=args.append)
+    print("Wrote %d passages to '%s'" % (num_passages, args.outfile))
+
+
+if __name__ == '__main__':
+    argparser = argparse.ArgumentParser(description=desc)
+    argparser.add_argument('filenames', nargs='+', help="passage file names or directories to read")
+    argparser.add_argument('-o', '--outfile', default='passages.corpus', help="output corpus file name")
+    argparser.add_argument('-a', '--append', action="store_true", help="append to the corpus file if it exists")
+    main(argparser.parse_args())
@@ -7,6 +7,7 @@ from glob import glob
 
 from tqdm import tqdm
 
+from ucca import layer0
 from ucca.convert import to_text
 from ucca.ioutil import file2passage, get_passages_with_progress_bar
 
@@ -28,16 +29,19 @@ def write_text(passage, f, sentences, lang, prepend_id=False):
 
 def main(args):
     os.makedirs(args.outdir, exist_ok=True)
+    # Only splitting to sentences needs layer 1, and extra values (such as spaCy documents) are not needed at all
+    kwargs = dict(layers=None if args.sentences else (layer0.LAYER_ID,), lazy_extra=True)
     if args.join:
         out_file = os.path.join(args.outdir, args.join)
         with open(out_file, "w", encoding="utf-8") as f:
-            for passage in get_passages_with_progress_bar(sorted(args.filenames, key=numeric), desc="Converting"):
+            for passage in get_passages_with_progress_bar(sorted(args.filenames, key=numeric), desc="Converting",
+                                                          **kwargs):
                 write_text(passage, f, sentences=args.sentences, lang=args.lang, prepend_id=args.prepend_id)
         print("Wrote '%s'." % out_file)
     else:  # one file per passage
         for pattern in args.filenames:
             for filename in tqdm(glob(pattern) or [pattern], desc="Converting", unit=" passages"):
-                passage = file2passage(filename)
+                passage = file2passage(filename, **kwargs)
                 basename = os.path.splitext(os.path.basename(filename))[0]
                 with open(os.path.join(args.outdir, basename + ".txt"), "w", encoding="utf-8") as f:
                     write_text(passage, f, sentences=args.sentences, lang=args.lang, prepend_id=args.prepend_id)
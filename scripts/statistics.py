@@ -5,8 +5,8 @@ from collections import Counter
 
 import pandas as pd
 
-from ucca import layer0, layer1
-from ucca.ioutil import get_passages_with_progress_bar
+from ucca import layer1
+from ucca.ioutil import get_passage_handles
 
 desc = """Prints statistics on UCCA passages"""
 
@@ -17,13 +17,14 @@ def main(args):
     df.fillna(0, inplace=True)
     for i, directory in enumerate(args.directories):
         row = df.loc[directory]
-        for passage in get_passages_with_progress_bar(directory, desc=directory):
+        for handle in get_passage_handles(directory, desc=directory):
+            passage = handle.load(lazy_extra=True)  # extra is not used, so it is never decoded
             l1 = passage.layer(layer1.LAYER_ID)
             non_terminals = [n for n in l1.all if n not in l1.heads and len(n.get_terminals()) > 1]
             edges = {e for n in non_terminals for e in n}
             remote_counter = Counter(e.attrib.get("remote", False) for e in edges)
             row["sentences"] += 1
-            row["tokens"] += len(passage.layer(layer0.LAYER_ID).all)
+            row["tokens"] += len(handle)
             row["nodes"] += len(non_terminals)
             row["discontinuous"] += sum(1 for n in non_terminals if n.discontiguous)
             row["reentrant"] += sum(1 for n in non_terminals if any(e.attrib.get("remote") for e in n.incoming))
@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+import argparse
+
+from ucca.ioutil import unpack_corpus
+
+desc = """Reads an indexed corpus file, and writes each passage in it to its own file."""
+
+
+def main(args):
+    for filename in args.filenames:
+        unpack_corpus(filename, args.outdir, binary=args.binary, verbose=args.verbose)
+
+
+if __name__ == '__main__':
+    argparser = argparse.ArgumentParser(description=desc)
+    argparser.add_argument('filenames', nargs='+', help="corpus file names to unpack")
+    argparser.add_argument('-o', '--outdir', default='.', help="output directory")
+    argparser.add_argument('-b', '--binary', action="store_true", help="write in pickle binary format (.pickle)")
+    argparser.add_argument('-v', '--verbose', action="store_true", help="verbose output")
+    main(argparser.parse_args())
@@ -61,6 +61,17 @@ def positions(terminals):
     return frozenset(t.position for t in terminals)
 
 
+def terminal_positions(node, punct=True):
+    """Returns the positions of the Terminals returned by node.get_terminals(punct=punct).
+
+    Taken from the tables of the Passage for layer 1 Nodes, if it is compiled (see core.Passage.freeze).
+    """
+    compiled = node.root.compiled
+    if compiled is not None and node.layer.ID == layer1.LAYER_ID:
+        return compiled.layers[layer1.LAYER_ID]["yield"][id(node), punct]
+    return positions(node.get_terminals(punct=punct))
+
+
 class Candidate:
     def __init__(self, edge, reference=None, reference_yield_tags=None, verbose=False):
         self.edge = edge
@@ -69,13 +80,14 @@ class Candidate:
         self.reference_yield_tags = reference_yield_tags
         self.verbose = verbose
         self.terminals = self.edge.child.get_terminals()
-        self._terminal_yield = positions(self.terminals)
-        self._terminal_yield_no_punct = positions((self.edge.parent if self.is_implicit() else self.edge.child).get_terminals(punct=False))
+        self._terminal_yield = terminal_positions(self.edge.child)
+        self._terminal_yield_no_punct = terminal_positions(self.edge.parent if self.is_implicit() else self.edge.child,
+                                                           punct=False)
         if self.reference is not None:
             self.terminals = [self.reference.by_id(t.ID) for t in self.terminals]
         self.extra = {}
         self.is_unary_child = self.edge.parent.incoming and (
-                self._terminal_yield_no_punct == positions(self.edge.parent.get_terminals(punct=False)))
+                self._terminal_yield_no_punct == terminal_positions(self.edge.parent, punct=False))
 
     def _annotate(self, attr=None):
         passage = self.edge.parent.root
@@ -14,11 +14,14 @@ The possible other formats are:
 import os
 import pickle
 import re
+import struct
 import sys
 import xml.etree.ElementTree as ET
 import xml.sax.saxutils
+from array import array
 from collections import defaultdict
-from itertools import repeat, groupby
+from functools import partial
+from itertools import chain, repeat, groupby
 from operator import attrgetter, itemgetter
 
 from ucca import textutil, core, layer0, layer1
@@ -372,8 +375,9 @@ def from_site(elem):
     attrib = elem.find(SiteCfg.Paths.Attrib)
     passage = core.Passage(pid, attrib=None if attrib is None else attrib.attrib)
     elem2node = {}
-    _from_site_terminals(elem, passage, elem2node)
-    _from_site_annotation(elem, passage, elem2node)
+    with passage.bulk():
+        _from_site_terminals(elem, passage, elem2node)
+        _from_site_annotation(elem, passage, elem2node)
     return passage
 
 
@@ -592,145 +596,454 @@ def to_site(passage):
     return root
 
 
-def to_standard(passage):
-    """Converts a Passage object to a standard XML root element.
+def _standard_structure(passage):
+    """Returns the standard XML structure of a Passage as a (tag, attributes, children) triple.
 
-    The standard XML specification is not contained here, but it uses a very
-    shallow structure with attributes to create hierarchy.
+    The children are an iterable of the triples of the child elements. The Nodes of each layer are
+    generated only when it is iterated over, so that the structure can be written out without ever being
+    kept in memory as a whole.
 
     :param passage: the passage to convert
 
-    :return: the root element of the standard XML structure
+    :return: the triple of the root element
     """
 
     # This utility stringifies the Unit's attributes for proper XML
     # we don't need to escape the character - the serializer of the XML element
-    # will do it (e.g. tostring())
+    # will do it (e.g. tostring() or write_standard())
     def _dumps(dic):
         return {str(k): str(v) if type(v) in (str, bool) else json.dumps(v) for k, v in dic.items()}
 
     # Utility to add an extra element if exists in the object
-    def _add_extra(obj, elem):
-        return obj.extra and ET.SubElement(elem, 'extra', _dumps(obj.extra))
+    def _extra(obj):
+        return (('extra', _dumps(obj.extra), ()),) if obj.extra else ()
 
     # Adds attributes element (even if empty)
-    def _add_attrib(obj, elem):
-        return ET.SubElement(elem, 'attributes', _dumps(obj.attrib))
+    def _attrib(obj):
+        return 'attributes', _dumps(obj.attrib), ()
 
-    root = ET.Element('root', passageID=str(passage.ID), annotationID='0')
-    _add_attrib(passage, root)
-    _add_extra(passage, root)
+    def _category(category):
+        attrs = {}
+        if category.tag:
+            attrs["tag"] = category.tag
+        if category.slot:
+            attrs["slot"] = str(category.slot)
+        if category.layer:
+            attrs["layer_name"] = category.layer
+        if category.parent:
+            attrs["parent_name"] = category.parent
+        return "category", attrs, _extra(category)
 
-    for layer in sorted(passage.layers, key=attrgetter('ID')):
-        layer_elem = ET.SubElement(root, 'layer', layerID=layer.ID)
-        _add_attrib(layer, layer_elem)
-        _add_extra(layer, layer_elem)
-        for node in layer.all:
-            node_elem = ET.SubElement(layer_elem, 'node',
-                                      ID=node.ID, type=node.tag)
-            _add_attrib(node, node_elem)
-            _add_extra(node, node_elem)
-            for edge in node:
-                edge_elem = ET.SubElement(node_elem, 'edge',
-                                          toID=edge.child.ID, type=edge.tag)
-                _add_attrib(edge, edge_elem)
-                _add_extra(edge, edge_elem)
-                for category in edge:
-                    attrs = {}
-                    if category.tag:
-                        attrs["tag"] = category.tag
-                    if category.slot:
-                        attrs["slot"] = str(category.slot)
-                    if category.layer:
-                        attrs["layer_name"] = category.layer
-                    if category.parent:
-                        attrs["parent_name"] = category.parent
-                    category_elem = ET.SubElement(edge_elem, "category", **attrs)
-                    _add_extra(category, category_elem)
-    return root
+    def _edge(edge):
+        return 'edge', {'toID': edge.child.ID, 'type': edge.tag}, (_attrib(edge), *_extra(edge),
+                                                                   *map(_category, edge))
 
+    def _node(node):
+        return 'node', {'ID': node.ID, 'type': node.tag}, (_attrib(node), *_extra(node), *map(_edge, node))
 
-def from_standard(root, extra_funcs=None):
-    def _str2bool(x):
-        return x == "True"
+    def _layer(layer):  # the Nodes are generated lazily, each with its few child elements
+        return 'layer', {'layerID': layer.ID}, chain((_attrib(layer),), _extra(layer), map(_node, layer.all))
 
-    attribute_converters = {
-        'paragraph': int,
-        'paragraph_position': int,
-        'remote': _str2bool,
-        'implicit': _str2bool,
-        'uncertain': _str2bool,
-        'suggest': _str2bool,
-        None: str,
-    }
-
-    def _loads(x):
-        try:
-            return False if x == "False" else x == "True" or json.loads(x)
-        except JSONDecodeError:
-            return x
+    return 'root', {'passageID': str(passage.ID), 'annotationID': '0'}, chain(
+        (_attrib(passage),), _extra(passage), map(_layer, sorted(passage.layers, key=attrgetter('ID'))))
 
-    layer_objs = {layer0.LAYER_ID: layer0.Layer0,
-                  layer1.LAYER_ID: layer1.Layer1}
 
-    node_objs = {layer0.NodeTags.Word: layer0.Terminal,
-                 layer0.NodeTags.Punct: layer0.Terminal,
-                 layer1.NodeTags.Foundational: layer1.FoundationalNode,
-                 layer1.NodeTags.Linkage: layer1.Linkage,
-                 layer1.NodeTags.Punctuation: layer1.PunctNode}
+def to_standard(passage):
+    """Converts a Passage object to a standard XML root element.
+
+    The standard XML specification is not contained here, but it uses a very
+    shallow structure with attributes to create hierarchy.
+
+    :param passage: the passage to convert
+
+    :return: the root element of the standard XML structure
+    """
+    def _build(tag, attrib, children, parent=None):
+        elem = ET.Element(tag, attrib) if parent is None else ET.SubElement(parent, tag, attrib)
+        for child in children:
+            _build(*child, parent=elem)
+        return elem
+
+    return _build(*_standard_structure(passage))
+
+
+def _escape_attrib(text):
+    """Escapes a string for an XML attribute as ET.tostring does, writing non-ASCII characters as references."""
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    if "\"" in text:
+        text = text.replace("\"", "&quot;")
+    if "\r" in text:
+        text = text.replace("\r", "&#13;")
+    if "\n" in text:
+        text = text.replace("\n", "&#10;")
+    if "\t" in text:
+        text = text.replace("\t", "&#09;")
+    return _xmlcharrefs(text)
+
+
+_NON_ASCII = re.compile(r"[^\x00-\x7f]")
+
+
+def _xmlcharrefs(text):
+    """Writes non-ASCII characters as character references, if there are any."""
+    return text.encode("ascii", "xmlcharrefreplace").decode("ascii") if _NON_ASCII.search(text) else text
+
+
+def write_standard(passage, f, indent=True):
+    """Writes a Passage object to a text file in the standard XML format, in one pass over the Passage.
+
+    The output is the same as ET.tostring(to_standard(passage)).decode(), indented by textutil.indent_xml
+    if indent is True, but the element tree is never built: each element is written as soon as it is generated.
+
+    :param passage: the passage to write
+    :param f: text file object to write to
+    :param indent: whether to write each element in its own line, indented by its depth
+    """
+    write = f.write
+    newline = "\n" if indent else ""
+
+    def _write(tag, attrib, children, depth):
+        prefix = "  " * depth if indent else ""
+        start = prefix + "<" + tag + "".join(' %s="%s"' % (_xmlcharrefs(k), _escape_attrib(v))
+                                             for k, v in attrib.items())
+        children = iter(children)
+        first = next(children, None)
+        if first is None:
+            write(start + " />" + newline)
+            return
+        write(start + ">" + newline)
+        _write(*first, depth + 1)
+        for child in children:
+            _write(*child, depth + 1)
+        write(prefix + "</" + tag + ">" + newline)
+
+    _write(*_standard_structure(passage), 0)
+
+
+def _str2bool(x):
+    return x == "True"
+
+
+_STANDARD_ATTRIBUTE_CONVERTERS = {
+    'paragraph': int,
+    'paragraph_position': int,
+    'remote': _str2bool,
+    'implicit': _str2bool,
+    'uncertain': _str2bool,
+    'suggest': _str2bool,
+}
+
+_STANDARD_LAYER_CLASSES = {layer0.LAYER_ID: layer0.Layer0,
+                           layer1.LAYER_ID: layer1.Layer1}
+
+_STANDARD_NODE_CLASSES = {layer0.NodeTags.Word: layer0.Terminal,
+                          layer0.NodeTags.Punct: layer0.Terminal,
+                          layer1.NodeTags.Foundational: layer1.FoundationalNode,
+                          layer1.NodeTags.Linkage: layer1.Linkage,
+                          layer1.NodeTags.Punctuation: layer1.PunctNode}
+
+_JSON_FIRST_CHARS = frozenset('{["-0123456789tfnNI')  # the first character of anything json.loads accepts
+
+
+def _loads(x):
+    if x == "False" or x == "True":  # as written for bool values by str, which is not JSON
+        return x == "True"
+    if x.lstrip()[:1] not in _JSON_FIRST_CHARS:  # not JSON, skip raising and catching the error
+        return x
+    try:
+        return json.loads(x)
+    except JSONDecodeError:
+        return x
+
+
+def _from_standard_elements(elements, extra_funcs=None, layers=None, lazy_extra=False):
+    """Creates a Passage from the elements of a standard XML structure.
+
+    :param elements: iterable of the root element, followed by each layer element and then its node elements.
+            Each element is only used until the next one is taken, and only the elements it contains
+            (attributes, extra, edges and categories) are read, so it may be cleared afterwards.
+            Nodes are created from their elements in order, and Edges as soon as both their parent and child
+            exist: an Edge whose child comes later waits in a table of pending Edges by child ID.
+            No more elements are taken once all requested layers are created.
+    :param extra_funcs: dictionary of extra key -> function converting its value from the string in the XML
+    :param layers: IDs of the layers to create, or None for all layers, see from_standard
+    :param lazy_extra: whether to convert extra values only when first accessed, see from_standard
+
+    :return: the Passage
+    """
+    extra_funcs = extra_funcs or {}
+    layers = None if layers is None else set(layers)
 
     def _get_attrib(elem):
         try:
-            return {k: attribute_converters.get(k, str)(v)
+            return {k: _STANDARD_ATTRIBUTE_CONVERTERS.get(k, str)(v)
                     for k, v in elem.find('attributes').items()}
         except AttributeError as e:
             raise core.UCCAError("Element %s has no attributes" % elem.get("ID")) from e
 
-    def _add_extra(obj, elem):
-        if elem.find('extra') is not None:
-            for k, v in elem.find('extra').items():
-                obj.extra[k] = (extra_funcs or {}).get(k, _loads)(v)
-
+    loaded = {}  # string -> its value converted by _loads, if immutable, as many extra values repeat
+
+    def _load(x):
+        value = loaded.get(x, loaded)
+        if value is loaded:
+            value = _loads(x)
+            if not isinstance(value, (list, dict)):
+                loaded[x] = value
+        return value
+
+    def _get_extra(elem):
+        extra_elem = elem.find('extra')
+        return {} if extra_elem is None else {k: extra_funcs.get(k, _load)(v) for k, v in extra_elem.items()}
+
+    def _add_extra(obj, extra):
+        for k, v in extra.items():
+            obj.extra[k] = v
+
+    if lazy_extra:
+        def _get_extra(elem):
+            extra_elem = elem.find('extra')
+            return {} if extra_elem is None else dict(extra_elem.items())
+
+        def _decode(k, v):
+            return extra_funcs.get(k, _load)(v)
+
+        def _add_extra(obj, extra):
+            if extra:
+                deferred = obj.extra if type(obj.extra) is core._DeferredDict else \
+                    core._DeferredDict(_decode, obj.extra.items())
+                for k, v in extra.items():
+                    deferred.defer(k, v)
+                obj.extra = deferred
+
+    elements = iter(elements)
+    root = next(elements)
     passage = core.Passage(root.get('passageID'), attrib=_get_attrib(root))
-    _add_extra(passage, root)
-    edge_elems = []
-    for layer_elem in root.findall('layer'):
-        layer_id = layer_elem.get('layerID')
-        layer = layer_objs[layer_id](passage, attrib=_get_attrib(layer_elem))
-        _add_extra(layer, layer_elem)
-        # some nodes are created automatically, skip creating them when found
-        # in the XML (they should have 'constant' IDs) but take their edges
-        # and attributes/extra from the XML (may have changed from the default)
-        created_nodes = {x.ID: x for x in layer.all}
-        for node_elem in layer_elem.findall('node'):
-            node_id = node_elem.get('ID')
-            tag = node_elem.get('type')
+    _add_extra(passage, _get_extra(root))
+    nodes = passage.nodes
+    pending = {}  # child ID -> list of (parent Node, categories, attrib, extra) of Edges to create once it exists
+    created_nodes = {}
+    edge_categories = {}  # category attributes of an Edge element -> Category tuple, as most Edges share them
+    remaining_layers = None if layers is None else len(layers)  # number of requested layers not created yet
+    skip = False  # whether the nodes of the current layer are skipped
+    with passage.bulk():
+        for elem in elements:
+            if elem.tag == 'layer':
+                layer_id = elem.get('layerID')
+                if layers is not None:
+                    if not remaining_layers:
+                        break  # skip parsing the rest of the elements
+                    skip = layer_id not in layers
+                    if skip:
+                        continue
+                    remaining_layers -= 1
+                layer = _STANDARD_LAYER_CLASSES[layer_id](passage, attrib=_get_attrib(elem))
+                _add_extra(layer, _get_extra(elem))
+                # some nodes are created automatically, skip creating them when found
+                # in the XML (they should have 'constant' IDs) but take their edges
+                # and attributes/extra from the XML (may have changed from the default)
+                created_nodes = {x.ID: x for x in layer.all}
+                continue
+            if skip:
+                continue
+            node_id = elem.get('ID')
+            tag = elem.get('type')
             node = created_nodes.get(node_id)
             if node is None:
-                node = node_objs[tag](root=passage, ID=node_id, tag=tag, attrib=_get_attrib(node_elem))
+                node = _STANDARD_NODE_CLASSES[tag](root=passage, ID=node_id, tag=tag, attrib=_get_attrib(elem))
             else:
-                for key, value in _get_attrib(node_elem).items():
+                for key, value in _get_attrib(elem).items():
                     node.attrib[key] = value
-            _add_extra(node, node_elem)
-            edge_elems += [(node, x) for x in node_elem.findall('edge')]
-
-    # Adding edges (must have all nodes before doing so)
-    for from_node, edge_elem in edge_elems:
-        to_node = passage.nodes[edge_elem.get('toID')]
-        categories_elems = edge_elem.findall('category')
-        categories = []
-        for c in categories_elems:
-            tag = c.get('tag')
-            slot = c.get('slot')
-            layer = c.get('layer_name')
-            parent = c.get('parent_name')
-            categories.append((tag, slot, layer, parent))
-        if not categories:  # an old xml format
-            tag = edge_elem.get('type')
-            categories.append((tag, "", "", ""))
-        edge = from_node.add_multiple(categories, to_node, edge_attrib=_get_attrib(edge_elem))
-        _add_extra(edge, edge_elem)
+            _add_extra(node, _get_extra(elem))
+            for edge_elem in elem.iterfind('edge'):
+                if layers is not None and edge_elem.get('toID').split(core.Node.ID_SEPARATOR)[0] not in layers:
+                    continue  # the child is in a layer which is not created
+                key = tuple(tuple(c.items()) for c in edge_elem.iterfind('category')) or edge_elem.get('type')
+                categories = edge_categories.get(key)
+                if categories is None:
+                    categories = edge_categories[key] = tuple(
+                        core.Category(c.get('tag'), c.get('slot'), c.get('layer_name'), c.get('parent_name'))
+                        for c in edge_elem.iterfind('category')) or \
+                        (core.Category(edge_elem.get('type'), "", "", ""),)  # an old xml format
+                    passage._register_categories(categories)  # in order of appearance, even if the Edge waits
+                edge = (node, categories, _get_attrib(edge_elem), _get_extra(edge_elem))
+                child = nodes.get(edge_elem.get('toID'))
+                if child is None:
+                    pending.setdefault(edge_elem.get('toID'), []).append(edge)
+                else:
+                    _add_extra(node.add_multiple(categories, child, edge_attrib=edge[2]), edge[3])
+            for parent, categories, attrib, extra in pending.pop(node_id, ()):
+                _add_extra(parent.add_multiple(categories, node, edge_attrib=attrib), extra)
+        for child_id in pending:
+            passage.by_id(child_id)  # raises KeyError, as the child was not found
+
+    return passage
 
+
+def _standard_elements(root):
+    """Yields the root element of a standard XML structure, and then each layer element followed by its nodes."""
+    yield root
+    for layer_elem in root.iterfind('layer'):
+        yield layer_elem
+        yield from layer_elem.iterfind('node')
+
+
+def _iterparse_standard(source):
+    """Parses a standard XML file incrementally, yielding elements as in _standard_elements.
+
+    The root and layer elements are yielded when their first child layer or node starts,
+    so that their attributes and extra are already parsed, and each node when it ends.
+    Each node element is cleared once used, so that the whole tree is never kept in memory.
+    """
+    depth = 0
+    root = layer = None  # elements started but not yielded yet
+    in_layer = False
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if depth == 1:
+                root = elem
+            elif depth == 2:
+                in_layer = elem.tag == 'layer'
+                if in_layer:
+                    if root is not None:
+                        yield root
+                        root = None
+                    layer = elem
+            elif depth == 3 and layer is not None and in_layer and elem.tag == 'node':
+                yield layer
+                layer = None
+            continue
+        depth -= 1
+        if depth == 2 and in_layer and elem.tag == 'node':
+            yield elem
+            elem.clear()
+        elif depth == 1 and in_layer:
+            if layer is not None:
+                yield layer
+                layer = None
+            elem.clear()
+        elif depth == 0 and root is not None:
+            yield root
+
+
+def from_standard(root, extra_funcs=None, layers=None, lazy_extra=False):
+    """Converts a standard XML root element to a Passage object.
+
+    :param root: the root element of the standard XML structure, as returned by to_standard
+    :param extra_funcs: dictionary of extra key -> function converting its value from the string in the XML
+    :param layers: IDs of the layers to create, or None for all layers.
+                   Edges to Nodes in layers which are not created are skipped too.
+    :param lazy_extra: whether to convert each extra value (e.g. decode it from JSON) only when first accessed,
+                       rather than when loading
+
+    :return: the Passage
+    """
+    return _from_standard_elements(_standard_elements(root), extra_funcs, layers=layers, lazy_extra=lazy_extra)
+
+
+def from_standard_file(source, extra_funcs=None, layers=None, lazy_extra=False):
+    """Reads a Passage from a standard XML file, as from_standard does from its root element.
+
+    The file is parsed incrementally: Nodes and Edges are created while it is being parsed,
+    and every element is discarded once used, so the whole element tree is never built.
+    Parsing stops once all requested layers are read, so layers after them in the file are not parsed at all.
+
+    :param source: file name or file object to read from
+    :param extra_funcs: dictionary of extra key -> function converting its value from the string in the XML
+    :param layers: IDs of the layers to create, or None for all layers, see from_standard
+    :param lazy_extra: whether to convert extra values only when first accessed, see from_standard
+
+    :return: the Passage
+    """
+    return _from_standard_elements(_iterparse_standard(source), extra_funcs, layers=layers, lazy_extra=lazy_extra)
+
+
+def from_edges(passage_id, terminals, parents, children, categories, remotes=None, implicit=None, attrib=None):
+    """Creates a Passage from parallel arrays describing the Edges of its foundational layer.
+
+    Nodes are referred to by their index: indices 0 to len(terminals) - 1 are the Terminals, in order,
+    index len(terminals) is the head FNode of layer 1, and higher indices are the other layer 1 units,
+    whose IDs are allocated in the order of their indices.
+    A unit with a LinkRelation or LinkArgument Edge is a Linkage, a unit whose primary incoming Edge
+    is a Punctuation Edge is a PunctNode, and any other unit is an FNode.
+    The graph is validated before anything is created, and all Nodes and Edges are created in a single
+    bulk change, so that every Edge list is sorted and the top scenes are found once, in O(N log N).
+
+    :param passage_id: ID of the created Passage
+    :param terminals: sequence of (text, punct) or (text, punct, paragraph) tuples
+    :param parents: sequence of the index of the parent unit of each Edge
+    :param children: sequence of the index of the child Node of each Edge
+    :param categories: sequence of the categories of each Edge: a tag, or a list of category tuples
+            (tag, slot, layer, parent), as in core.Node.add_multiple
+    :param remotes: optional sequence of booleans, whether each Edge is remote
+    :param implicit: optional sequence of booleans, whether the child of each Edge is an implicit unit
+    :param attrib: optional attribute dictionary of the Passage
+    :return: the created Passage
+    :raise ValueError: if the arrays have different lengths, an index is invalid, or the Edges form a cycle
+    """
+    num_edges = len(parents)
+    if not len(children) == len(categories) == num_edges or \
+            any(flags is not None and len(flags) != num_edges for flags in (remotes, implicit)):
+        raise ValueError("Edge arrays must all have the same length, %d" % num_edges)
+    remotes = repeat(False) if remotes is None else remotes
+    implicit = repeat(False) if implicit is None else implicit
+    head = len(terminals)
+    num_nodes = max([head, *parents, *children]) + 1
+    edges = list(zip(parents, children, [[(c,)] if isinstance(c, str) else c for c in categories], remotes, implicit))
+
+    # Validate the indices and find the kind of each unit
+    outgoing = [[] for _ in range(num_nodes)]
+    in_degree = [0] * num_nodes
+    node_tags = [layer1.NodeTags.Foundational] * num_nodes
+    implicit_units = set()
+    for i, (parent, child, edge_categories, remote, child_implicit) in enumerate(edges):
+        if not head <= parent < num_nodes:
+            raise ValueError("Parent of edge %d is not a unit: %d" % (i, parent))
+        if not 0 <= child < num_nodes or child == head:
+            raise ValueError("Invalid child of edge %d: %d" % (i, child))
+        if not edge_categories:
+            raise ValueError("Edge %d has no categories" % i)
+        outgoing[parent].append(child)
+        in_degree[child] += 1
+        tag = edge_categories[0][0]
+        if tag in (EdgeTags.LinkRelation, EdgeTags.LinkArgument):
+            node_tags[parent] = layer1.NodeTags.Linkage
+        elif tag == EdgeTags.Punctuation and not remote and child > head:
+            node_tags[child] = layer1.NodeTags.Punctuation
+        if child_implicit:
+            implicit_units.add(child)
+
+    # Validate acyclicity by topological sort, which removes all units unless there is a cycle
+    queue = [unit for unit in range(head, num_nodes) if not in_degree[unit]]
+    for unit in queue:
+        for child in outgoing[unit]:
+            in_degree[child] -= 1
+            if not in_degree[child] and child > head:
+                queue.append(child)
+    if len(queue) < num_nodes - head:
+        raise ValueError("Edges form a cycle through unit %d" % next(
+            unit for unit in range(head, num_nodes) if in_degree[unit]))
+
+    passage = core.Passage(passage_id, attrib=attrib)
+    node_objs = {layer1.NodeTags.Foundational: layer1.FoundationalNode,
+                 layer1.NodeTags.Linkage: layer1.Linkage,
+                 layer1.NodeTags.Punctuation: layer1.PunctNode}
+    with passage.bulk():
+        l0 = layer0.Layer0(passage)
+        nodes = [l0.add_terminal(*terminal) for terminal in terminals]
+        l1 = layer1.Layer1(passage)
+        nodes.append(l1.heads[0])
+        for unit in range(head + 1, num_nodes):
+            tag = node_tags[unit]
+            nodes.append(node_objs[tag](root=passage, tag=tag, ID=l1.next_id(),
+                                        attrib={"implicit": True} if unit in implicit_units else None))
+        for parent, child, edge_categories, remote, _ in edges:
+            nodes[parent].add_multiple(edge_categories, nodes[child], edge_attrib={"remote": True} if remote else None)
     return passage
 
 
@@ -909,97 +1222,98 @@ def from_json(lines, *args, skip_category_mapping=False, by_external_id=False, *
         passage_id = external_id
     passage = core.Passage(str(passage_id), attrib=attrib)
 
-    # Create terminals
-    l0 = layer0.Layer0(passage)
-    token_id_to_terminal = {token["id"]: l0.add_terminal(
-        text=token["text"], punct=not token["require_annotation"], paragraph=1)
-        for token in sorted(d["tokens"], key=itemgetter("index_in_task"))}
-
-    # Create non-terminals
-    l1 = layer1.Layer1(passage)
-    tree_id_to_node = {}
-    token_id_to_preterminal = {}
-    category_name_to_edge_tag = {} if skip_category_mapping else EdgeTags.__dict__
-    # Assuming topological sort: parents always appear before children
-    for unit in sorted(d["annotation_units"], key=itemgetter("is_remote_copy")):  # Get non-remotes first
-        tree_id = unit["tree_id"]
-        remote = unit["is_remote_copy"]
-        cloned_from_tree_id = None
-        if remote:
-            cloned_from_tree_id = unit.get("cloned_from_tree_id")
-            if cloned_from_tree_id is None:
-                raise ValueError("Remote unit %s without cloned_from_tree_id" % tree_id)
-        elif tree_id in tree_id_to_node:
-            raise ValueError("Unit %s is repeated" % tree_id)
-        parent_tree_id = unit["parent_tree_id"]
-        if parent_tree_id is None:  # Root node: no need to create
-            tree_id_to_node[tree_id] = None
-            continue
-        try:
-            parent_node = tree_id_to_node[parent_tree_id]
-        except KeyError as e:
-            raise ValueError("Unit %s appears before its parent, %s" % (tree_id, parent_tree_id)) from e
-
-        unit_categories = []
-        for category in unit.get("categories", ()):
+    with passage.bulk():
+        # Create terminals
+        l0 = layer0.Layer0(passage)
+        token_id_to_terminal = {token["id"]: l0.add_terminal(
+            text=token["text"], punct=not token["require_annotation"], paragraph=1)
+            for token in sorted(d["tokens"], key=itemgetter("index_in_task"))}
+
+        # Create non-terminals
+        l1 = layer1.Layer1(passage)
+        tree_id_to_node = {}
+        token_id_to_preterminal = {}
+        category_name_to_edge_tag = {} if skip_category_mapping else EdgeTags.__dict__
+        # Assuming topological sort: parents always appear before children
+        for unit in sorted(d["annotation_units"], key=itemgetter("is_remote_copy")):  # Get non-remotes first
+            tree_id = unit["tree_id"]
+            remote = unit["is_remote_copy"]
+            cloned_from_tree_id = None
+            if remote:
+                cloned_from_tree_id = unit.get("cloned_from_tree_id")
+                if cloned_from_tree_id is None:
+                    raise ValueError("Remote unit %s without cloned_from_tree_id" % tree_id)
+            elif tree_id in tree_id_to_node:
+                raise ValueError("Unit %s is repeated" % tree_id)
+            parent_tree_id = unit["parent_tree_id"]
+            if parent_tree_id is None:  # Root node: no need to create
+                tree_id_to_node[tree_id] = None
+                continue
             try:
-                category_name = category.get("name") or categories[category["id"]]['name']
+                parent_node = tree_id_to_node[parent_tree_id]
             except KeyError as e:
-                raise ValueError("Category missing from layer: " + category["id"]) from e
-            c_tag = category_name_to_edge_tag.get(category_name.replace(" ", ""), category_name.replace(" ", "_"))
-            c_slot = category.get("slot", "")
-            c_data = categories[category["id"]]
-            c_layer = c_data['layer']
-            if c_layer == base_layer:
-                base_slot = c_slot
-            c_parent = c_data['parent']
-            if c_parent:   # make sure it is not empty
-                c_parent = category_name_to_edge_tag.get(c_parent['name'].replace(" ", ""),
-                                                         c_parent['name'].replace(" ", "_"))
-            unit_categories.append((c_tag, c_slot, c_layer, c_parent))
-
-        if not unit_categories:
-            raise ValueError("Unit %s has no categories" % tree_id)
-
-        edge_attrib = {}
-        for unit_category, *_ in unit_categories:
-            if unit_category == EdgeTags.Uncertain:
-                edge_attrib["uncertain"] = True
-            elif unit_category == COORDINATED_MAIN_REL:
-                edge_attrib[COORDINATED_MAIN_REL] = True
-        if not edge_attrib:
-            edge_attrib = None
-        unit_categories = [uc for uc in unit_categories if uc[0] not in IGNORED_ABBREVIATIONS]
-        children_tokens = [] if unit["type"] == "IMPLICIT" else unit["children_tokens"]
-        try:
-            terminal = token_id_to_terminal[children_tokens[0]["id"]] if len(children_tokens) == 1 else None
-        except (IndexError, KeyError):
-            terminal = None
-        if remote:
+                raise ValueError("Unit %s appears before its parent, %s" % (tree_id, parent_tree_id)) from e
+
+            unit_categories = []
+            for category in unit.get("categories", ()):
+                try:
+                    category_name = category.get("name") or categories[category["id"]]['name']
+                except KeyError as e:
+                    raise ValueError("Category missing from layer: " + category["id"]) from e
+                c_tag = category_name_to_edge_tag.get(category_name.replace(" ", ""), category_name.replace(" ", "_"))
+                c_slot = category.get("slot", "")
+                c_data = categories[category["id"]]
+                c_layer = c_data['layer']
+                if c_layer == base_layer:
+                    base_slot = c_slot
+                c_parent = c_data['parent']
+                if c_parent:   # make sure it is not empty
+                    c_parent = category_name_to_edge_tag.get(c_parent['name'].replace(" ", ""),
+                                                             c_parent['name'].replace(" ", "_"))
+                unit_categories.append((c_tag, c_slot, c_layer, c_parent))
+
+            if not unit_categories:
+                raise ValueError("Unit %s has no categories" % tree_id)
+
+            edge_attrib = {}
+            for unit_category, *_ in unit_categories:
+                if unit_category == EdgeTags.Uncertain:
+                    edge_attrib["uncertain"] = True
+                elif unit_category == COORDINATED_MAIN_REL:
+                    edge_attrib[COORDINATED_MAIN_REL] = True
+            if not edge_attrib:
+                edge_attrib = None
+            unit_categories = [uc for uc in unit_categories if uc[0] not in IGNORED_ABBREVIATIONS]
+            children_tokens = [] if unit["type"] == "IMPLICIT" else unit["children_tokens"]
             try:
-                node = tree_id_to_node[cloned_from_tree_id]
-            except KeyError as e:
-                raise ValueError("Remote copy %s refers to nonexistent unit: %s" %
-                                 (tree_id, cloned_from_tree_id)) from e
-            l1.add_remote_multiple(parent_node, unit_categories, node, edge_attrib=edge_attrib)
-        elif not skip_category_mapping and terminal and layer0.is_punct(terminal):
-            tree_id_to_node[tree_id] = l1.add_punct(None, terminal, base_layer, base_slot, edge_attrib=edge_attrib)
-        elif tree_id not in tree_id_to_node:
-            node = tree_id_to_node[tree_id] = l1.add_fnode_multiple(parent_node, unit_categories,
-                                                                    implicit=unit["type"] == "IMPLICIT",
-                                                                    edge_attrib=edge_attrib)
-            node.extra['tree_id'] = tree_id
-            comment = unit.get("comment")
-            if comment:
-                node.extra['remarks'] = comment
-            for token in children_tokens:
-                token_id_to_preterminal[token["id"]] = node
-
-    # Attach terminals to non-terminals
-    for token_id, node in token_id_to_preterminal.items():
-        terminal = token_id_to_terminal[token_id]
-        if skip_category_mapping or not layer0.is_punct(terminal):
-            node.add(EdgeTags.Terminal, terminal)
+                terminal = token_id_to_terminal[children_tokens[0]["id"]] if len(children_tokens) == 1 else None
+            except (IndexError, KeyError):
+                terminal = None
+            if remote:
+                try:
+                    node = tree_id_to_node[cloned_from_tree_id]
+                except KeyError as e:
+                    raise ValueError("Remote copy %s refers to nonexistent unit: %s" %
+                                     (tree_id, cloned_from_tree_id)) from e
+                l1.add_remote_multiple(parent_node, unit_categories, node, edge_attrib=edge_attrib)
+            elif not skip_category_mapping and terminal and layer0.is_punct(terminal):
+                tree_id_to_node[tree_id] = l1.add_punct(None, terminal, base_layer, base_slot, edge_attrib=edge_attrib)
+            elif tree_id not in tree_id_to_node:
+                node = tree_id_to_node[tree_id] = l1.add_fnode_multiple(parent_node, unit_categories,
+                                                                        implicit=unit["type"] == "IMPLICIT",
+                                                                        edge_attrib=edge_attrib)
+                node.extra['tree_id'] = tree_id
+                comment = unit.get("comment")
+                if comment:
+                    node.extra['remarks'] = comment
+                for token in children_tokens:
+                    token_id_to_preterminal[token["id"]] = node
+
+        # Attach terminals to non-terminals
+        for token_id, node in token_id_to_preterminal.items():
+            terminal = token_id_to_terminal[token_id]
+            if skip_category_mapping or not layer0.is_punct(terminal):
+                node.add(EdgeTags.Terminal, terminal)
 
     yield passage
 
@@ -1126,12 +1440,488 @@ def to_json(passage, *args, return_dict=False, tok_task=None, all_categories=Non
     return d if return_dict else json.dumps(d).splitlines()
 
 
-def file2passage(filename):
+BINARY_MAGIC = b"\x89UCCA\r\n\x1a"  # the first bytes of a file in the compact binary format
+BINARY_VERSION = 1
+
+_BINARY_HEADER = struct.Struct("<8sII")  # magic, version, number of arrays
+_BINARY_ARRAY_ENTRY = struct.Struct("<16sc7xQQ")  # name, array typecode, offset from the start, number of items
+_BINARY_NONE = 0xFFFFFFFF  # string index of None
+_VALUE_NONE, _VALUE_FALSE, _VALUE_TRUE, _VALUE_INT, _VALUE_FLOAT, _VALUE_STR, _VALUE_JSON = range(7)
+
+
+class _BinaryWriter:
+    """Collects the tables of a Passage in the compact binary format, see to_binary."""
+
+    def __init__(self):
+        self.arrays = {}
+        self.string_index = {}
+        self.strings = []
+        self.dict_offsets = array("I", [0, 0])  # dictionary 0 is the empty dictionary
+        self.item_keys = array("I")
+        self.item_types = array("B")
+        self.item_values = array("q")
+
+    def string(self, text):
+        if text is None:
+            return _BINARY_NONE
+        index = self.string_index.get(text)
+        if index is None:
+            index = self.string_index[text] = len(self.strings)
+            self.strings.append(text)
+        return index
+
+    def dict(self, dic):
+        if not dic:
+            return 0
+        for key, value in dic.items():
+            self.item_keys.append(self.string(key))
+            if value is None:
+                value_type, value = _VALUE_NONE, 0
+            elif value is False or value is True:
+                value_type, value = _VALUE_TRUE if value else _VALUE_FALSE, 0
+            elif type(value) is int and -2 ** 63 <= value < 2 ** 63:
+                value_type = _VALUE_INT
+            elif type(value) is float:
+                value_type, value = _VALUE_FLOAT, self.string(repr(value))
+            elif type(value) is str:
+                value_type, value = _VALUE_STR, self.string(value)
+            else:
+                value_type, value = _VALUE_JSON, self.string(json.dumps(value))
+            self.item_types.append(value_type)
+            self.item_values.append(value)
+        self.dict_offsets.append(len(self.item_keys))
+        return len(self.dict_offsets) - 2
+
+    def tobytes(self):
+        encoded = [string.encode("utf-8", "surrogatepass") for string in self.strings]
+        offsets = array("I", [0])
+        for string in encoded:
+            offsets.append(offsets[-1] + len(string))
+        self.arrays.update(string_offsets=offsets, string_text=array("B", b"".join(encoded)),
+                           dict_offsets=self.dict_offsets, item_keys=self.item_keys, item_types=self.item_types,
+                           item_values=self.item_values)
+        position = _BINARY_HEADER.size + _BINARY_ARRAY_ENTRY.size * len(self.arrays)
+        header = [_BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(self.arrays))]
+        data = []
+        for name, values in self.arrays.items():
+            padding = -position % 8  # align every array to 8 bytes, so that it can be cast in place
+            if sys.byteorder == "big":
+                values = array(values.typecode, values)
+                values.byteswap()
+            data += [bytes(padding), values.tobytes()]
+            position += padding
+            header.append(_BINARY_ARRAY_ENTRY.pack(name.encode("ascii"), values.typecode.encode("ascii"),
+                                                   position, len(values)))
+            position += len(values) * values.itemsize
+        return b"".join(header + data)
+
+
+class _BinaryReader:
+    """Reads the tables of a Passage in the compact binary format, see to_binary.
+
+    The arrays are views of the given data, which are decoded only when they are used.
+
+    Attributes:
+        arrays: dictionary of array name -> memoryview of its items
+    """
+
+    def __init__(self, data):
+        data = memoryview(data)
+        if len(data) < _BINARY_HEADER.size:
+            raise ValueError("Data is too short for the compact binary passage format")
+        magic, version, num_arrays = _BINARY_HEADER.unpack_from(data)
+        if magic != BINARY_MAGIC:
+            raise ValueError("Data is not in the compact binary passage format")
+        if version > BINARY_VERSION:
+            raise ValueError("Unsupported compact binary passage format version: %d (newest supported is %d)" %
+                             (version, BINARY_VERSION))
+        self.arrays = {}
+        for i in range(num_arrays):
+            name, typecode, offset, length = _BINARY_ARRAY_ENTRY.unpack_from(
+                data, _BINARY_HEADER.size + i * _BINARY_ARRAY_ENTRY.size)
+            typecode = typecode.decode("ascii")
+            view = data[offset:offset + length * array(typecode).itemsize]
+            if sys.byteorder == "little":
+                view = view.cast(typecode)
+            else:
+                view = array(typecode, view.tobytes())
+                view.byteswap()
+            self.arrays[name.rstrip(b"\0").decode("ascii")] = view
+        self._strings = None
+
+    def string(self, index):
+        """Returns the string with the given index, decoding only it if the list of all strings was not decoded."""
+        if index == _BINARY_NONE:
+            return None
+        if self._strings is not None:
+            return self._strings[index]
+        offsets = self.arrays["string_offsets"]
+        return self.arrays["string_text"][offsets[index]:offsets[index + 1]].tobytes().decode("utf-8",
+                                                                                                "surrogatepass")
+
+    @property
+    def strings(self):
+        """The list of all strings, decoded on first access."""
+        if self._strings is None:
+            data = self.arrays["string_text"].tobytes()
+            text = data.decode("utf-8", "surrogatepass")
+            offsets = self.arrays["string_offsets"].tolist()
+            if len(text) == len(data):  # all ASCII, so the byte offsets are also character offsets
+                self._strings = [text[start:end] for start, end in zip(offsets, offsets[1:])]
+            else:
+                self._strings = [data[start:end].decode("utf-8", "surrogatepass")
+                                 for start, end in zip(offsets, offsets[1:])]
+        return self._strings
+
+    def dicts(self, indices, lazy=False):
+        """Returns a list of the dictionaries with the given indices, creating a new dictionary for each.
+
+        :param lazy: whether to decode JSON values only when first accessed
+        """
+        strings = self.strings
+        offsets, keys, types, values = (self.arrays[name] for name in ("dict_offsets", "item_keys", "item_types",
+                                                                      "item_values"))
+        decoded = []
+        for index in indices:
+            dic = {}
+            for i in range(offsets[index], offsets[index + 1]):
+                value_type, value = types[i], values[i]
+                if value_type == _VALUE_STR:
+                    value = strings[value]
+                elif value_type == _VALUE_NONE:
+                    value = None
+                elif value_type == _VALUE_FALSE:
+                    value = False
+                elif value_type == _VALUE_TRUE:
+                    value = True
+                elif value_type == _VALUE_FLOAT:
+                    value = float(strings[value])
+                elif value_type == _VALUE_JSON:
+                    if lazy:
+                        if type(dic) is not core._DeferredDict:
+                            dic = core._DeferredDict(_decode_json, dic)
+                        dic.defer(strings[keys[i]], strings[value])
+                        continue
+                    value = json.loads(strings[value])
+                dic[strings[keys[i]]] = value
+            decoded.append(dic)
+        return decoded
+
+
+def _decode_json(_, value):
+    return json.loads(value)
+
+
+def to_binary(passage):
+    """Converts a Passage object to the compact binary format.
+
+    Unlike a pickle, the format does not depend on the classes of the core module, it is safe to read from
+    untrusted sources, and it is read without recursion, however deep the Passage is.
+    After a header of the magic bytes BINARY_MAGIC, the format version and the number of arrays,
+    there is a table of the arrays, with the name, array typecode, offset and length of each.
+    The arrays themselves are little-endian and aligned to 8 bytes:
+
+    * string_offsets, string_text: offsets of all strings in the UTF-8 text of their concatenation.
+      Strings are referred to by their index in this table, or 0xFFFFFFFF for None.
+    * dict_offsets, item_keys, item_types, item_values: the attribute and extra dictionaries, referred to by index,
+      where 0 is the empty dictionary. The items of dictionary i are in the range dict_offsets[i:i + 2] of the other
+      arrays: the key string, and the type and value of the value. The value is an integer, or the string of a str,
+      the repr of a float, or the JSON of any other value. None, False and True have their own types.
+    * passage: the ID string, attribute dictionary and extra dictionary of the Passage.
+    * layers: for each Layer, ordered by ID, its ID, attribute dictionary, extra dictionary, and the range of its
+      Nodes in the node arrays.
+    * node_ids, node_tags, node_attrib, node_extra: for each Node, in the order of the Layers and in each Layer
+      in its order, the ID and tag strings and the attribute and extra dictionaries.
+    * edge_offsets: the outgoing Edges of node i are in the range edge_offsets[i:i + 2] of the edge arrays.
+    * edge_children, edge_attrib, edge_extra: for each Edge, in the order of the outgoing Edges of each Node,
+      the index of the child Node and the attribute and extra dictionaries.
+    * category_offsets, edge_categories: the categories of edge i are in the range category_offsets[i:i + 2]
+      of edge_categories, which has their indices in the categories array.
+    * categories: the tag, slot, layer and parent strings of each distinct Category.
+
+    Attribute and extra values which are neither None, bool, int, float nor str must be JSON-serializable,
+    and are read back as decoded from JSON.
+
+    :param passage: the Passage to convert
+
+    :return: the bytes of the compact binary format
+    """
+    writer = _BinaryWriter()
+    string, dic = writer.string, writer.dict
+    layers = sorted(passage.layers, key=attrgetter('ID'))
+    layer_table, node_ids, node_tags, node_attrib, node_extra = (array("I") for _ in range(5))
+    nodes = [node for layer in layers for node in layer.all]
+    node_index = {id(node): i for i, node in enumerate(nodes)}
+    edge_offsets, edge_children, edge_attrib, edge_extra = array("I", [0]), array("I"), array("I"), array("I")
+    category_offsets, edge_categories, category_table = array("I", [0]), array("I"), array("I")
+    category_index = {}
+    for layer in layers:
+        layer_table.extend((string(layer.ID), dic(layer.attrib), dic(layer.extra), len(node_ids),
+                            len(node_ids) + len(layer.all)))
+        for node in layer.all:
+            node_ids.append(string(node.ID))
+            node_tags.append(string(node.tag))
+            node_attrib.append(dic(node.attrib))
+            node_extra.append(dic(node.extra))
+            for edge in node:
+                edge_children.append(node_index[id(edge.child)])
+                edge_attrib.append(dic(edge.attrib))
+                edge_extra.append(dic(edge.extra))
+                for category in edge.categories:
+                    index = category_index.get(category)
+                    if index is None:
+                        index = category_index[category] = len(category_index)
+                        category_table.extend(map(string, (category.tag, category.slot, category.layer,
+                                                           category.parent)))
+                    edge_categories.append(index)
+                category_offsets.append(len(edge_categories))
+            edge_offsets.append(len(edge_children))
+    writer.arrays.update(passage=array("I", (string(passage.ID), dic(passage.attrib), dic(passage.extra))),
+                         layers=layer_table, node_ids=node_ids, node_tags=node_tags, node_attrib=node_attrib,
+                         node_extra=node_extra, edge_offsets=edge_offsets, edge_children=edge_children,
+                         edge_attrib=edge_attrib, edge_extra=edge_extra, category_offsets=category_offsets,
+                         edge_categories=edge_categories, categories=category_table)
+    return writer.tobytes()
+
+
+def from_binary(data, layers=None, lazy_extra=False):
+    """Converts data in the compact binary format (see to_binary) to a Passage object.
+
+    The Passage is created in the same way as by from_standard, so it is equal to the one read from the standard XML.
+
+    :param data: bytes-like object of the compact binary format
+    :param layers: IDs of the layers to create, or None for all layers, see from_standard
+    :param lazy_extra: whether to decode extra values from JSON only when first accessed, see from_standard
+
+    :return: the Passage
+    :raise ValueError: if the data is not in the compact binary format, or in a newer version of it
+    """
+    reader = _BinaryReader(data)
+    arrays = reader.arrays
+    strings = reader.strings + [None]  # _string maps _BINARY_NONE to the last index
+
+    def _string(index):
+        return strings[-1 if index == _BINARY_NONE else index]
+
+    def _update_extra(obj, extra):
+        if type(extra) is core._DeferredDict:  # keep it, rather than decode its values by copying them
+            for key, value in obj.extra.items():
+                extra.setdefault(key, value)
+            obj.extra = extra
+        elif extra:
+            obj.extra.update(extra)
+
+    passage_id, passage_attrib, passage_extra = arrays["passage"]
+    attrib, = reader.dicts((passage_attrib,))
+    extra, = reader.dicts((passage_extra,), lazy=lazy_extra)
+    passage = core.Passage(_string(passage_id), attrib=attrib)
+    _update_extra(passage, extra)
+    categories = [core.Category(*map(_string, arrays["categories"][i:i + 4]))
+                  for i in range(0, len(arrays["categories"]), 4)]
+    passage._register_categories(categories)
+    node_ids, node_tags = arrays["node_ids"], arrays["node_tags"]
+    nodes = [None] * len(node_ids)  # by index, None for Nodes of layers which are not created
+    created_ranges = []
+    with passage.bulk():
+        layer_table = arrays["layers"]
+        for i in range(0, len(layer_table), 5):
+            layer_id, layer_attrib, layer_extra, start, end = layer_table[i:i + 5]
+            layer_id = _string(layer_id)
+            if layers is not None and layer_id not in layers:
+                continue
+            created_ranges.append((start, end))
+            attrib, = reader.dicts((layer_attrib,))
+            extra, = reader.dicts((layer_extra,), lazy=lazy_extra)
+            layer = _STANDARD_LAYER_CLASSES[layer_id](passage, attrib=attrib)
+            _update_extra(layer, extra)
+            created_nodes = {x.ID: x for x in layer.all}  # created automatically, as in from_standard
+            for index, node_id, tag, attrib, extra in zip(
+                    range(start, end), map(_string, node_ids[start:end]), map(_string, node_tags[start:end]),
+                    reader.dicts(arrays["node_attrib"][start:end]),
+                    reader.dicts(arrays["node_extra"][start:end], lazy=lazy_extra)):
+                node = created_nodes.get(node_id)
+                if node is None:
+                    node = _STANDARD_NODE_CLASSES[tag](root=passage, ID=node_id, tag=tag, attrib=attrib)
+                    if extra:
+                        node.extra = extra
+                else:
+                    for key, value in attrib.items():
+                        node.attrib[key] = value
+                    _update_extra(node, extra)
+                nodes[index] = node
+        edge_offsets, edge_children = arrays["edge_offsets"].tolist(), arrays["edge_children"].tolist()
+        category_offsets, edge_categories = arrays["category_offsets"].tolist(), arrays["edge_categories"].tolist()
+        for start, end in created_ranges:
+            first, last = edge_offsets[start], edge_offsets[end]
+            edge_attribs = reader.dicts(arrays["edge_attrib"][first:last])
+            edge_extras = reader.dicts(arrays["edge_extra"][first:last], lazy=lazy_extra)
+            for parent, parent_start, parent_end in zip(nodes[start:end], edge_offsets[start:end],
+                                                        edge_offsets[start + 1:end + 1]):
+                for i in range(parent_start, parent_end):
+                    child = nodes[edge_children[i]]
+                    if child is None:
+                        continue  # in a layer which is not created
+                    edge = parent.add_multiple([categories[c] for c in
+                                                edge_categories[category_offsets[i]:category_offsets[i + 1]]],
+                                               child, edge_attrib=edge_attribs[i - first])
+                    if edge_extras[i - first]:
+                        edge.extra = edge_extras[i - first]
+    return passage
+
+
+class PassageHandle:
+    """Lightweight view of a passage in the compact binary format (see to_binary), for scanning many passages.
+
+    Cheap queries are answered directly from the arrays of the format, without creating any Node, and the
+    Passage itself is only created by load(), which does not keep it, so it is released once no longer used.
+    The data is not copied, so it can be a slice of a memory-mapped corpus file (see ioutil.CorpusFile).
+
+    Attributes:
+        arrays: dictionary of array name -> memoryview of its items, see to_binary
+    """
+
+    def __init__(self, data):
+        self._data = data
+        self._reader = _BinaryReader(data)
+        self.arrays = self._reader.arrays
+
+    @property
+    def ID(self):
+        return self._reader.string(self.arrays["passage"][0])
+
+    def layer_range(self, layer_id):
+        """Returns the range of the Nodes of a Layer in the node arrays, or an empty range if there is no such Layer.
+        """
+        layer_table = self.arrays["layers"]
+        for i in range(0, len(layer_table), 5):
+            if self._reader.string(layer_table[i]) == layer_id:
+                return range(layer_table[i + 3], layer_table[i + 4])
+        return range(0)
+
+    def node_ids(self, layer_id):
+        """Returns a list of the IDs of the Nodes of a Layer, in its order."""
+        nodes, strings = self.layer_range(layer_id), self._reader.strings
+        return [strings[i] for i in self.arrays["node_ids"][nodes.start:nodes.stop]]
+
+    def __len__(self):
+        """Number of tokens (Terminals) in the passage."""
+        return len(self.layer_range(layer0.LAYER_ID))
+
+    @property
+    def tokens(self):
+        """List of the text of each Terminal, by position."""
+        terminals = self.layer_range(layer0.LAYER_ID)
+        return [attrib.get("text") for attrib in
+                self._reader.dicts(self.arrays["node_attrib"][terminals.start:terminals.stop])]
+
+    @property
+    def text(self):
+        """The tokens joined by spaces, as a single string of to_text."""
+        return " ".join(self.tokens)
+
+    def layer0_arrays(self):
+        """Returns the Terminal attributes as NumPy arrays, by position.
+
+        :return: dictionary with the integer arrays "paragraph" and "paragraph_position", and the boolean array "punct"
+                 which is True for Terminals with the Punctuation tag
+        """
+        import numpy as np
+        terminals, strings = self.layer_range(layer0.LAYER_ID), self._reader.strings
+        attribs = self._reader.dicts(self.arrays["node_attrib"][terminals.start:terminals.stop])
+        return dict(paragraph=np.array([a.get("paragraph", 0) for a in attribs], dtype=np.int64),
+                    paragraph_position=np.array([a.get("paragraph_position", 0) for a in attribs], dtype=np.int64),
+                    punct=np.array([strings[i] == layer0.NodeTags.Punct
+                                    for i in self.arrays["node_tags"][terminals.start:terminals.stop]], dtype=bool))
+
+    def degrees(self, layer_id):
+        """Returns a list of (node ID, number of incoming Edges, number of outgoing Edges) for the Nodes of a Layer."""
+        nodes, edge_offsets = self.layer_range(layer_id), self.arrays["edge_offsets"]
+        num_parents = [0] * len(self.arrays["node_ids"])
+        for child in self.arrays["edge_children"]:
+            num_parents[child] += 1
+        return [(node_id, num_parents[i], edge_offsets[i + 1] - edge_offsets[i])
+                for i, node_id in zip(nodes, self.node_ids(layer_id))]
+
+    def load(self, layers=None, lazy_extra=False):
+        """Creates the Passage, see from_binary.
+
+        :param layers: IDs of the layers to create, or None for all layers
+        :param lazy_extra: whether to decode extra values only when first accessed
+        """
+        return from_binary(self._data, layers=layers, lazy_extra=lazy_extra)
+
+
+class LoadedPassageHandle:
+    """Adapter of an already loaded Passage to the queries of PassageHandle, for passages read from files which are
+    not in the compact binary format, so that scanning them does not require converting them to it.
+    The arrays and layer ranges of the binary format are not available.
+    """
+
+    def __init__(self, passage):
+        self._passage = passage
+
+    @property
+    def ID(self):
+        return self._passage.ID
+
+    def _nodes(self, layer_id):
+        try:
+            return self._passage.layer(layer_id).all
+        except KeyError:
+            return []
+
+    def node_ids(self, layer_id):
+        """Returns a list of the IDs of the Nodes of a Layer, in its order."""
+        return [node.ID for node in self._nodes(layer_id)]
+
+    def degrees(self, layer_id):
+        """Returns a list of (node ID, number of incoming Edges, number of outgoing Edges) for the Nodes of a Layer."""
+        return [(node.ID, len(node.incoming), len(node.outgoing)) for node in self._nodes(layer_id)]
+
+    def __len__(self):
+        """Number of tokens (Terminals) in the passage."""
+        return len(self._nodes(layer0.LAYER_ID))
+
+    @property
+    def tokens(self):
+        """List of the text of each Terminal, by position."""
+        return [terminal.text for terminal in self._nodes(layer0.LAYER_ID)]
+
+    @property
+    def text(self):
+        """The tokens joined by spaces, as a single string of to_text."""
+        return " ".join(self.tokens)
+
+    def layer0_arrays(self):
+        """Returns the Terminal attributes as NumPy arrays, by position, see PassageHandle.layer0_arrays."""
+        import numpy as np
+        terminals = self._nodes(layer0.LAYER_ID)
+        return dict(paragraph=np.array([t.paragraph for t in terminals], dtype=np.int64),
+                    paragraph_position=np.array([t.para_pos for t in terminals], dtype=np.int64),
+                    punct=np.array([t.punct for t in terminals], dtype=bool))
+
+    def load(self, layers=None, lazy_extra=False):
+        """Returns the Passage, which is already loaded whole, so the arguments are ignored."""
+        return self._passage
+
+
+def file2passage(filename, layers=None, lazy_extra=False):
     """Opens a file and returns its parsed Passage object
-    Tries to read both as a standard XML file and as a binary pickle
+    Reads the compact binary format if the file starts with BINARY_MAGIC,
+    and otherwise tries to read both as a standard XML file and as a binary pickle
     :param filename: file name to write to
+    :param layers: IDs of the layers to create, or None for all layers, e.g. ("0",) to read just the text
+                   (see from_standard). A pickle is always read whole
+    :param lazy_extra: whether to decode extra values only when first accessed (see from_standard)
     """
-    methods = [pickle2passage, xml2passage]
+    try:
+        with open(filename, "rb") as h:
+            if h.read(len(BINARY_MAGIC)) == BINARY_MAGIC:
+                h.seek(0)
+                return from_binary(h.read(), layers=layers, lazy_extra=lazy_extra)
+    except OSError as e:
+        raise IOError("Failed reading '%s'" % filename) from e
+    methods = [pickle2passage, partial(xml2passage, layers=layers, lazy_extra=lazy_extra)]
     _, ext = os.path.splitext(filename)
     if ext == ".xml":
         del methods[0]
@@ -1147,9 +1937,9 @@ def file2passage(filename):
         raise IOError("Failed reading '%s'" % filename) from exception
 
 
-def xml2passage(filename):
+def xml2passage(filename, layers=None, lazy_extra=False):
     with open(filename, encoding="utf-8") as f:
-        return from_standard(ET.ElementTree().parse(f))
+        return from_standard_file(f, layers=layers, lazy_extra=lazy_extra)
 
 
 def pickle2passage(filename):
@@ -1158,21 +1948,22 @@ def pickle2passage(filename):
 
 
 def passage2file(passage, filename, indent=True, binary=False):
-    """Writes a UCCA passage as a standard XML file or a binary pickle
+    """Writes a UCCA passage as a standard XML file, a binary pickle or the compact binary format
     :param passage: passage object to write
     :param filename: file name to write to
     :param indent: whether to indent each line
-    :param binary: whether to write pickle format (or XML)
+    :param binary: whether to write pickle format (or XML), or "compact" to write the compact binary format (see
+                   to_binary), which is smaller, faster to read, and safe to read from untrusted sources
     """
-    if binary:
+    if binary == "compact":
+        with open(filename, "wb") as h:
+            h.write(to_binary(passage))
+    elif binary:
         with open(filename, "wb") as h:
             pickle.dump(passage, h)
     else:  # xml
-        root = to_standard(passage)
-        xml_string = ET.tostring(root).decode()
-        output = textutil.indent_xml(xml_string) if indent else xml_string
         with open(filename, "w", encoding="utf-8") as h:
-            h.write(output)
+            write_standard(passage, h, indent=indent)
 
 
 def split2sentences(passage, remarks=False, lang="en", ids=None):
@@ -1298,56 +2089,58 @@ def _copy_l1_nodes(passage, other, id_to_other, include=None, remarks=False):
     linkages = []
     remotes = []
     heads = []
-    while queue:
-        node, other_node = queue.pop()
-        if node.tag == layer1.NodeTags.Linkage:
-            if include is None or include.issuperset(node.children):
-                linkages.append(node)
-            continue
-        if other_node is None:
-            heads.append(node)
-            other_node = other_l1.heads[0]
-        for edge in node:
-            is_remote = edge.attrib.get("remote", False)
-            if include is None or edge.child in include or _unanchored(edge.child):
-                if is_remote:
-                    remotes.append((edge, other_node))
-                    continue
-                if edge.child.layer.ID == layer0.LAYER_ID:
-                    edge_categories = [(c.tag, c.slot, c.layer, c.parent) for c in edge.categories]
-                    other_node.add_multiple(edge_categories, id_to_other[edge.child.ID])
-                    continue
-                if edge.child.tag == layer1.NodeTags.Punctuation:
-                    grandchild = edge.child.children[0]
-                    other_child = other_l1.add_punct(other_node, id_to_other[grandchild.ID])
-                    other_child.incoming[0].categories = edge.categories
-                else:
+    with other.bulk():
+        while queue:
+            node, other_node = queue.pop()
+            if node.tag == layer1.NodeTags.Linkage:
+                if include is None or include.issuperset(node.children):
+                    linkages.append(node)
+                continue
+            if other_node is None:
+                heads.append(node)
+                other_node = other_l1.heads[0]
+            for edge in node:
+                is_remote = edge.attrib.get("remote", False)
+                if include is None or edge.child in include or _unanchored(edge.child):
+                    if is_remote:
+                        remotes.append((edge, other_node))
+                        continue
+                    if edge.child.layer.ID == layer0.LAYER_ID:
+                        edge_categories = [(c.tag, c.slot, c.layer, c.parent) for c in edge.categories]
+                        other_node.add_multiple(edge_categories, id_to_other[edge.child.ID])
+                        continue
+                    if edge.child.tag == layer1.NodeTags.Punctuation:
+                        grandchild = edge.child.children[0]
+                        other_child = other_l1.add_punct(other_node, id_to_other[grandchild.ID])
+                        other_child.incoming[0].categories = edge.categories
+                    else:
+                        edge_categories = [(c.tag, c.slot, c.layer, c.parent) for c in edge.categories]
+                        other_child = other_l1.add_fnode_multiple(other_node, edge_categories,
+                                                                  implicit=edge.child.attrib.get("implicit"))
+                        queue.append((edge.child, other_child))
+                    id_to_other[edge.child.ID] = other_child
+                    _copy_extra(edge.child, other_child, remarks)  # Add remotes
+                elif is_remote:  # Cross-paragraph remote edge -> create implicit child instead
                     edge_categories = [(c.tag, c.slot, c.layer, c.parent) for c in edge.categories]
-                    other_child = other_l1.add_fnode_multiple(other_node, edge_categories,
-                                                              implicit=edge.child.attrib.get("implicit"))
-                    queue.append((edge.child, other_child))
-                id_to_other[edge.child.ID] = other_child
-                _copy_extra(edge.child, other_child, remarks)  # Add remotes
-            elif is_remote:  # Cross-paragraph remote edge -> create implicit child instead
-                edge_categories = [(c.tag, c.slot, c.layer, c.parent) for c in edge.categories]
-                other_l1.add_fnode_multiple(other_node, edge_categories, implicit=True)
-    for edge, parent in remotes:
-        other_child = id_to_other.get(edge.child.ID)
-        edge_categories = [(c.tag, c.slot, c.layer, c.parent) for c in edge.categories]
-        if other_child is None:  # Promote remote edge to primary if the original primary parent is gone due to split
-            id_to_other[edge.child.ID] = other_child = \
-                other_l1.add_fnode_multiple(parent, edge_categories, implicit=edge.child.attrib.get("implicit"))
-            _copy_extra(edge.child, other_child, remarks)
-        else:
-            other_l1.add_remote_multiple(parent, edge_categories, other_child)
-    # Add linkages
-    for linkage in linkages:
-        try:
-            arguments = [id_to_other[argument.ID] for argument in linkage.arguments]
-            other_linkage = other_l1.add_linkage(id_to_other[linkage.relation.ID], *arguments)
-            _copy_extra(linkage, other_linkage, remarks)
-        except layer1.MissingRelationError:
-            pass
+                    other_l1.add_fnode_multiple(other_node, edge_categories, implicit=True)
+        for edge, parent in remotes:
+            other_child = id_to_other.get(edge.child.ID)
+            edge_categories = [(c.tag, c.slot, c.layer, c.parent) for c in edge.categories]
+            # Promote remote edge to primary if the original primary parent is gone due to split
+            if other_child is None:
+                id_to_other[edge.child.ID] = other_child = \
+                    other_l1.add_fnode_multiple(parent, edge_categories, implicit=edge.child.attrib.get("implicit"))
+                _copy_extra(edge.child, other_child, remarks)
+            else:
+                other_l1.add_remote_multiple(parent, edge_categories, other_child)
+        # Add linkages
+        for linkage in linkages:
+            try:
+                arguments = [id_to_other[argument.ID] for argument in linkage.arguments]
+                other_linkage = other_l1.add_linkage(id_to_other[linkage.relation.ID], *arguments)
+                _copy_extra(linkage, other_linkage, remarks)
+            except layer1.MissingRelationError:
+                pass
     for head, other_head in zip(heads, other_l1.heads):
         _copy_extra(head, other_head, remarks)
 
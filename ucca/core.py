@@ -9,6 +9,12 @@ are connected between themselves and to Nodes in other layers using
 """
 
 import functools
+import weakref
+from bisect import bisect_left, bisect_right
+from collections import deque
+from collections.abc import Sequence
+from contextlib import contextmanager
+from types import MappingProxyType
 
 # Max number of digits allowed for a unique ID
 UNIQUE_ID_MAX_DIGITS = 5
@@ -17,6 +23,23 @@ UNIQUE_ID_MAX_DIGITS = 5
 IRRELEVANT_ATTRIBUTES = {"uncertain"}
 
 
+def _id_key(ID):
+    """Returns the sort key of a :class:`Node` ID, computed once per Node.
+
+    Args:
+        ID: the Node ID, the layer ID and the unique ID joined by a separator
+
+    Returns:
+        a tuple of the layer ID (string) and the unique ID as an int, so that
+        layers are ordered lexicographically and unique IDs numerically.
+        Unique IDs which are not numbers are placed before the numeric ones
+        and ordered lexicographically between themselves.
+
+    """
+    layer, unique = ID.split(Node.ID_SEPARATOR)
+    return (layer, int(unique)) if unique.isdigit() else (layer, -1, unique)
+
+
 # Used as the default ordering key function for ordered objects, namely
 # :class:`Layer` and :class:`Node` .
 def id_orderkey(node):
@@ -26,12 +49,11 @@ def id_orderkey(node):
         node: :class:`Node` which we will to sort according to its ID
 
     Returns:
-        a string with the layer and unique ID in such a way that sort will
+        a tuple with the layer and unique ID in such a way that sort will
         first order lexicography the layer ID then numerically the unique ID.
 
     """
-    layer, unique = node.ID.split(Node.ID_SEPARATOR)
-    return "{} {:>{}}".format(layer, unique, UNIQUE_ID_MAX_DIGITS)
+    return node._key
 
 
 def edge_id_orderkey(edge):
@@ -42,12 +64,11 @@ def edge_id_orderkey(edge):
         parent and children after using :func:`id_orderkey`.
 
     Returns:
-        a string with the layer and unique ID in such a way that sort will
+        a pair of the parent and child keys, in such a way that sort will
         first order lexicography the layer ID then numerically the unique ID.
 
     """
-    return Edge.ID_FORMAT.format(id_orderkey(edge.parent),
-                                 id_orderkey(edge.child))
+    return edge._parent._key, edge._child._key
 
 
 class UCCAError(Exception):
@@ -81,7 +102,7 @@ class UnimplementedMethodError(UCCAError):
     pass
 
 
-class ModifyPassage:
+def ModifyPassage(fn):
     """Decorator for changing a :class:`Passage` or any member of it.
 
     This decorator is mandatory for anything which causes the elements in
@@ -89,6 +110,8 @@ class ModifyPassage:
     an attribute.
 
     It validates that the Passage is not frozen before allowing the change.
+    The check is done by a plain function wrapping the method once, at class
+    creation, so that it costs a single extra call per change.
 
     The decorator can't be used for __init__ calls, as at the stage of the
     check there are no instance attributes to check. So in such cases,
@@ -96,37 +119,195 @@ class ModifyPassage:
     decorated instead (and should be called after the instance attributes
     are set).
 
-    Attributes:
-        fn: the function object to decorate
+    :param fn: the method to decorate, whose first argument is the object
+            which modifies :class:`Passage`, and has an attribute root which
+            points to the Passage it is part of.
+    :return: The decorated method, which raises FrozenPassageError if the
+            :class:`Passage` is frozen and can't be modified.
+    """
 
+    @functools.wraps(fn)
+    def decorated(self, *args, **kwargs):
+        root = self.root
+        if root.frozen:
+            raise FrozenPassageError(root.ID)
+        return fn(self, *args, **kwargs)
+
+    return decorated
+
+
+def _getstate(obj):
+    """Returns the state of an object with __slots__ for pickling, as a dictionary of the slots which are set."""
+    state = {}
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, "__slots__", ()):
+            try:
+                state[name] = getattr(obj, name)
+            except AttributeError:
+                pass
+    if state.get("_extra") is not None:
+        state["_extra"] = dict(state["_extra"])
+    return state
+
+
+def _setstate(obj, state, **defaults):
+    """Restores an object with __slots__ from a pickled state, given default values for slots missing in it.
+
+    Objects pickled by older versions had no slots, so their state is the instance dictionary,
+    possibly as the first element of a pair, with 'extra' in place of '_extra'.
     """
+    if isinstance(state, tuple):
+        dict_state, slots_state = state
+        state = dict(dict_state or (), **(slots_state or {}))
+    if "extra" in state:
+        state = dict(state)
+        state["_extra"] = state.pop("extra")
+    for name, value in dict(defaults, **state).items():
+        setattr(obj, name, value)
 
-    def __init__(self, fn):
-        self.fn = fn
 
-    def __get__(self, obj, cls):
-        """Used to bind the function to the instance (add 'self')."""
-        return functools.partial(self.__call__, obj)
+class _LazyDict(dict):
+    """Empty dictionary which is stored in its owner only when first written to.
 
-    def __call__(self, *args, **kwargs):
-        """Decorating functions which modify :class:`Passage` elements.
+    Used as the ``extra`` dictionary of elements which are numerous and usually
+    have no extra data, so that no dictionary is allocated for most of them.
+    """
 
-        :param args: list of all arguments, assuming the first is the object
-                which modifies :class:`Passage`, and it has an attribute root
-                which points to the Passage it is part of.
-        :param kwargs: list of all keyword arguments
-        :return: The decorated function result.
-        :raise FrozenPassageError: if the :class:`Passage` is frozen and can't be
-                modified.
+    __slots__ = ("_owner",)
+
+    def __init__(self, owner):
+        super().__init__()
+        self._owner = owner
+
+    def _attach(self):
+        if self._owner is not None:
+            self._owner._extra = self
+            self._owner = None
+
+    def __setitem__(self, key, value):
+        self._attach()
+        super().__setitem__(key, value)
+
+    def setdefault(self, key, default=None):
+        self._attach()
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        self._attach()
+        super().update(*args, **kwargs)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+
+class _DeferredDict(dict):
+    """Dictionary whose values are stored encoded, and decoded only when first accessed.
+
+    Used as the ``extra`` dictionary of loaded elements when the converters defer decoding,
+    so that large values which are never used (such as serialized spaCy documents) are never decoded.
+    Every method returning values decodes them first, so it behaves as a dictionary of the decoded values.
+    """
+
+    __slots__ = ("_decode", "_pending")
+
+    def __init__(self, decode, *args, **kwargs):
         """
+        :param decode: function of a key and its encoded value, returning the decoded value
+        """
+        super().__init__(*args, **kwargs)
+        self._decode = decode
+        self._pending = set()  # keys whose values are not decoded yet
+
+    def defer(self, key, encoded):
+        """Sets the value of a key to be decoded from the given encoded value when first accessed."""
+        super().__setitem__(key, encoded)
+        self._pending.add(key)
 
-        @functools.wraps(self.fn)
-        def decorated(*args, **kwargs):
-            if args[0].root.frozen:
-                raise FrozenPassageError(args[0].root.ID)
-            return self.fn(*args, **kwargs)
+    def _decode_key(self, key):
+        if key in self._pending:
+            self._pending.discard(key)
+            super().__setitem__(key, self._decode(key, super().__getitem__(key)))
 
-        return decorated(*args, **kwargs)
+    def _decode_all(self):
+        for key in list(self._pending):
+            self._decode_key(key)
+
+    def __getitem__(self, key):
+        self._decode_key(key)
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def __setitem__(self, key, value):
+        self._pending.discard(key)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._pending.discard(key)
+        super().__delitem__(key)
+
+    def __iter__(self):  # overridden so that dict(self) and {**self} get values by __getitem__
+        return super().__iter__()
+
+    def pop(self, key, *args):
+        self._decode_key(key)
+        return super().pop(key, *args)
+
+    def popitem(self):
+        self._decode_all()
+        return super().popitem()
+
+    def setdefault(self, key, default=None):
+        self._decode_key(key)
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __or__(self, other):
+        self._decode_all()
+        return super().__or__(other)
+
+    def values(self):
+        self._decode_all()
+        return super().values()
+
+    def items(self):
+        self._decode_all()
+        return super().items()
+
+    def copy(self):
+        self._decode_all()
+        return dict(super().items())
+
+    def __eq__(self, other):
+        self._decode_all()
+        return super().__eq__(other)
+
+    def __ne__(self, other):
+        self._decode_all()
+        return super().__ne__(other)
+
+    def __repr__(self):
+        self._decode_all()
+        return super().__repr__()
+
+    def __reduce__(self):
+        return dict, (self.copy(),)
+
+
+# Shared, read-only extra dictionary of immutable objects
+_NO_EXTRA = MappingProxyType({})
 
 
 class _AttributeDict:
@@ -137,20 +318,32 @@ class _AttributeDict:
     dictionary is adhering to :class:`Passage` frozen status and modification
     decorators.
 
+    The underlying dictionary is only allocated when the first attribute is
+    set, as most elements have no attributes.
+
     Attributes:
         root: the Passage this object is linked with
 
     """
 
+    __slots__ = ("_root", "_dict")
+
     def __init__(self, root, mapping=None):
         self._root = root
-        self._dict = mapping.copy() if mapping is not None else dict()
+        self._dict = mapping.copy() if mapping else None
+
+    __getstate__ = _getstate
+
+    def __setstate__(self, state):
+        _setstate(self, state)
 
     def __getitem__(self, key):
+        if self._dict is None:
+            raise KeyError(key)
         return self._dict[key]
 
     def get(self, key, default=None):
-        return self._dict.get(key, default)
+        return default if self._dict is None else self._dict.get(key, default)
 
     def equals(self, other):
         """True iff the two objects are equal (only dicts, w.o.r.t Passage).
@@ -162,55 +355,274 @@ class _AttributeDict:
         def omit_irrelevant(d):
             return {k: v for k, v in d.items() if k not in IRRELEVANT_ATTRIBUTES}
 
-        return omit_irrelevant(self._dict) == omit_irrelevant(other._dict)
+        return omit_irrelevant(self._dict or {}) == omit_irrelevant(other._dict or {})
 
     @property
     def root(self):
         return self._root
 
     def copy(self):
-        return self._dict.copy()
+        return {} if self._dict is None else self._dict.copy()
 
     @ModifyPassage
     def __setitem__(self, key, value):
+        if self._dict is None:
+            self._dict = {}
+        if self._root._journal is not None:
+            self._root._journal._append(Change.ATTRIB, self, key, self._dict.get(key, Change.MISSING), value)
         self._dict[key] = value
+        self._root._epoch += 1
 
     @ModifyPassage
     def update(self, values):
+        if self._dict is None:
+            self._dict = {}
+        if self._root._journal is not None:
+            values = dict(values)
+            for key, value in values.items():
+                self._root._journal._append(Change.ATTRIB, self, key, self._dict.get(key, Change.MISSING), value)
         self._dict.update(values)
+        self._root._epoch += 1
 
     @ModifyPassage
     def __delitem__(self, key):
-        del self._dict[key]
+        if self._dict is None:
+            raise KeyError(key)
+        value = self._dict.pop(key)
+        if self._root._journal is not None:
+            self._root._journal._append(Change.ATTRIB, self, key, value, Change.MISSING)
+        self._root._epoch += 1
 
     def __len__(self):
-        return len(self._dict)
+        return 0 if self._dict is None else len(self._dict)
 
     def items(self):
-        return self._dict.items()
+        return ({} if self._dict is None else self._dict).items()
+
+
+class _OrderedNodes:
+    """Sequence of :class:`Node` objects kept sorted by an ordering key function.
+
+    The key of every member is computed once, when it is inserted, and kept
+    alongside it, so inserting or removing a member takes a binary search over
+    the cached keys instead of re-sorting the whole sequence. Members are
+    tracked by identity, so membership checks are O(1) and never call the
+    (possibly custom) comparison methods of the nodes.
+
+    Ties between equal keys are broken by insertion order, the same way a
+    stable sort of an appended list would break them.
+
+    Attributes:
+        orderkey: the key function for ordering the members
+
+    """
+
+    def __init__(self, orderkey, nodes=()):
+        self._orderkey = orderkey
+        self._nodes = []
+        self._keys = []
+        self._key_of = {}  # id(node) -> cached key
+        for node in nodes:
+            self.add(node)
+
+    @property
+    def orderkey(self):
+        return self._orderkey
+
+    def add(self, node):
+        """Inserts a node into its position according to the ordering key."""
+        key = self._orderkey(node)
+        keys = self._keys
+        if not keys or not key < keys[-1]:  # added in order, as when reading a passage
+            keys.append(key)
+            self._nodes.append(node)
+        else:
+            i = bisect_right(keys, key)
+            keys.insert(i, key)
+            self._nodes.insert(i, node)
+        self._key_of[id(node)] = key
+
+    def remove(self, node):
+        """Removes a node, raising ValueError if it is not a member."""
+        try:
+            key = self._key_of.pop(id(node))
+        except KeyError as e:
+            raise ValueError("%s is not in the sequence" % node) from e
+        i = bisect_left(self._keys, key)
+        while self._nodes[i] is not node:
+            i += 1
+        del self._keys[i]
+        del self._nodes[i]
+
+    def discard(self, node):
+        """Removes a node if it is a member."""
+        if id(node) in self._key_of:
+            self.remove(node)
+
+    def reposition(self, node):
+        """Moves a member to its correct position after its key may have changed."""
+        if id(node) in self._key_of and self._orderkey(node) != self._key_of[id(node)]:
+            self.remove(node)
+            self.add(node)
+
+    def resort(self, orderkey, nodes=None):
+        """Re-orders all members according to a new key function, optionally replacing them by new ones."""
+        keyed = sorted(((orderkey(node), node) for node in (self._nodes if nodes is None else nodes)),
+                       key=lambda pair: pair[0])
+        self._orderkey = orderkey
+        self._keys = [key for key, _ in keyed]
+        self._nodes = [node for _, node in keyed]
+        self._key_of = {id(node): key for key, node in keyed}
+
+    def __contains__(self, node):
+        return id(node) in self._key_of
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __iter__(self):
+        return iter(self._nodes)
+
+    def __reversed__(self):
+        return reversed(self._nodes)
+
+    def __getitem__(self, index):
+        return self._nodes[index]
+
+    def __getstate__(self):
+        return {"orderkey": self._orderkey, "nodes": self._nodes, "keys": self._keys}
+
+    def __setstate__(self, state):
+        # Nodes may not be fully unpickled yet, so keys are not re-computed
+        self._orderkey = state["orderkey"]
+        self._nodes = state["nodes"]
+        self._keys = state["keys"]
+        self._key_of = {id(node): key for node, key in zip(self._nodes, self._keys)}
+
+    def __repr__(self):
+        return repr(self._nodes)
+
+
+class SequenceView(Sequence):
+    """Read-only view of a sequence of UCCA elements, reflecting its changes without copying it.
+
+    Views compare equal to lists and tuples with the same elements, and slicing
+    them returns a list. Iterating over a view while the underlying sequence
+    changes size raises RuntimeError, the same way as a dict does; iterate over
+    :meth:`snapshot` instead when changing the :class:`Passage` in the loop.
+
+    """
+
+    __slots__ = ("_seq",)
+
+    def __init__(self, seq):
+        self._seq = seq
+
+    def snapshot(self):
+        """Returns a list with the current elements, unaffected by later changes."""
+        return list(self._seq)
+
+    def __len__(self):
+        return len(self._seq)
+
+    def __getitem__(self, index):
+        return self._seq[index]
+
+    def __contains__(self, item):
+        return item in self._seq
+
+    def __iter__(self):
+        seq = self._seq
+        size = len(seq)
+        for item in seq:
+            yield item
+            if len(seq) != size:
+                raise RuntimeError("Sequence changed size during iteration, iterate over a snapshot() instead")
+
+    def __reversed__(self):
+        return reversed(self.snapshot())
+
+    def __eq__(self, other):
+        if isinstance(other, (SequenceView, list, tuple)):
+            return len(self) == len(other) and all(x is y or x == y for x, y in zip(self._seq, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __add__(self, other):
+        return self.snapshot() + list(other)
+
+    def __radd__(self, other):
+        return list(other) + self.snapshot()
+
+    def __repr__(self):
+        return repr(self.snapshot())
 
 
 class Category:
     """when considering refinement layers, each edge can have multiple tags sorted in a certain hierarchy.
     for this reason, a category must include not only the tag information but also the layer and hierarchy
     information.
+
+    Categories are immutable and interned: creating a Category with the same tag, slot, layer and parent
+    returns the same shared object, so that Edges only hold references to the few distinct ones.
+    Interned Categories are only kept while in use, and their extra is empty and read-only.
+    Use :meth:`replace` or :meth:`Edge.replace_category` to get a Category with different values; giving them
+    extra returns a Category which is not shared, whose extra is a writable copy of the given dictionary.
     """
 
-    def __init__(self, tag, slot=None, layer=None, parent=None):
-        self._tag = tag
-        self._slot = slot if slot else ""
-        self._layer = layer if layer else ""
-        self._parent = parent if parent else ""
-        self.extra = {}
+    __slots__ = ("_tag", "_slot", "_layer", "_parent", "_extra", "__weakref__")
+
+    _interned = weakref.WeakValueDictionary()  # (tag, slot, layer, parent) -> Category
+
+    def __new__(cls, *args, **kwargs):
+        if not args and not kwargs:  # unpickling a Category pickled by an older version
+            return super().__new__(cls)
+        key, extra = cls._values(*args, **kwargs)
+        if extra:  # mutable, so not shared
+            category = super().__new__(cls)
+            category._set(*key, extra=dict(extra))
+            return category
+        category = cls._interned.get(key)
+        if category is None:
+            category = super().__new__(cls)
+            category._set(*key)
+            cls._interned[key] = category
+        return category
+
+    @staticmethod
+    def _values(tag, slot=None, layer=None, parent=None, extra=None):
+        return (tag, slot if slot else "", layer if layer else "", parent if parent else ""), extra
+
+    def _set(self, tag, slot, layer, parent, extra=None):
+        for name, value in zip(self.__slots__, (tag, slot, layer, parent, extra)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("Category objects are immutable, use Category.replace instead")
+
+    def __reduce__(self):
+        return Category, tuple(self) + ((self._extra,) if self._extra else ())
+
+    def __setstate__(self, state):
+        # Only for pickles from older versions, whose Categories are interned again by Edge.__setstate__
+        key, extra = self._values(state["_tag"], state["_slot"], state["_layer"], state["_parent"],
+                                  state.get("_extra"))
+        self._set(*key, extra=extra)
+
+    def replace(self, **kwargs):
+        """Returns the Category with the given values (any of tag, slot, layer, parent and extra) replaced."""
+        return Category(**dict(zip(("tag", "slot", "layer", "parent", "extra"), tuple(self) + (self._extra,)),
+                               **kwargs))
+
+    @property
+    def extra(self):
+        return _NO_EXTRA if self._extra is None else self._extra
 
     @property
     def tag(self):
         return self._tag
 
-    @tag.setter
-    def tag(self, new_tag):
-        self._tag = new_tag
-
     @property
     def slot(self):
         return self._slot
@@ -223,10 +635,6 @@ class Category:
     def parent(self):
         return self._parent
 
-    @parent.setter
-    def parent(self, new_parent):
-        self._parent = new_parent
-
     def to_xml(self):
         pass
 
@@ -260,6 +668,8 @@ class Edge:
 
     ID_FORMAT = "{}->{}"
 
+    __slots__ = ("_root", "_parent", "_child", "_attrib", "_categories", "_extra")
+
     def __init__(self, root, parent, child, tag=None, attrib=None):
         """Creates a new :class:`Edge` object.
 
@@ -275,8 +685,23 @@ class Edge:
         self._parent = parent
         self._child = child
         self._attrib = _AttributeDict(root, attrib)
-        self._categories = [Category(tag)] if tag else []
-        self.extra = {}
+        self._categories = (Category(tag),) if tag else ()
+        self._extra = None
+
+    __getstate__ = _getstate
+
+    def __setstate__(self, state):
+        _setstate(self, state, _extra=None)
+        if isinstance(getattr(self, "_categories", None), list):  # pickled by an older version
+            self._categories = tuple(c.replace() for c in self._categories)
+
+    @property
+    def extra(self):
+        return _LazyDict(self) if self._extra is None else self._extra
+
+    @extra.setter
+    def extra(self, value):
+        self._extra = value
 
     @property
     def tag(self):
@@ -285,9 +710,7 @@ class Edge:
     @tag.setter
     @ModifyPassage
     def tag(self, new_tag):
-        old_tag = self.tag
-        self.categories[0].tag = new_tag
-        self._root._change_edge_tag(self, old_tag)
+        self._set_categories((self.categories[0].replace(tag=new_tag),) + self._categories[1:])
 
     @property
     def tags(self):
@@ -311,7 +734,20 @@ class Edge:
 
     @categories.setter
     def categories(self, new_categories):
-        self._categories = new_categories
+        self._set_categories(tuple(new_categories))
+
+    def _set_categories(self, categories):
+        """Replaces the tuple of categories of the Edge, updating the :class:`Passage` and Layers with the change.
+
+        Layers are notified of any change in the categories, not only in the tag (the first category),
+        as layer-specific bookkeeping (e.g. top scenes) may depend on any of them.
+        """
+        old_categories = self._categories
+        if self._root._journal is not None:
+            self._root._journal._append(Change.EDGE_CATEGORIES, self, None, old_categories, categories)
+        self._categories = categories
+        self._parent._edges_changed()
+        self._root._change_edge_tag(self, old_categories[0].tag if old_categories else None)
 
     @property
     def child(self):
@@ -355,11 +791,25 @@ class Edge:
     def add(self, tag, slot="", layer="", parent=""):
         """ adds a new category to the edge"""
         c = Category(tag, slot, layer, parent)
-        self.categories.append(c)
-        if c.tag not in self.root.categories:
-            self.root._update_categories(c)
-        if c.parent and c.parent not in self.root.refined_categories:
-            self.root._update_refined_categories(c.parent)
+        self._set_categories(self.categories + (c,))
+        self._root._register_categories((c,))
+        return c
+
+    @ModifyPassage
+    def replace_category(self, category, **kwargs):
+        """Replaces one of the categories of the edge by one with some different values.
+
+        :param category: the Category to replace, one of self.categories
+        :param kwargs: new values for any of tag, slot, layer, parent and extra (see Category)
+
+        :return: the new Category
+
+        :raise ValueError: if category is not one of the categories of the edge
+
+        """
+        index = self.categories.index(category)
+        c = category.replace(**kwargs)
+        self._set_categories(self._categories[:index] + (c,) + self._categories[index + 1:])
         return c
 
     def __repr__(self):
@@ -369,6 +819,84 @@ class Edge:
         return self.categories[index]
 
 
+def _freeze(value):
+    """Returns a hashable equivalent of an attribute value, for :class:`_StructureDigests`."""
+    if isinstance(value, list):
+        return (list,) + tuple(map(_freeze, value))
+    if isinstance(value, dict):
+        return dict, frozenset((k, _freeze(v)) for k, v in value.items())
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
+
+
+class _StructureDigests:
+    """Assigns digests to Nodes and Edges such that equal digests mean equal structures.
+
+    A digest is an int which stands for the canonical form of a Node: its tag, its
+    attributes (without IRRELEVANT_ATTRIBUTES) and the digests of its outgoing Edges,
+    sorted unless the comparison is ordered. An Edge stands for its tag, attributes
+    and the digest of its child. Digests are computed bottom-up and each form is
+    interned, so two Nodes have the same digest iff they are Node-equal (see
+    :meth:`Node.equals`), and comparing whole subgraphs is a dictionary lookup.
+    Digests are only comparable within the same object.
+
+    """
+
+    def __init__(self, ordered=False, ignore_node=None, ignore_edge=None):
+        self._ordered = ordered
+        self._ignore_node = ignore_node
+        self._ignore_edge = ignore_edge
+        self._forms = {}  # canonical form -> digest
+        self._digests = {}  # id(Node) -> digest
+
+    def _intern(self, form):
+        return self._forms.setdefault(form, len(self._forms))
+
+    def _edges(self, node):
+        return [edge for edge in node._outgoing
+                if (self._ignore_node is None or not self._ignore_node(edge._child)) and
+                (self._ignore_edge is None or not self._ignore_edge(edge))]
+
+    @staticmethod
+    def attrib(attrib):
+        """Returns the canonical form of an attribute dictionary."""
+        return frozenset((k, _freeze(v)) for k, v in attrib.items() if k not in IRRELEVANT_ATTRIBUTES)
+
+    def edges(self, node):
+        """Returns the canonical form of the outgoing Edges of a Node whose children have digests."""
+        digests = [self._intern(("edge", edge.tag, self.attrib(edge._attrib),
+                                 self._digests.get(id(edge._child), ("cycle", id(edge._child)))))
+                   for edge in self._edges(node)]
+        return tuple(digests if self._ordered else sorted(digests))
+
+    def edge(self, edge):
+        """Returns the digest of an Edge, including its child."""
+        return self._intern(("edge", edge.tag, self.attrib(edge._attrib), self.node(edge._child)))
+
+    def node(self, node):
+        """Returns the digest of a Node, computing those of its descendants first."""
+        digest = self._digests.get(id(node))
+        if digest is not None:
+            return digest
+        stack = [node]
+        expanded = set()
+        while stack:
+            current = stack[-1]
+            if id(current) in self._digests:
+                stack.pop()
+                continue
+            if id(current) not in expanded:  # a Node in a cycle is computed when it is reached again
+                expanded.add(id(current))
+                children = [edge._child for edge in self._edges(current) if id(edge._child) not in self._digests]
+                if children:
+                    stack.extend(children)
+                    continue
+            stack.pop()
+            self._digests[id(current)] = self._intern(current._structure(self))
+        return self._digests[id(node)]
+
+
 class Node:
     """Labeled Node in UCCA annotation graph.
 
@@ -386,8 +914,8 @@ class Node:
         extra: temporary storage space for undocumented attributes and data
         tag: the string label of the Node
         layer: the Layer this Node belongs to
-        incoming: a copy of the incoming Edges to this object
-        outgoing: a copy of the outgoing Edges from this object
+        incoming: a read-only view of the incoming Edges to this object
+        outgoing: a read-only view of the outgoing Edges from this object
         parents: the Nodes which have incoming Edges to this object
         children: the Nodes which have outgoing Edges from this object
         orderkey: the key function for ordering the outgoing Edges
@@ -398,6 +926,8 @@ class Node:
 
     ID_SEPARATOR = '.'
 
+    __slots__ = ("_tag", "_root", "_ID", "_key", "_layer", "_attrib", "_extra", "_outgoing", "_incoming", "_orderkey")
+
     def __init__(self, ID, root, tag, attrib=None, *,
                  orderkey=edge_id_orderkey):
         """Creates a new :class:`Node` object.
@@ -413,18 +943,35 @@ class Node:
         self._tag = tag
         self._root = root
         self._ID = ID
+        self._key = _id_key(ID)
+        try:
+            self._layer = root.layer(self._key[0])
+        except KeyError as e:
+            raise KeyError("Invalid layer '%s' in node ID '%s'" % (self._key[0], self._ID)) from e
         self._attrib = _AttributeDict(root, attrib)
-        self.extra = {}
+        self._extra = None
         self._outgoing = []
         self._incoming = []
         self._orderkey = orderkey
 
         # After properly initializing self, add it to the Passage/Layer
         root._add_node(self)
-        try:
-            root.layer(self.layer.ID)._add_node(self)
-        except KeyError as e:
-            raise ValueError("Invalid layer '%s' in node ID '%s'" % (self.layer.ID, self._ID)) from e
+        self._layer._add_node(self)
+
+    __getstate__ = _getstate
+
+    def __setstate__(self, state):
+        _setstate(self, state, _extra=None)
+        if not hasattr(self, "_key"):  # pickled by an older version
+            self._key = _id_key(self._ID)
+
+    @property
+    def extra(self):
+        return _LazyDict(self) if self._extra is None else self._extra
+
+    @extra.setter
+    def extra(self, value):
+        self._extra = value
 
     @property
     def tag(self):
@@ -451,15 +998,15 @@ class Node:
 
     @property
     def layer(self):
-        return self._root.layer(self._ID.split(Node.ID_SEPARATOR)[0])
+        return self._layer
 
     @property
     def incoming(self):
-        return tuple(self._incoming)
+        return SequenceView(self._incoming)
 
     @property
     def outgoing(self):
-        return tuple(self._outgoing)
+        return SequenceView(self._outgoing)
 
     @property
     def parents(self):
@@ -499,14 +1046,26 @@ class Node:
         """
         edge = Edge(root=self._root, parent=self,
                     child=node, attrib=edge_attrib)
-        for category in edge_categories:
-            edge.add(*category)
+        edge._categories = tuple(category if type(category) is Category else Category(*category)
+                                 for category in edge_categories)
+        self._root._register_categories(edge._categories)
+        self._link(edge)
+        return edge
+
+    def _link(self, edge):
+        """Adds an :class:`Edge` whose parent is self to the Edges of self and of its child, and to the Passage.
+
+        :param edge: the Edge object, either new or one which was removed before
+        """
+        node = edge._child
         self._outgoing.append(edge)
-        self._outgoing.sort(key=self._orderkey)
         node._incoming.append(edge)
-        node._incoming.sort(key=node._orderkey)
-        self.root._add_edge(edge)
-        return edge
+        if self._root._bulk:  # sorting is deferred to the end of the bulk change
+            self._root._unsorted.update(((id(self), self), (id(node), node)))
+        else:
+            self._outgoing.sort(key=self._orderkey)
+            node._incoming.sort(key=node._orderkey)
+        self._root._add_edge(edge)
 
     @ModifyPassage
     def add(self, tag, node, *, edge_attrib=None):
@@ -564,6 +1123,16 @@ class Node:
     def orderkey(self, value):
         self._orderkey = value
         self._outgoing.sort(key=value)
+        self._root._version += 1
+        self._edges_changed()
+
+    def _edges_changed(self):
+        """Called when Edges are added to or removed from this Node, reordered, or the categories of one change.
+
+        Subclasses which keep information derived from their Edges discard it here.
+
+        """
+        pass
 
     @ModifyPassage
     def destroy(self):
@@ -573,10 +1142,10 @@ class Node:
         self from the :class:`Layer` and Passage objects.
 
         """
-        # using outgoing and incoming so I won't change the list I'm working on
-        for edge in self.outgoing:
+        # using snapshots of outgoing and incoming so I won't change the list I'm working on
+        for edge in self.outgoing.snapshot():
             self.remove(edge)
-        for edge in self.incoming:
+        for edge in self.incoming.snapshot():
             edge.parent.remove(edge)
         self.layer._remove_node(self)
         self._root._remove_node(self)
@@ -606,31 +1175,14 @@ class Node:
             return False
         if not recursive:
             return True
-        edges, other_edges = [[edge for edge in node
-                               if (ignore_node is None or
-                                   not ignore_node(edge.child)) and (
-                                       ignore_edge is None or
-                                       not ignore_edge(edge))]
-                              for node in (self, other)]
-        if len(edges) != len(other_edges):
-            return False  # not necessary, but gives better performance
-        if ordered:
-            return all(e1.equals(e2, ordered=True,
-                                 ignore_node=ignore_node, ignore_edge=ignore_edge)
-                       for e1, e2 in zip(edges, other_edges))
-        # For unordered equality, I try to find & remove an equivalent
-        # Edge + Node couple from other's Edges until exhausted.
-        # Because both Edge-equality and Node-equality are equivalence
-        # classes, I can just take the first I found and remove it w/o
-        # trying to iterate through possible orders.
-        try:
-            for e1 in edges:
-                other_edges.remove(next(e2 for e2 in other_edges
-                                        if e1.equals(e2, ignore_node=ignore_node,
-                                                     ignore_edge=ignore_edge)))
-        except StopIteration:
-            return False
-        return not other_edges
+        # Both Edge-equality and Node-equality are equivalence classes, so
+        # they can be decided by comparing digests of the whole subgraphs.
+        digests = _StructureDigests(ordered, ignore_node, ignore_edge)
+        return digests.node(self) == digests.node(other)
+
+    def _structure(self, digests):
+        """Returns the canonical form of this Node for :class:`_StructureDigests`, given those of its children."""
+        return "node", self._tag, digests.attrib(self._attrib), digests.edges(self)
 
     def missing_edges(self, other, ignore_node=None):
         """Returns edges present in this node but missing in the other.
@@ -645,10 +1197,12 @@ class Node:
                                if ignore_node is None or
                                not ignore_node(edge.child)]
                               for node in (self, other)]
-        return sorted([e1 for e1 in edges if not any(e1.equals(e2) for e2 in other_edges)],
+        digests = _StructureDigests()
+        other_digests = {digests.edge(e2) for e2 in other_edges}
+        return sorted([e1 for e1 in edges if digests.edge(e1) not in other_digests],
                       key=edge_id_orderkey)
 
-    def iter(self, obj="nodes", method="dfs", duplicates=False, key=None):
+    def iter(self, obj="nodes", method="dfs", duplicates=False, key=None, order="pre", stop=None):
         """Iterates the :class:`Node` objects in the subtree of self.
 
         :param obj: yield Node objects (use value "nodes", default) or Edge
@@ -663,6 +1217,12 @@ class Node:
                 takes one argument (the item) and returns True if it should be
                 returned to the user. If an item isn't returned, its subtree
                 is still iterated.  Defaults to None (returns all items).
+            order: yield each item before the items in its subtree (use value
+                "pre", default) or after them (value "post", only for "dfs").
+            stop: boolean function which takes one argument (the item) and
+                returns True if the subtree of the item should not be iterated.
+                The item itself is still yielded. Defaults to None (iterates
+                the whole subtree).
 
         Yields:
             a :class:`Node` or :class:`Edge` object according to the iteration
@@ -673,28 +1233,74 @@ class Node:
             raise ValueError("method can be either 'dfs' or 'bfs'")
         if obj not in ("nodes", "edges"):
             raise ValueError("obj can be either 'nodes' or 'edges'")
-        processed = set()
-        if obj == 'nodes':
-            waiting = [self]
+        if order not in ("pre", "post"):
+            raise ValueError("order can be either 'pre' or 'post'")
+        if order == "post" and method == "bfs":
+            raise ValueError("order can be 'post' only with method 'dfs'")
+        items = None
+        if stop is None:  # the order of a whole subtree is reused while the Passage structure is unchanged
+            items = self._root._traversal((id(self), obj, method, duplicates, order))
+        if items is None:
+            items = _traverse([self] if obj == "nodes" else self._outgoing, edges=obj == "edges",
+                              bfs=method == "bfs", duplicates=duplicates, post=order == "post", stop=stop)
+            if stop is None:
+                items = self._root._record_traversal((id(self), obj, method, duplicates, order), items)
+        if key is None:
+            yield from items
         else:
-            waiting = self._outgoing[:]
-        while len(waiting):
-            curr = waiting.pop(0)
-            if key is None or key(curr):
-                yield curr
-            processed.add(curr)
-            to_add = curr.children if obj == 'nodes' else list(curr.child)
-            to_add = [x for x in to_add if duplicates or x not in processed]
-            if method == "bfs":
-                waiting.extend(to_add)
-            else:
-                waiting = to_add + waiting
+            yield from filter(key, items)
 
     def get_terminals(self, *args, **kwargs):
         """Returns a list of all terminals under the span of this Node."""
         return [t for e in self._outgoing for t in e.child.get_terminals(*args, **kwargs)]
 
 
+def _traverse(items, edges, bfs, duplicates, post, stop):
+    """Iterates Nodes or Edges in the subgraph under the given ones, see :meth:`Node.iter`.
+
+    :param items: the Nodes or Edges to start from, in order
+    :param edges: whether items are Edges, so the successors of an Edge are the outgoing Edges of its child
+    :param bfs: whether to iterate breadth-first rather than depth-first
+    :param duplicates: whether items which are reachable by more than one path are yielded once per path
+    :param post: whether to yield each item after its subtree (depth-first only)
+    :param stop: function which returns True for items whose subtree should not be iterated, or None
+
+    """
+    def successors(item):
+        if stop is not None and stop(item):
+            return ()
+        return item._child._outgoing if edges else [edge._child for edge in item._outgoing]
+
+    processed = set()  # ids, as Terminals define equality by value
+    if post:
+        for item in items:
+            if not duplicates:
+                if id(item) in processed:
+                    continue
+                processed.add(id(item))
+            stack = [(item, iter(successors(item)))]
+            while stack:
+                for child in stack[-1][1]:
+                    if duplicates or id(child) not in processed:
+                        processed.add(id(child))
+                        stack.append((child, iter(successors(child))))
+                        break
+                else:
+                    yield stack.pop()[0]
+        return
+    waiting = deque(items if bfs else reversed(items))  # for depth-first, the next item is at the end
+    pop = waiting.popleft if bfs else waiting.pop
+    while waiting:
+        item = pop()
+        if not duplicates:
+            if id(item) in processed:
+                continue
+            processed.add(id(item))
+        yield item
+        to_add = [x for x in successors(item) if duplicates or id(x) not in processed]
+        waiting.extend(to_add if bfs else reversed(to_add))
+
+
 class Layer:
     """Group of similar :class:`Node` objects in UCCA annotation graph.
 
@@ -714,8 +1320,8 @@ class Layer:
             and Nodes outside the Layer (hence, the Edges are not in the Layer)
             the order will not be updated (because the Layer object won't know
             that something has changed).
-        all: a list of all the Nodes which are part of this Layer
-        heads: a list of all Nodes which have no incoming Edges in the subgraph
+        all: a read-only view of all the Nodes which are part of this Layer
+        heads: a read-only view of all Nodes which have no incoming Edges in the subgraph
             of the Layer (can have Edges from Nodes in other Layers).
 
     """
@@ -735,8 +1341,8 @@ class Layer:
         self._root = root
         self._attrib = _AttributeDict(root, attrib)
         self.extra = {}
-        self._all = []
-        self._heads = []
+        self._all = _OrderedNodes(orderkey)
+        self._heads = _OrderedNodes(orderkey)
         self._orderkey = orderkey
         root._add_layer(self)
 
@@ -754,11 +1360,11 @@ class Layer:
 
     @property
     def all(self):
-        return self._all[:]
+        return SequenceView(self._all)
 
     @property
     def heads(self):
-        return self._heads[:]
+        return SequenceView(self._heads)
 
     @property
     def orderkey(self):
@@ -767,8 +1373,8 @@ class Layer:
     @orderkey.setter
     def orderkey(self, value):
         self._orderkey = value
-        self._all.sort(key=value)
-        self._heads.sort(key=value)
+        self._all.resort(value)
+        self._heads.resort(value)
 
     def equals(self, other, *, ordered=False, ignore_node=None, ignore_edge=None):
         """Returns whether two Layer objects are equal.
@@ -787,28 +1393,71 @@ class Layer:
         :return: True iff self and other are Layer-equal.
 
         """
+        return self._equals(other, _StructureDigests(ordered, ignore_node, ignore_edge), ordered, ignore_node)
+
+    def _equals(self, other, digests, ordered, ignore_node):
+        """Compares the Layers given a :class:`_StructureDigests` object, which may be shared between Layers."""
         if not self._attrib.equals(other._attrib):
             return False
-        heads, other_heads = [[head for head in layer.heads
+        heads, other_heads = [[digests.node(head) for head in layer.heads
                                if ignore_node is None or
                                not ignore_node(head)]
                               for layer in (self, other)]
         if len(heads) != len(other_heads):
             return False  # can be removed, here for performance gain
-        if ordered:
-            return all(x1.equals(x2, ordered=True,
-                                 ignore_node=ignore_node, ignore_edge=ignore_edge)
-                       for x1, x2 in zip(heads, other_heads))
-        # I can just find the first equal head in unordered search, as
-        # Node-equality is an equivalence class (see their for details).
-        try:
-            for h1 in heads:
-                other_heads.remove(next(h2 for h2 in other_heads
-                                        if h1.equals(h2, ignore_node=ignore_node,
-                                                     ignore_edge=ignore_edge)))
-        except StopIteration:
-            return False
-        return not other_heads
+        # Node-equality is an equivalence class (see there for details),
+        # so unordered equality means the heads are equal as multisets.
+        return heads == other_heads if ordered else sorted(heads) == sorted(other_heads)
+
+    def copy(self, other_passage):
+        """Creates a copied Layer object, with its Nodes and Edges, in other_passage.
+
+        :param other_passage: the Passage to copy self to
+
+        """
+        other = Layer(ID=self.ID, root=other_passage, attrib=self.attrib.copy(), orderkey=self._orderkey)
+        other.extra = self.extra.copy()
+        self._copy_nodes(other_passage)
+
+    def _copy_nodes(self, other_passage):
+        """Copies the Nodes of the :class:`Layer` to other_passage, where an equivalent Layer was already created.
+
+        Nodes already present in other_passage (e.g., created by the Layer
+        initializer) are reused, and their attributes are updated. Every Edge
+        is copied once both of its Nodes are copied, so that Edges to Layers
+        which are copied later are copied by those Layers, and Edges to Layers
+        which are not copied at all are left out.
+        Categories are immutable, so the copied Edges share them with the
+        original ones.
+
+        :param other_passage: the Passage to copy the Nodes to
+
+        """
+        nodes = other_passage._nodes
+        with other_passage.bulk():
+            for node in self._all:
+                other_node = nodes.get(node.ID)
+                if other_node is None:
+                    other_node = type(node)(ID=node.ID, root=other_passage, tag=node.tag, attrib=node._attrib._dict,
+                                            orderkey=node._orderkey)
+                elif node._attrib:
+                    other_node.attrib.update(node._attrib.copy())
+                if node._extra:
+                    other_node.extra = node._extra.copy()
+            for node in self._all:
+                other_node = nodes[node.ID]
+                edges = [(edge, other_node, nodes.get(edge._child.ID)) for edge in node._outgoing]
+                edges += [(edge, nodes.get(edge._parent.ID), other_node) for edge in node._incoming
+                          if edge._parent._layer is not self]
+                for edge, parent, child in edges:
+                    if parent is not None and child is not None:
+                        other_edge = Edge(root=other_passage, parent=parent, child=child, attrib=edge._attrib._dict)
+                        other_edge._categories = edge.categories
+                        if edge._extra:
+                            other_edge.extra = edge._extra.copy()
+                        parent._link(other_edge)
+        other_passage._categories.update(self._root._categories)
+        other_passage._refined_categories.update(self._root._refined_categories)
 
     def _add_edge(self, edge):
         """Alters self.heads if an :class:`Edge` has been added to the subgraph.
@@ -819,11 +1468,8 @@ class Layer:
         :param edge: the Edge added to the Layer subgraph
 
         """
-        if edge.child in self._heads:
-            self._heads.remove(edge.child)
-        # Order may depend on edges, so re-order
-        self._all.sort(key=self._orderkey)
-        self._heads.sort(key=self._orderkey)
+        self._heads.discard(edge.child)
+        self._reposition(edge)
 
     def _remove_edge(self, edge):
         """Alters self.heads if an :class:`Edge` has been removed.
@@ -834,12 +1480,37 @@ class Layer:
         :param edge: the Edge removed from the Layer subgraph
 
         """
-        if edge.child.layer == self and all(p.layer != self for p in edge.child.parents):
-            self._heads.append(edge.child)
-            self._heads.sort(key=self._orderkey)
-        # Order may depend on edges, so re-order
-        self._all.sort(key=self._orderkey)
-        self._heads.sort(key=self._orderkey)
+        if edge.child in self._all and edge.child not in self._heads and \
+                all(p.layer != self for p in edge.child.parents):
+            self._heads.add(edge.child)
+        self._reposition(edge)
+
+    def _reposition(self, edge):
+        """Updates the position of the Nodes of a changed :class:`Edge`.
+
+        Order may depend on edges, but only the Nodes at the two ends of the
+        Edge may have been affected. The default ordering depends on IDs only,
+        so nothing is done in that case.
+
+        :param edge: the Edge added to or removed from the Layer subgraph
+
+        """
+        if self._orderkey is not id_orderkey:
+            for node in (edge.parent, edge.child):
+                self._all.reposition(node)
+                self._heads.reposition(node)
+
+    def _rebuild(self):
+        """Rebuilds the order and heads of the :class:`Layer` after a bulk change.
+
+        Called once when a :meth:`Passage.bulk` context exits, during which
+        the Layer is not notified of added or removed :class:`Edge` objects.
+
+        """
+        if self._orderkey is not id_orderkey:
+            self._all.resort(self._orderkey)
+        self._heads.resort(self._orderkey, [node for node in self._all
+                                            if all(e._parent._layer is not self for e in node._incoming)])
 
     def _add_node(self, node):
         """Adds a :class:`node` to the :class:`Layer`.
@@ -847,10 +1518,8 @@ class Layer:
         Assumes node has no incoming or outgoing :class:`Edge` objects.
 
         """
-        self._all.append(node)
-        self._all.sort(key=self._orderkey)
-        self._heads.append(node)
-        self._heads.sort(key=self._orderkey)
+        self._all.add(node)
+        self._heads.add(node)
 
     def _remove_node(self, node):
         """Removes a :class:`node` from the :class:`Layer`.
@@ -879,6 +1548,16 @@ class Layer:
         """
         pass  # meant to be overriden by subclasses
 
+    def _compile(self, compiled):
+        """Computes the tables of the :class:`Layer` for a :class:`CompiledPassage`, see :meth:`Passage.freeze`.
+
+        :param compiled: the CompiledPassage being computed, with its order and depths already set
+
+        :return: the tables, kept in compiled.layers
+
+        """
+        return None  # meant to be overriden by subclasses
+
 
 class Passage:
     """An annotated text with UCCA annotation graph.
@@ -893,8 +1572,10 @@ class Passage:
         attrib: attribute dictionary of the Passage
         extra: temporary storage space for undocumented attributes and data
         layers: all Layers of the Passage, no order guaranteed
-        nodes: dictionary of ID-node pairs for all the nodes in the Passage
+        nodes: read-only dictionary of ID-node pairs for all the nodes in the Passage
         frozen: indicates whether the Passage can be modified or not, boolean.
+        compiled: the :class:`CompiledPassage` of the Passage, if frozen by :meth:`freeze` with compile=True
+        journal: the :class:`Journal` recording the changes to the Passage, if started
 
     """
 
@@ -910,8 +1591,46 @@ class Passage:
         self._layers = {}
         self._nodes = {}
         self._categories = {}
-        self._refined_categories = []
-        self.frozen = False
+        self._refined_categories = {}  # used as an ordered set
+        self._frozen = False
+        self._compiled = None  # see freeze
+        self._bulk = 0  # depth of nested bulk() contexts
+        self._unsorted = {}  # id -> Node whose Edges were added in bulk and not sorted yet
+        self._epoch = 0  # incremented by changes which invalidate all cached terminal spans, see _clear_spans
+        self._version = 0  # incremented by changes to the Nodes and Edges of the graph
+        self._traversals = {}  # (id of Node, iteration parameters) -> tuple of items, see Node.iter
+        self._traversals_version = 0  # the _version in which _traversals were recorded
+        self._journal = None  # see start_journal
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_traversals"]  # keyed by object ids
+        state["_journal"] = None  # refers to removed Nodes and Edges, which should not be kept
+        state["_compiled"] = None  # keyed by object ids
+        return state
+
+    def __setstate__(self, state):
+        state.setdefault("_bulk", 0)
+        state.setdefault("_unsorted", {})
+        state.setdefault("_epoch", 0)
+        state.setdefault("_version", 0)
+        state.setdefault("_journal", None)
+        state.setdefault("_compiled", None)
+        if "frozen" in state:  # pickled by an older version
+            state["_frozen"] = state.pop("frozen")
+        state["_traversals"], state["_traversals_version"] = {}, state["_version"]
+        self.__dict__.update(state)
+        if isinstance(self._refined_categories, list):  # pickled by an older version
+            self._refined_categories = dict.fromkeys(self._refined_categories)
+        # Pickles from older versions keep Layer members in plain lists, and no other bookkeeping
+        for node in self._nodes.values():
+            if not hasattr(node, "_layer"):
+                node._layer = self._layers[node._key[0]]
+        for layer in self._layers.values():
+            if isinstance(layer._all, list):
+                layer._all = _OrderedNodes(layer._orderkey, layer._all)
+                layer._heads = _OrderedNodes(layer._orderkey)
+                layer._rebuild()
 
     @property
     def ID(self):
@@ -931,15 +1650,94 @@ class Passage:
 
     @property
     def nodes(self):
-        return self._nodes.copy()
+        return MappingProxyType(self._nodes)
 
     @property
     def categories(self):
-        return self._categories.copy()
+        return MappingProxyType(self._categories)
+
+    @property
+    def frozen(self):
+        return self._frozen
+
+    @frozen.setter
+    def frozen(self, value):
+        self._frozen = value
+        if not value:
+            self._compiled = None  # would not be updated with changes
+
+    @property
+    def compiled(self):
+        return self._compiled
+
+    def freeze(self, compile=False):
+        """Prevents any further change to the :class:`Passage`, until frozen is set to False again.
+
+        :param compile: whether to also compute a :class:`CompiledPassage`, so that read accessors are answered from
+                precomputed tables rather than computed (or validated) on access, as long as the Passage is frozen
+
+        """
+        self.frozen = True
+        if compile and self._compiled is None:
+            self._compiled = CompiledPassage(self)
+
+    @property
+    def journal(self):
+        return self._journal
+
+    def start_journal(self):
+        """Starts recording the changes made to the :class:`Passage` in a :class:`Journal`.
+
+        :return: the Journal, which is also available as the journal attribute
+                until :meth:`stop_journal` is called. If a Journal was already
+                started, it is returned.
+        """
+        if self._journal is None:
+            self._journal = Journal(self)
+        return self._journal
+
+    def stop_journal(self):
+        """Stops recording changes, discarding the :class:`Journal`."""
+        self._journal = None
 
     @property
     def refined_categories(self):
-        return self._refined_categories
+        return list(self._refined_categories)
+
+    @contextmanager
+    def bulk(self):
+        """Context manager for making many changes to the :class:`Passage` at once.
+
+        Inside the context, the Edges of each :class:`Node` are not kept sorted,
+        and the :class:`Layer` objects are not notified of Edge changes, so their
+        order, heads and any layer-specific bookkeeping (e.g. top scenes) are
+        not maintained. All of these are rebuilt once, when the outermost
+        context exits, with the same result as making the changes one by one.
+        Contexts may be nested.
+
+        Usage:
+            with passage.bulk():
+                ...  # add Nodes and Edges, without querying Layer heads etc.
+
+        """
+        self._bulk += 1
+        try:
+            yield self
+        finally:
+            self._bulk -= 1
+            if not self._bulk:
+                self._rebuild()
+
+    def _rebuild(self):
+        """Restores the order of Edges and the :class:`Layer` bookkeeping after a bulk change."""
+        for node in self._unsorted.values():
+            node._outgoing.sort(key=node._orderkey)
+            node._incoming.sort(key=node._orderkey)
+            node._edges_changed()
+        self._unsorted.clear()
+        for layer in self._layers.values():
+            layer._rebuild()
+        self._version += 1  # traversals recorded during the bulk change followed the unsorted Edges
 
     def layer(self, ID):
         """Returns the :class:`Layer` object whose ID is given.
@@ -973,11 +1771,11 @@ class Passage:
         # noinspection PyTypeChecker
         if len(self.layers) != len(other.layers):
             return False  # can be removed, here for performance gain
+        digests = _StructureDigests(ordered, ignore_node, ignore_edge)
         try:
             for lid, l1 in self._layers.items():
                 l2 = other.layer(lid)
-                if not l1.equals(l2, ordered=ordered,
-                                 ignore_node=ignore_node, ignore_edge=ignore_edge):
+                if not l1._equals(l2, digests, ordered, ignore_node):
                     return False
         except KeyError:  # no layer with same ID found
             return False
@@ -997,10 +1795,9 @@ class Passage:
                                if ignore_node is None or
                                not ignore_node(node)]
                               for passage in (self, other)]
-        return sorted([n1 for n1 in nodes
-                       if not any(n1.equals(n2, ignore_node=ignore_node,
-                                            ignore_edge=ignore_edge)
-                                  for n2 in other_nodes)],
+        digests = _StructureDigests(ignore_node=ignore_node, ignore_edge=ignore_edge)
+        other_digests = {digests.node(n2) for n2 in other_nodes}
+        return sorted([n1 for n1 in nodes if digests.node(n1) not in other_digests],
                       key=id_orderkey)
 
     def copy(self, layers=None):
@@ -1009,6 +1806,12 @@ class Passage:
         The main "building block" of copying is the Layer, so copying is
         truly copying the Passage attributes (attrib, extra, ID, frozen)
         and creating the equivalent layers (each layer for itself).
+        The Nodes and Edges are all added in a single :meth:`bulk` change,
+        and the (immutable) Categories of the Edges are shared with the copy,
+        so copying is cheaper than a full deep copy of the object graph.
+        The copy is independent of the original: changing one of them does not
+        affect the other, so it can be used as a snapshot, e.g. to modify a
+        Passage without losing the original annotation.
 
         :param layers: sequence of layer IDs to copy to the new object.
             If None, all layers will be copied.
@@ -1023,14 +1826,24 @@ class Passage:
         other.extra = self.extra.copy()
         if layers is None:
             layers = sorted(self._layers)
-        for lid in layers:
-            try:
-                self.layer(lid).copy(other)
-            except AttributeError as e:
-                raise UnimplementedMethodError() from e
+        with other.bulk():
+            for lid in layers:
+                try:
+                    copy = self.layer(lid).copy
+                except AttributeError as e:
+                    raise UnimplementedMethodError() from e
+                copy(other)
         other.frozen = self.frozen
         return other
 
+    def to_arrays(self):
+        """Exports the graph of the Passage as NumPy arrays, to be analyzed without iterating over its objects.
+
+        :return: a :class:`PassageArrays` object, which can be converted to a SciPy sparse matrix or a NetworkX graph
+
+        """
+        return PassageArrays(self)
+
     def by_id(self, ID):
         """Returns a Node whose ID is given.
 
@@ -1062,13 +1875,21 @@ class Passage:
             raise DuplicateIdError(layer.ID)
         self._layers[layer.ID] = layer
 
+    def _register_categories(self, categories):
+        """Adds any new tags and refined categories of the given categories to those of the :class:`Passage`."""
+        for c in categories:
+            if c.tag not in self._categories:
+                self._update_categories(c)
+            if c.parent and c.parent not in self._refined_categories:
+                self._update_refined_categories(c.parent)
+
     @ModifyPassage
     def _update_categories(self, category):
         self._categories[category.tag] = {"layer": category.layer, "slot": category.slot, "parent": category.parent}
 
     @ModifyPassage
     def _update_refined_categories(self, refined_category):
-        self._refined_categories.append(refined_category)
+        self._refined_categories[refined_category] = None
 
     @ModifyPassage
     def _add_node(self, node):
@@ -1085,6 +1906,9 @@ class Passage:
         if node.ID in self._nodes:
             raise DuplicateIdError(node.ID)
         self._nodes[node.ID] = node
+        self._version += 1
+        if self._journal is not None:
+            self._journal._append(Change.ADD_NODE, node)
 
     def _remove_node(self, node):
         """Removes a :class:`Node` object from the :class:`Passage`.
@@ -1096,6 +1920,9 @@ class Passage:
 
         """
         del self._nodes[node.ID]
+        self._version += 1
+        if self._journal is not None:
+            self._journal._append(Change.REMOVE_NODE, node)
 
     @ModifyPassage
     def _add_edge(self, edge):
@@ -1106,8 +1933,16 @@ class Passage:
         :param edge: the Edge object to add
 
         """
-        # Currently no work is done in the Passage level
-        edge.parent.layer._add_edge(edge)
+        self._version += 1
+        if self._journal is not None:
+            self._journal._append(Change.ADD_EDGE, edge)
+        edge.parent._edges_changed()
+        edge.child._edges_changed()
+        if self._bulk:  # Layers are rebuilt at the end of the bulk change
+            self._epoch += 1
+        else:
+            self._clear_spans(edge.parent)
+            edge.parent.layer._add_edge(edge)
 
     def _remove_edge(self, edge):
         """Removes a :class:`Edge` object from :class:`Passage`.
@@ -1117,8 +1952,16 @@ class Passage:
         :param edge: the Edge object to remove
 
         """
-        # Currently no work is done in the Passage level
-        edge.parent.layer._remove_edge(edge)
+        self._version += 1
+        if self._journal is not None:
+            self._journal._append(Change.REMOVE_EDGE, edge)
+        edge.parent._edges_changed()
+        edge.child._edges_changed()
+        if self._bulk:  # Layers are rebuilt at the end of the bulk change
+            self._epoch += 1
+        else:
+            self._clear_spans(edge.parent)
+            edge.parent.layer._remove_edge(edge)
 
     def _change_edge_tag(self, edge, old_tag):
         """Updates the :class:`Passage` and :class:`Layer` objects with the change.
@@ -1128,7 +1971,8 @@ class Passage:
 
         """
         # Currently no work is done in the Passage level
-        edge.parent.layer._change_edge_tag(edge, old_tag)
+        if not self._bulk:  # Layers are rebuilt at the end of the bulk change
+            edge.parent.layer._change_edge_tag(edge, old_tag)
 
     def _change_node_tag(self, node, old_tag):
         """Updates the :class:`Passage` and :class:`Layer` objects with the change.
@@ -1137,11 +1981,335 @@ class Passage:
             old_tag: the Node's tag before the change
 
         """
-        # Currently no work is done in the Passage level
-        node.layer._change_node_tag(node, old_tag)
+        self._epoch += 1  # Terminal tags determine whether they are punctuation
+        if self._journal is not None:
+            self._journal._append(Change.NODE_TAG, node, None, old_tag, node.tag)
+        if not self._bulk:  # Layers are rebuilt at the end of the bulk change
+            node.layer._change_node_tag(node, old_tag)
+
+    def _traversal(self, key):
+        """Returns the items of a traversal recorded by :meth:`_record_traversal`, or None if the graph changed since."""
+        if self._traversals_version != self._version:
+            self._traversals.clear()
+            self._traversals_version = self._version
+        return self._traversals.get(key)
+
+    def _record_traversal(self, key, items):
+        """Yields the items and keeps them for :meth:`_traversal`, if all were iterated and the graph did not change."""
+        version = self._version
+        recorded = []
+        for item in items:
+            recorded.append(item)
+            yield item
+        if self._version == version and self._traversals_version == version:
+            self._traversals[key] = tuple(recorded)
+
+    @staticmethod
+    def _clear_spans(node):
+        """Discards the cached terminal spans of a Node whose children changed, and of its ancestors.
+
+        Nodes which cache their span (see :class:`layer1`.FoundationalNode) have a ``_spans``
+        attribute, which is None if nothing is cached. Spans are computed from the spans of the
+        children, so the ancestors of a Node with nothing cached have nothing cached either,
+        and the propagation stops there.
+
+        :param node: the Node whose outgoing Edges changed
+
+        """
+        stack = [node]
+        visited = set()
+        while stack:
+            node = stack.pop()
+            if id(node) not in visited:
+                visited.add(id(node))
+                spans = getattr(node, "_spans", False)  # False if this kind of Node does not cache spans
+                if spans is None and len(visited) > 1:
+                    continue
+                if spans:
+                    node._spans = None
+                stack.extend(edge._parent for edge in node._incoming)
 
     def __str__(self):
         try:
             return str(self._layers[max(self._layers)].heads[0])
         except (KeyError, ValueError, IndexError):
             return super().__str__()
+
+
+class CompiledPassage:
+    """Read-only tables of a frozen :class:`Passage`, computed by :meth:`Passage.freeze` with compile=True.
+
+    Every :class:`Layer` adds its own tables by :meth:`Layer._compile`, and fills the caches of its Nodes, which
+    stay valid while the Passage is frozen. The tables are discarded when the Passage is unfrozen.
+
+    Attributes:
+        order: tuple of all Nodes in topological order: each Node comes after its parents,
+            except for Nodes in or under a cycle, which come last, in Layer order
+        depths: dictionary of Node ID -> number of Edges in the longest path from a Node with no parents
+        layers: dictionary of Layer ID -> the tables computed by the Layer, or None
+
+    """
+
+    def __init__(self, passage):
+        nodes = [node for layer in passage.layers for node in layer.all]
+        in_degree = {id(node): len(node._incoming) for node in nodes}
+        order = [node for node in nodes if not node._incoming]
+        for node in order:  # appended to while iterated, as each Node is ready once all its parents are
+            for edge in node._outgoing:
+                in_degree[id(edge._child)] -= 1
+                if not in_degree[id(edge._child)]:
+                    order.append(edge._child)
+        if len(order) < len(nodes):
+            order += [node for node in nodes if in_degree[id(node)] > 0]
+        self.order = tuple(order)
+        self.depths = depths = {}
+        for node in order:
+            depths[node.ID] = max((depths.get(edge._parent.ID, -1) + 1 for edge in node._incoming), default=0)
+        self.layers = {layer.ID: layer._compile(self) for layer in passage.layers}
+
+
+class Change:
+    """A change made to a :class:`Passage`, as recorded in a :class:`Journal`.
+
+    Attributes:
+        kind: one of the kinds below
+        target: the Node or Edge which was added, removed or changed, or the
+            attribute dictionary (the attrib of a Passage, Layer, Node or Edge)
+            in which an attribute was changed
+        key: the attribute name, for ATTRIB changes
+        old: the previous tag, categories or attribute value (or MISSING)
+        new: the new tag, categories or attribute value (or MISSING)
+
+    """
+
+    ADD_NODE = "add_node"
+    REMOVE_NODE = "remove_node"
+    ADD_EDGE = "add_edge"
+    REMOVE_EDGE = "remove_edge"
+    NODE_TAG = "node_tag"
+    EDGE_CATEGORIES = "edge_categories"
+    ATTRIB = "attrib"
+
+    MISSING = object()  # value of an attribute which is not set
+
+    __slots__ = ("kind", "target", "key", "old", "new")
+
+    def __init__(self, kind, target, key=None, old=None, new=None):
+        self.kind = kind
+        self.target = target
+        self.key = key
+        self.old = old
+        self.new = new
+
+    def __repr__(self):
+        return "%s(%s, %r)" % (Change.__name__, self.kind, self.target)
+
+
+class Journal:
+    """Record of the changes made to a :class:`Passage`, which can be undone and redone.
+
+    Started by :meth:`Passage.start_journal`. Every change to the Nodes,
+    Edges, tags, categories and attributes of the Passage is appended as
+    a :class:`Change`; changes to the extra dictionaries are not recorded.
+    A token marks a point in the history, so that the changes made since
+    can be listed or undone: for example, a tool can try modifying a
+    Passage and roll back if the result is not valid, instead of copying
+    or reading the Passage again. Undone changes can be redone, until
+    a new change is made. Layer bookkeeping is updated as for any other
+    change, so bookkeeping which depends on the order of changes (such as
+    the top linkages of layer1, which are only updated when their own
+    Nodes change) may differ from the state before the undone changes.
+
+    Attributes:
+        token: the current point in the history of the Passage
+
+    """
+
+    def __init__(self, passage):
+        self._passage = passage
+        self._changes = []
+        self._position = 0  # number of changes which are not undone
+
+    @property
+    def token(self):
+        return self._position
+
+    def __len__(self):
+        return self._position
+
+    def _append(self, kind, target, key=None, old=None, new=None):
+        if self._position < len(self._changes):  # a new change makes the undone changes impossible to redo
+            del self._changes[self._position:]
+        self._changes.append(Change(kind, target, key, old, new))
+        self._position += 1
+
+    def changes_since(self, token):
+        """Returns the changes made since the given token was taken, in order.
+
+        :param token: a previous value of the token attribute
+        :return: list of :class:`Change` objects
+        :raise ValueError: if the token is not a valid point in the history
+        """
+        self._check_token(token, 0, self._position)
+        return self._changes[token:self._position]
+
+    def undo(self, token=None):
+        """Undoes the changes made since the given token was taken, from the last one backwards.
+
+        :param token: a previous value of the token attribute, by default undoing the last change
+        :raise ValueError: if the token is not a valid point in the history
+        :raise FrozenPassageError: if the :class:`Passage` is frozen and can't be modified
+        """
+        if token is None:
+            token = self._position - 1
+        self._check_token(token, 0, self._position)
+        self._replay(reversed(self._changes[token:self._position]), undo=True)
+        self._position = token
+
+    def redo(self, token=None):
+        """Redoes the undone changes, up to the given token.
+
+        :param token: the value of the token attribute before the changes were undone,
+                by default redoing the last undone change
+        :raise ValueError: if the token is not a valid point in the history
+        :raise FrozenPassageError: if the :class:`Passage` is frozen and can't be modified
+        """
+        if token is None:
+            token = self._position + 1
+        self._check_token(token, self._position, len(self._changes))
+        self._replay(self._changes[self._position:token], undo=False)
+        self._position = token
+
+    def _check_token(self, token, low, high):
+        if not low <= token <= high:
+            raise ValueError("Invalid journal token %s, must be between %d and %d" % (token, low, high))
+
+    def _replay(self, changes, undo):
+        """Applies the changes (or their inverses, if undo) to the Passage, without recording them."""
+        passage = self._passage
+        if passage.frozen:
+            raise FrozenPassageError(passage.ID)
+        passage._journal = None
+        try:
+            for change in changes:
+                kind, target, new = change.kind, change.target, change.old if undo else change.new
+                if kind in (Change.ADD_NODE, Change.REMOVE_NODE):
+                    if (kind == Change.ADD_NODE) != undo:
+                        passage._add_node(target)
+                        target._layer._add_node(target)
+                    else:
+                        target._layer._remove_node(target)
+                        passage._remove_node(target)
+                elif kind in (Change.ADD_EDGE, Change.REMOVE_EDGE):
+                    if (kind == Change.ADD_EDGE) != undo:
+                        target._parent._link(target)
+                    else:
+                        target._parent.remove(target)
+                elif kind == Change.NODE_TAG:
+                    target.tag = new
+                elif kind == Change.EDGE_CATEGORIES:
+                    target._set_categories(new)
+                elif new is Change.MISSING:
+                    del target[change.key]
+                else:
+                    target[change.key] = new
+        finally:
+            passage._journal = self
+
+
+class PassageArrays:
+    """Snapshot of the graph of a :class:`Passage` as NumPy arrays, for vectorized analysis.
+
+    Nodes are referred to by their index: the Nodes of each Layer, in Layer order, one Layer after another.
+    Edges are referred to by their index too: the outgoing Edges of each Node, in order, one Node after another,
+    so that the Edge arrays form a compressed sparse row (CSR) parent-child adjacency matrix.
+    Tags are given as codes, indices into a vocabulary of tags, with -1 for no tag.
+    The arrays are not updated when the Passage changes.
+
+    Attributes:
+        node_ids: tuple of the ID of each Node
+        node_index: dictionary of ID-index pairs
+        layer_ids: tuple of the IDs of the Layers
+        layers: index of the Layer of each Node in layer_ids
+        node_tags: tuple of the tags of the Nodes
+        node_tag_codes: code of the tag of each Node in node_tags
+        implicit: boolean mask of the implicit Nodes
+        positions: position of each Node which has one (Terminals), -1 for other Nodes
+        terminals: indices of the Nodes with a position, by position
+        indptr: the outgoing Edges of Node i are indptr[i] to indptr[i + 1] - 1
+        parents: index of the parent Node of each Edge
+        children: index of the child Node of each Edge
+        edge_tags: tuple of the tags of the Edges
+        edge_tag_codes: code of the (first) tag of each Edge in edge_tags
+        remote: boolean mask of the remote Edges
+        incoming_indptr: the incoming Edges of Node i are incoming[incoming_indptr[i]:incoming_indptr[i + 1]]
+        incoming: indices of the Edges ordered by child, forming a CSR child-parent adjacency matrix
+
+    """
+
+    def __init__(self, passage):
+        import numpy as np
+        layers = passage.layers
+        nodes = [node for layer in layers for node in layer.all]
+        index = {node: i for i, node in enumerate(nodes)}
+        self.node_ids = tuple(node.ID for node in nodes)
+        self.node_index = dict(zip(self.node_ids, range(len(nodes))))
+        self.layer_ids = tuple(layer.ID for layer in layers)
+        self.layers = np.repeat(np.arange(len(layers), dtype=np.int32), [len(layer.all) for layer in layers])
+        self.node_tags, self.node_tag_codes = self._encode([node.tag for node in nodes])
+        self.implicit = np.array([bool(node.attrib.get("implicit")) for node in nodes], dtype=bool)
+        self.positions = np.array([getattr(node, "position", -1) for node in nodes], dtype=np.int64)
+        terminals = np.flatnonzero(self.positions >= 0)
+        self.terminals = terminals[np.argsort(self.positions[terminals], kind="stable")]
+        edges = [edge for node in nodes for edge in node._outgoing]
+        self.indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum([len(node._outgoing) for node in nodes], out=self.indptr[1:])
+        self.parents = np.repeat(np.arange(len(nodes), dtype=np.int64), np.diff(self.indptr))
+        self.children = np.array([index[edge._child] for edge in edges], dtype=np.int64)
+        self.edge_tags, self.edge_tag_codes = self._encode(
+            [edge._categories[0].tag if edge._categories else None for edge in edges])
+        self.remote = np.array([bool(edge.attrib.get("remote")) for edge in edges], dtype=bool)
+        self.incoming = np.argsort(self.children, kind="stable")
+        self.incoming_indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.children, minlength=len(nodes)), out=self.incoming_indptr[1:])
+
+    @staticmethod
+    def _encode(tags):
+        """Returns the vocabulary of the tags, in order of appearance, and the code of each tag (-1 for None)."""
+        import numpy as np
+        vocabulary = dict.fromkeys(tags)
+        vocabulary.pop(None, None)
+        codes = {tag: i for i, tag in enumerate(vocabulary)}
+        codes[None] = -1
+        return tuple(vocabulary), np.array([codes[tag] for tag in tags], dtype=np.int32)
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    def to_scipy(self, data=None):
+        """Returns the parent-child adjacency matrix as a :class:`scipy.sparse.csr_matrix`.
+
+        :param data: optional value of each Edge in the matrix (for example, edge_tag_codes + 1), defaults to ones
+        """
+        import numpy as np
+        from scipy.sparse import csr_matrix
+        if data is None:
+            data = np.ones(len(self.children), dtype=np.int8)
+        return csr_matrix((data, self.children, self.indptr), shape=(len(self), len(self)))
+
+    def to_networkx(self):
+        """Returns the graph as a :class:`networkx.DiGraph`, with Node IDs as its nodes.
+
+        Nodes have the attributes tag, implicit and position (-1 if none), and Edges have the attributes tag and
+        remote, where tag is the first tag of the Edge.
+        """
+        import networkx as nx
+        g = nx.DiGraph()
+        node_tags, edge_tags = self.node_tags + (None,), self.edge_tags + (None,)
+        g.add_nodes_from((ID, {"tag": node_tags[tag], "implicit": implicit, "position": position})
+                         for ID, tag, implicit, position in zip(self.node_ids, self.node_tag_codes.tolist(),
+                                                                self.implicit.tolist(), self.positions.tolist()))
+        g.add_edges_from((self.node_ids[parent], self.node_ids[child], {"tag": edge_tags[tag], "remote": remote})
+                         for parent, child, tag, remote in zip(self.parents.tolist(), self.children.tolist(),
+                                                               self.edge_tag_codes.tolist(), self.remote.tolist()))
+        return g
@@ -14,7 +14,7 @@ from itertools import groupby
 from operator import attrgetter
 
 from ucca import layer0, layer1, normalization
-from ucca.constructions import get_by_names, create_passage_yields, PRIMARY, DEFAULT, ALL_EDGES
+from ucca.constructions import get_by_names, create_passage_yields, terminal_positions, PRIMARY, DEFAULT, ALL_EDGES
 from ucca.layer1 import EdgeTags, NodeTags
 
 UNLABELED = "unlabeled"
@@ -32,7 +32,7 @@ EQUIV = ((EdgeTags.Process, EdgeTags.State),
 
 def get_yield(unit):
     try:
-        return frozenset(t.position for t in unit.get_terminals(punct=False))
+        return terminal_positions(unit, punct=False)
     except ValueError:
         return frozenset()
 
@@ -329,7 +329,6 @@ def evaluate(guessed, ref, converter=None, verbose=False, constructions=DEFAULT,
              units=False, fscore=True, errors=False, normalize=True, eval_type=None, ref_yield_tags=None, **kwargs):
     """
     Compare two passages and return requested diagnostics and scores, possibly printing them too.
-    NOTE: since normalize=True by default, this method is destructive: it modifies the given passages before evaluation.
     :param guessed: Passage object to evaluate
     :param ref: reference Passage object to compare to
     :param converter: optional function to apply to passages before evaluation
@@ -338,7 +337,7 @@ def evaluate(guessed, ref, converter=None, verbose=False, constructions=DEFAULT,
     :param units: whether to evaluate common units
     :param fscore: whether to compute precision, recall and f1 score
     :param errors: whether to print the mistakes
-    :param normalize: flatten centers and move common functions to root before evaluation - modifies passages
+    :param normalize: flatten centers and move common functions to root before evaluation (in copies of the passages)
     :param eval_type: specific evaluation type(s) to limit to
     :param ref_yield_tags: reference passage for fine-grained evaluation
     :return: Scores object
@@ -347,8 +346,10 @@ def evaluate(guessed, ref, converter=None, verbose=False, constructions=DEFAULT,
     if converter is not None:
         guessed = converter(guessed)
         ref = converter(ref)
-    if normalize:  # FIXME clone passages to avoid modifying the original ones
+    if normalize:  # normalize copies, to avoid modifying the original passages
+        guessed, ref = guessed.copy(), ref.copy()
         for passage in (guessed, ref):
+            passage.frozen = False  # the copies are not shared, so they are normalized even if the originals are frozen
             normalization.normalize(passage)  # flatten Cs inside Cs
         move_functions(guessed, ref)  # move common Fs to be under the root, FIXME should be before normalize
 
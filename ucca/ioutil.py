@@ -1,8 +1,11 @@
 """Input/output utility functions for UCCA scripts."""
+import mmap
 import os
+import struct
 import sys
 import time
-from collections import defaultdict
+from array import array
+from collections import defaultdict, namedtuple
 from contextlib import contextmanager
 from glob import glob
 from itertools import filterfalse, chain
@@ -10,7 +13,8 @@ from xml.etree.ElementTree import ParseError
 
 from tqdm import tqdm
 
-from ucca.convert import file2passage, passage2file, from_text, to_text, split2segments
+from ucca.convert import file2passage, passage2file, from_text, to_text, split2segments, to_binary, from_binary, \
+    PassageHandle, LoadedPassageHandle
 from ucca.core import Passage
 
 DEFAULT_LANG = "en"
@@ -20,10 +24,11 @@ DEFAULT_DELAY = 5
 
 class LazyLoadedPassages:
     """
-    Iterable interface to Passage objects that loads files on-the-go and can be iterated more than once
+    Iterable interface to Passage objects that loads files on-the-go and can be iterated more than once.
+    Corpus files (see CorpusFile) are kept open from their first passage until the iteration ends or close() is called
     """
     def __init__(self, files, sentences=False, paragraphs=False, converters=None, lang=DEFAULT_LANG,
-                 attempts=DEFAULT_ATTEMPTS, delay=DEFAULT_DELAY):
+                 attempts=DEFAULT_ATTEMPTS, delay=DEFAULT_DELAY, layers=None, lazy_extra=False):
         self.files = files
         self.sentences = sentences
         self.paragraphs = paragraphs
@@ -32,9 +37,12 @@ class LazyLoadedPassages:
         self.lang = lang
         self.attempts = attempts
         self.delay = delay
+        self.layers = layers
+        self.lazy_extra = lazy_extra
         self._files_iter = None
         self._split_iter = None
         self._file_handle = None
+        self._corpora = {}  # corpus file name -> CorpusFile opened to read passages from it
 
     def __iter__(self):
         self._files_iter = iter(self.files)
@@ -54,9 +62,17 @@ class LazyLoadedPassages:
             try:
                 file = next(self._files_iter)
             except StopIteration:  # Finished iteration
+                self.close()
                 raise
             if isinstance(file, Passage):  # Not really a file, but a Passage
                 passage = file
+            elif isinstance(file, CorpusEntry):  # A passage in a corpus file
+                corpus = file.corpus
+                if not isinstance(corpus, CorpusFile):
+                    corpus = self._corpora.get(file.corpus)
+                    if corpus is None:
+                        corpus = self._corpora[file.corpus] = CorpusFile(file.corpus)
+                passage = corpus.get(file.passage_id, layers=self.layers, lazy_extra=self.lazy_extra)
             else:  # A file
                 attempts = self.attempts
                 while not os.path.exists(file):
@@ -68,7 +84,7 @@ class LazyLoadedPassages:
                     time.sleep(self.delay)
                     attempts -= 1
                 try:
-                    passage = file2passage(file)  # XML or binary format
+                    passage = file2passage(file, layers=self.layers, lazy_extra=self.lazy_extra)  # XML or binary format
                 except (IOError, ParseError) as e:  # Failed to read as passage file
                     base, ext = os.path.splitext(os.path.basename(file))
                     converter = self.converters.get(ext.lstrip("."))
@@ -109,6 +125,12 @@ class LazyLoadedPassages:
     def __bool__(self):
         return bool(self.files)
 
+    def close(self):
+        """Closes the corpus files opened to read passages from."""
+        for corpus in self._corpora.values():
+            corpus.close()
+        self._corpora.clear()
+
 
 def resolve_patterns(filename_patterns):
     for pattern in [filename_patterns] if isinstance(filename_patterns, str) else filename_patterns:
@@ -142,7 +164,7 @@ def gen_files(files_and_dirs):
 
 
 def read_files_and_dirs(files_and_dirs, sentences=False, paragraphs=False, converters=None, lang=DEFAULT_LANG,
-                        attempts=DEFAULT_ATTEMPTS, delay=DEFAULT_DELAY):
+                        attempts=DEFAULT_ATTEMPTS, delay=DEFAULT_DELAY, layers=None, lazy_extra=False):
     """
     :param files_and_dirs: iterable of files and/or directories to look in
     :param sentences: whether to split to sentences
@@ -151,10 +173,35 @@ def read_files_and_dirs(files_and_dirs, sentences=False, paragraphs=False, conve
     :param lang: language to use for tokenization model
     :param attempts: number of times to try reading a file before giving up
     :param delay: number of seconds to wait before subsequent attempts to read a file
-    :return: lazy-loaded passages from all files given, plus any files directly under any directory given
+    :param layers: IDs of the layers to create, or None for all layers, e.g. ("0",) to read just the text
+    :param lazy_extra: whether to decode extra values only when first accessed
+    :return: lazy-loaded passages from all files given, plus any files directly under any directory given,
+             where corpus files (see CorpusFile), recognized by CORPUS_SUFFIX, are replaced by all passages they contain
     """
-    return LazyLoadedPassages(list(gen_files(files_and_dirs)), sentences=sentences, paragraphs=paragraphs,
-                              converters=converters, lang=lang, attempts=attempts, delay=delay)
+    return LazyLoadedPassages(list(gen_corpus_entries(gen_files(files_and_dirs))), sentences=sentences,
+                              paragraphs=paragraphs, converters=converters, lang=lang, attempts=attempts, delay=delay,
+                              layers=layers, lazy_extra=lazy_extra)
+
+
+class CorpusEntry(namedtuple("CorpusEntry", ("corpus", "passage_id"))):
+    """Reference to a passage in a corpus file, given by its name or as an open CorpusFile, loaded only when needed"""
+
+
+def gen_corpus_entries(files):
+    """
+    :param files: iterable of files, possibly including corpus files or CorpusFile objects
+    :return: the same files, but with an entry for every passage instead of each corpus file.
+             Corpus files are recognized by CORPUS_SUFFIX, so that no other file is opened to check it
+    """
+    for file in files:
+        if isinstance(file, str) and file.endswith(CORPUS_SUFFIX):
+            with CorpusFile(file) as corpus:
+                passage_ids = corpus.ids
+            yield from (CorpusEntry(file, passage_id) for passage_id in passage_ids)
+        elif isinstance(file, CorpusFile):
+            yield from (CorpusEntry(file, passage_id) for passage_id in file.ids)
+        else:
+            yield file
 
 
 def write_passage(passage, output_format=None, binary=False, outdir=".", prefix="", converter=None, verbose=True,
@@ -162,9 +209,14 @@ def write_passage(passage, output_format=None, binary=False, outdir=".", prefix=
     """
     Write a given UCCA passage in any format.
     :param passage: Passage object to write
-    :param output_format: filename suffix (if given "ucca", suffix will be ".pickle" or ".xml" depending on `binary')
-    :param binary: save in pickle format with ".pickle" suffix
-    :param outdir: output directory, should exist already
+    :param output_format: filename suffix (if given "ucca", suffix will be ".pickle", ".bin" or ".xml" depending on
+                          `binary')
+    :param binary: save in pickle format with ".pickle" suffix, or if "compact", in the compact binary format (see
+                   convert.to_binary) with ".bin" suffix
+    :param outdir: output directory, created if it does not exist, or a corpus file (see CorpusFile) to append the
+                   passage to: either a CorpusFile object or the name of a file with CORPUS_SUFFIX. Passages are stored
+                   in it by their ID, so prefix and basename are ignored. Given a name, the file is opened and its
+                   index rewritten for every passage, so to write many passages, open it once with open_outdir
     :param prefix: string to prepend to output filename
     :param converter: function to apply to passage before saving (if output_format is not "ucca"/"pickle"/"xml"),
                       returning iterable of strings, each corresponding to an output line
@@ -173,13 +225,26 @@ def write_passage(passage, output_format=None, binary=False, outdir=".", prefix=
     :param basename: use this instead of `passage.ID' for the output filename
     :return: path of created output file
     """
+    if isinstance(outdir, CorpusFile) or outdir.endswith(CORPUS_SUFFIX):
+        if output_format not in (None, "ucca", "pickle", "bin", "xml"):
+            raise ValueError("Cannot write %s format to a corpus file" % output_format)
+        if verbose:
+            with external_write_mode():
+                print("Writing passage '%s' to '%s'..." % (passage.ID, getattr(outdir, "filename", outdir)))
+        if isinstance(outdir, CorpusFile):
+            outdir.append(passage)
+            return outdir.filename
+        with CorpusFile(outdir, "a") as corpus:
+            corpus.append(passage)
+        return outdir
     os.makedirs(outdir, exist_ok=True)
-    suffix = output_format if output_format and output_format != "ucca" else ("pickle" if binary else "xml")
+    suffix = output_format if output_format and output_format != "ucca" else \
+        ("bin" if binary == "compact" else "pickle" if binary else "xml")
     outfile = os.path.join(outdir, prefix + (basename or passage.ID) + "." + suffix)
     if verbose:
         with external_write_mode():
             print("%s '%s'..." % ("Appending to" if append else "Writing passage", outfile))
-    if output_format is None or output_format in ("ucca", "pickle", "xml"):
+    if output_format is None or output_format in ("ucca", "pickle", "bin", "xml"):
         passage2file(passage, outfile, binary=binary)
     else:
         with open(outfile, "a" if append else "w", encoding="utf-8") as f:
@@ -187,6 +252,22 @@ def write_passage(passage, output_format=None, binary=False, outdir=".", prefix=
     return outfile
 
 
+@contextmanager
+def open_outdir(outdir):
+    """
+    Context manager for the `outdir' of write_passage when writing many passages.
+    A corpus file (see CorpusFile) is opened once for appending, so that its index is written only on exit.
+    :param outdir: output directory, created if it does not exist, or name of a corpus file with CORPUS_SUFFIX
+    :return: CorpusFile object if outdir is a corpus file, and otherwise outdir itself
+    """
+    if outdir.endswith(CORPUS_SUFFIX):
+        with CorpusFile(outdir, "a") as corpus:
+            yield corpus
+    else:
+        os.makedirs(outdir, exist_ok=True)
+        yield outdir
+
+
 @contextmanager
 def external_write_mode(*args, **kwargs):
     try:
@@ -194,3 +275,279 @@ def external_write_mode(*args, **kwargs):
             yield
     except AttributeError:
         yield
+
+
+CORPUS_MAGIC = b"\x89UCCA\r\n\x1c"  # the first and last bytes of a corpus file
+CORPUS_VERSION = 1
+CORPUS_SUFFIX = ".corpus"
+
+_CORPUS_HEADER = struct.Struct("<8sI4x")  # magic, version
+_CORPUS_RECORD = struct.Struct("<4sIQ")  # record tag, length of the passage ID, length of the passage data
+_CORPUS_RECORD_TAG = b"UPSG"
+_CORPUS_TRAILER = struct.Struct("<QQ8s")  # offset of the index, number of passages, magic
+
+
+class CorpusFile:
+    """Single file holding many passages, with random access by passage ID.
+
+    The file consists of a header, an append-only data region of records, each holding the ID of a passage and
+    the passage in the compact binary format (see convert.to_binary), and an index at the end: the ID, offset and
+    length of the data of every passage, in the order they were appended, followed by a trailer pointing to it.
+    Appending overwrites the index and writes it again when the file is flushed or closed. If it is missing,
+    e.g. when writing was interrupted, it is rebuilt by scanning the records.
+    The ID of each record is padded with null characters so that the passage data is aligned to 8 bytes.
+    In mode "r", the file is memory-mapped, so that passage data is read by the operating system only when used.
+
+    Usage:
+        with CorpusFile("passages.corpus", "w") as corpus:
+            corpus.extend(passages)
+        with CorpusFile("passages.corpus") as corpus:
+            passage = corpus.get("120")
+
+    Attributes:
+        filename: the name of the file
+        mode: "r" to read an existing file, "a" to read and append to a file, creating it if it does not exist,
+              or "w" to create a new file, replacing any existing one
+    """
+
+    def __init__(self, filename, mode="r"):
+        if mode not in ("r", "a", "w"):
+            raise ValueError("Invalid corpus file mode: '%s'" % mode)
+        self.filename = filename
+        self.mode = mode
+        self._index = {}  # passage ID -> (offset, length) of its data, in the order of the records
+        self._map = None
+        if mode == "w" or mode == "a" and not os.path.exists(filename):
+            self._file = open(filename, "w+b")
+            self._file.write(_CORPUS_HEADER.pack(CORPUS_MAGIC, CORPUS_VERSION))
+            self._end = _CORPUS_HEADER.size  # the end of the data region
+            self._dirty = True
+        else:
+            self._file = open(filename, "rb" if mode == "r" else "r+b")
+            try:
+                self._read_index()
+            except BaseException:
+                self._file.close()
+                raise
+            self._dirty = False
+        self._truncated = self._dirty  # whether the index was removed from the file, to be written again
+
+    def _read_index(self):
+        f = self._file
+        magic, version = _CORPUS_HEADER.unpack(f.read(_CORPUS_HEADER.size).ljust(_CORPUS_HEADER.size, b"\0"))
+        if magic != CORPUS_MAGIC:
+            raise IOError("Not a corpus file: '%s'" % self.filename)
+        if version > CORPUS_VERSION:
+            raise IOError("Unsupported corpus file version in '%s': %d (newest supported is %d)" %
+                          (self.filename, version, CORPUS_VERSION))
+        size = f.seek(0, os.SEEK_END)
+        if size >= _CORPUS_HEADER.size + _CORPUS_TRAILER.size:
+            f.seek(size - _CORPUS_TRAILER.size)
+            index_offset, num_passages, magic = _CORPUS_TRAILER.unpack(f.read(_CORPUS_TRAILER.size))
+            if magic == CORPUS_MAGIC and _CORPUS_HEADER.size <= index_offset <= size - _CORPUS_TRAILER.size:
+                f.seek(index_offset)
+                index = f.read(size - _CORPUS_TRAILER.size - index_offset)
+                offsets = array("Q", index[:8 * num_passages])
+                lengths = array("Q", index[8 * num_passages:16 * num_passages])
+                id_lengths = array("I", index[16 * num_passages:20 * num_passages])
+                if sys.byteorder == "big":
+                    for values in offsets, lengths, id_lengths:
+                        values.byteswap()
+                ids = index[20 * num_passages:]
+                start = 0
+                for offset, length, id_length in zip(offsets, lengths, id_lengths):
+                    self._index[ids[start:start + id_length].rstrip(b"\0").decode("utf-8")] = (offset, length)
+                    start += id_length
+                self._end = index_offset
+                return
+        self._scan(size)
+
+    def _scan(self, size):
+        """Rebuilds the index by reading the records one by one, up to the first incomplete one."""
+        f = self._file
+        self._end = offset = _CORPUS_HEADER.size
+        f.seek(offset)
+        while offset + _CORPUS_RECORD.size <= size:
+            tag, id_length, length = _CORPUS_RECORD.unpack(f.read(_CORPUS_RECORD.size))
+            end = offset + _CORPUS_RECORD.size + id_length + length
+            if tag != _CORPUS_RECORD_TAG or end > size:
+                break
+            try:
+                passage_id = f.read(id_length).rstrip(b"\0").decode("utf-8")
+            except UnicodeDecodeError:
+                break
+            self._index[passage_id] = (end - length, length)
+            self._end = offset = f.seek(end)
+        self._dirty = True  # write the rebuilt index when appending
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, passage_id):
+        return passage_id in self._index
+
+    def __iter__(self):
+        """Iterates over the passages, in the order they were appended."""
+        for passage_id in list(self._index):
+            yield self.get(passage_id)
+
+    @property
+    def ids(self):
+        """List of the IDs of all passages, in the order they were appended."""
+        return list(self._index)
+
+    def read(self, passage_id):
+        """Returns the data of a passage, in the compact binary format.
+
+        :return: bytes-like object, which is a view of the memory-mapped file in mode "r"
+        :raise KeyError: if there is no passage with this ID in the corpus
+        """
+        offset, length = self._index[passage_id]
+        if self.mode == "r":
+            if self._map is None:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            return memoryview(self._map)[offset:offset + length]
+        self._file.seek(offset)
+        return self._file.read(length)
+
+    def get(self, passage_id, layers=None, lazy_extra=False):
+        """Returns the passage with the given ID.
+
+        :param passage_id: ID of the passage
+        :param layers: IDs of the layers to create, or None for all layers, see convert.from_binary
+        :param lazy_extra: whether to decode extra values only when first accessed, see convert.from_binary
+        :raise KeyError: if there is no passage with this ID in the corpus
+        """
+        return from_binary(self.read(passage_id), layers=layers, lazy_extra=lazy_extra)
+
+    def handle(self, passage_id):
+        """Returns a lightweight handle of the passage with the given ID, see convert.PassageHandle.
+
+        :raise KeyError: if there is no passage with this ID in the corpus
+        """
+        return PassageHandle(self.read(passage_id))
+
+    def handles(self):
+        """Iterates over handles of the passages, in the order they were appended."""
+        for passage_id in list(self._index):
+            yield self.handle(passage_id)
+
+    def append(self, passage):
+        """Adds a passage to the end of the corpus.
+
+        :raise ValueError: if there is already a passage with the same ID in the corpus, or if the mode is "r"
+        """
+        if self.mode == "r":
+            raise ValueError("Corpus file is open for reading only: '%s'" % self.filename)
+        if passage.ID in self._index:
+            raise ValueError("Passage '%s' is already in '%s'" % (passage.ID, self.filename))
+        f = self._file
+        if not self._truncated:  # so that an interrupted append leaves no index pointing to overwritten data
+            f.truncate(self._end)
+            self._truncated = True
+        passage_id = passage.ID.encode("utf-8")
+        passage_id += bytes(-(self._end + _CORPUS_RECORD.size + len(passage_id)) % 8)  # align the data
+        data = to_binary(passage)
+        f.seek(self._end)
+        f.write(_CORPUS_RECORD.pack(_CORPUS_RECORD_TAG, len(passage_id), len(data)))
+        f.write(passage_id)
+        f.write(data)
+        self._index[passage.ID] = (self._end + _CORPUS_RECORD.size + len(passage_id), len(data))
+        self._end = f.tell()
+        self._dirty = True
+
+    def extend(self, passages):
+        """Adds passages to the end of the corpus, see append."""
+        for passage in passages:
+            self.append(passage)
+
+    def flush(self):
+        """Writes the index, if passages were appended since it was last written."""
+        if not self._dirty or self.mode == "r":
+            return
+        ids = [passage_id.encode("utf-8") for passage_id in self._index]
+        offsets, lengths = zip(*self._index.values()) if self._index else ((), ())
+        arrays = [array("Q", offsets), array("Q", lengths), array("I", map(len, ids))]
+        if sys.byteorder == "big":
+            for values in arrays:
+                values.byteswap()
+        f = self._file
+        f.seek(self._end)
+        f.write(b"".join([values.tobytes() for values in arrays] + ids))
+        f.write(_CORPUS_TRAILER.pack(self._end, len(ids), CORPUS_MAGIC))
+        f.truncate()
+        f.flush()
+        self._dirty = self._truncated = False
+
+    def close(self):
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:  # there are still handles referring to it, so it is closed when they are released
+                pass
+            self._map = None
+        if not self._file.closed:
+            try:
+                self.flush()
+            finally:
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __del__(self):
+        if getattr(self, "_file", None) is not None:
+            self.close()
+
+
+def get_passage_handles(filename_patterns, desc=None):
+    """Iterates over lightweight handles of passages (see convert.PassageHandle) in the given files, for scanning
+    large corpora: handles of passages in corpus files are views of the memory-mapped files, and passages in any
+    other files are loaded and wrapped as they are (see convert.LoadedPassageHandle), without the arrays.
+
+    :param filename_patterns: file and/or directory names or glob patterns, as in get_passages
+    :param desc: description for a progress bar, or None to show no progress bar
+    """
+    def _handles():
+        for filenames in resolve_patterns(filename_patterns):
+            for file in gen_files(filenames):
+                if file.endswith(CORPUS_SUFFIX):
+                    with CorpusFile(file) as corpus:  # the handles keep the memory map until they are released
+                        yield from corpus.handles()
+                else:
+                    yield from map(LoadedPassageHandle, read_files_and_dirs((file,)))
+    if desc is None:
+        yield from _handles()
+    else:
+        yield from tqdm(_handles(), desc=desc, unit=" passages")
+
+
+def pack_corpus(files_and_dirs, filename, append=False, **kwargs):
+    """Writes all passages from the given files and/or directories to a corpus file.
+
+    :param files_and_dirs: iterable of files and/or directories to read, as in read_files_and_dirs
+    :param filename: the corpus file to write
+    :param append: whether to append to the corpus file if it exists, rather than replace it
+    :param kwargs: passed to read_files_and_dirs
+    :return: number of passages written
+    """
+    with CorpusFile(filename, "a" if append else "w") as corpus:
+        num_passages = len(corpus)
+        corpus.extend(read_files_and_dirs(files_and_dirs, **kwargs))
+        return len(corpus) - num_passages
+
+
+def unpack_corpus(filename, outdir=".", binary=False, verbose=False):
+    """Writes every passage in a corpus file to its own file.
+
+    :param filename: the corpus file to read
+    :param outdir: output directory, created if it does not exist
+    :param binary: passed to write_passage
+    :param verbose: passed to write_passage
+    :return: list of the paths of created output files
+    """
+    with CorpusFile(filename) as corpus:
+        return [write_passage(passage, binary=binary, outdir=outdir, verbose=verbose) for passage in corpus]
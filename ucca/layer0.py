@@ -44,24 +44,34 @@ class Terminal(core.Node):
             starting at 1 (per paragraph).
         punct: whether the Terminal is a punctuation mark (boolean)
 
+    The text, paragraph and paragraph position are stored in columns of the
+    :class:`Layer0`, where the Terminal keeps its index.
+
     """
 
+    __slots__ = ("_index",)
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        if not hasattr(self, "_index"):  # pickled by an older version, set by Layer0._rebuild
+            self._index = None
+
     @property
     def text(self):
-        return self.attrib['text']
+        return self._layer._texts[self._index]
 
     @property
     def position(self):
-        # the format of ID is LAYER_ID + ID separator + position
-        return int(self.ID[len(LAYER_ID) + len(core.Node.ID_SEPARATOR):])
+        # the format of ID is LAYER_ID + ID separator + position, parsed once for the sort key
+        return self._key[1]
 
     @property
     def para_pos(self):
-        return self.attrib['paragraph_position']
+        return self._layer._para_positions[self._index]
 
     @property
     def paragraph(self):
-        return self.attrib['paragraph']
+        return self._layer._paragraphs[self._index]
 
     @property
     def tok(self):
@@ -104,6 +114,11 @@ class Terminal(core.Node):
                 and self.paragraph == other.paragraph
                 and self.para_pos == other.para_pos)
 
+    def _structure(self, digests):
+        """Returns the canonical form of this Terminal for comparison with others, as in equals()."""
+        del digests
+        return "terminal", self.layer.ID, self.text, self.position, self.tag, self.paragraph, self.para_pos
+
     def __eq__(self, other):
         """Equals if both of the same Passage, Layer, position, tag & text."""
         return (isinstance(other, Terminal) and other.layer.ID == LAYER_ID
@@ -114,8 +129,8 @@ class Terminal(core.Node):
                 and self.para_pos == other.para_pos)
 
     def __hash__(self):
-        """Hashes the Terminals according to its ID and text."""
-        return hash(self.ID + str(self.text))
+        """Hashes the Terminals according to their position."""
+        return hash(self.position)
 
     def __str__(self):
         return self.text
@@ -136,11 +151,40 @@ class Layer0(core.Layer):
         words: a tuple of only the words (not punctuation) Terminals, ordered
         pairs: a tuple of (position, terminal) tuples of all Terminals, ordered
 
+    The attributes of the Terminals are stored in parallel lists, in the order
+    in which the Terminals were added.
+
     """
 
     def __init__(self, root, attrib=None):
+        self._texts = []
+        self._paragraphs = []
+        self._para_positions = []
         super().__init__(ID=LAYER_ID, root=root, attrib=attrib)
 
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if "_texts" not in state:  # pickled by an older version, filled by _rebuild
+            self._texts = None
+
+    def _add_node(self, node):
+        super()._add_node(node)
+        self._add_columns(node)
+
+    def _add_columns(self, node):
+        node._index = len(self._texts)
+        attrib = node._attrib
+        self._texts.append(attrib.get('text'))
+        self._paragraphs.append(attrib.get('paragraph'))
+        self._para_positions.append(attrib.get('paragraph_position'))
+
+    def _rebuild(self):
+        super()._rebuild()
+        if self._texts is None:
+            self._texts, self._paragraphs, self._para_positions = [], [], []
+            for node in self._all:
+                self._add_columns(node)
+
     @property
     def words(self):
         return tuple(x for x in self._all if not x.punct)
@@ -190,9 +234,7 @@ class Layer0(core.Layer):
         """
         other = Layer0(root=other_passage, attrib=self.attrib.copy())
         other.extra = self.extra.copy()
-        for t in self._all:
-            copied = other.add_terminal(t.text, t.punct, t.paragraph)
-            copied.extra = t.extra.copy()
+        self._copy_nodes(other_passage)
 
     def docs(self, num_paragraphs=1):
         docs = self.extra.setdefault("doc", [[]])
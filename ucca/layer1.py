@@ -58,6 +58,11 @@ class MissingRelationError(core.UCCAError):
     pass
 
 
+class _CycleError(Exception):
+    """Raised when computing the span of a FoundationalNode that is its own descendant."""
+    pass
+
+
 def _single_child_by_tag(node, tag, must=True):
     """Returns the Node which is connected with an Edge with the given tag.
 
@@ -76,9 +81,14 @@ def _single_child_by_tag(node, tag, must=True):
         MissingRelationError if Node not found and must is set to True
 
     """
-    for edge in node:
-        if tag in edge.tags:
-            return edge.child
+    if isinstance(node, FoundationalNode):
+        children = node._children_by_tag().get(tag)
+        if children:
+            return children[0]
+    else:
+        for edge in node:
+            if tag in edge.tags:
+                return edge.child
     if must:
         raise MissingRelationError(node.ID, tag)
     return None
@@ -95,6 +105,8 @@ def _multiple_children_by_tag(node, tag):
         A list of connected Nodes, can be empty
 
     """
+    if isinstance(node, FoundationalNode):
+        return list(node._children_by_tag().get(tag, ()))
     return [edge.child for edge in node if tag in edge.tags]
 
 
@@ -115,6 +127,8 @@ class Linkage(core.Node):
 
     """
 
+    __slots__ = ()
+
     @property
     def relation(self):
         return _single_child_by_tag(self, EdgeTags.LinkRelation)
@@ -180,8 +194,50 @@ class FoundationalNode(core.Node):
             with this FNode
         discontiguous: whether this FNode has continuous Terminals or not
 
+    The Terminals in the span of each FNode are cached, and discarded by the
+    :class:`core`.Passage when an Edge under the FNode is added or removed.
+    So are the children of each FNode by Edge tag, and the Edge from its fparent.
+    When the Passage is frozen with compile=True, they are all computed in
+    advance, together with the top scene of each FNode (see Layer1._compile).
+
     """
 
+    __slots__ = ("_spans",  # (Passage epoch, dict of (punct, remotes) -> tuple of Terminals)
+                 "_child_index",  # dict of Edge tag -> list of children, in order
+                 "_fparent_edge")  # (Passage epoch, Edge from the fparent or None)
+
+    _CACHE_SLOTS = ("_spans", "_child_index", "_fparent_edge")
+
+    def __init__(self, *args, **kwargs):
+        for name in self._CACHE_SLOTS:
+            setattr(self, name, None)
+        super().__init__(*args, **kwargs)
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        for name in self._CACHE_SLOTS:
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        for name in self._CACHE_SLOTS:
+            setattr(self, name, None)
+
+    def _edges_changed(self):
+        self._child_index = self._fparent_edge = None
+
+    def _children_by_tag(self):
+        """Returns a dictionary of Edge tag -> list of the children connected with an Edge with this tag."""
+        if self._child_index is None:
+            self._child_index = {}
+            for edge in self._outgoing:
+                categories = edge.categories
+                for tag in (categories[0].tag,) if len(categories) == 1 else \
+                        dict.fromkeys(category.tag for category in categories):
+                    self._child_index.setdefault(tag, []).append(edge._child)
+        return self._child_index
+
     @property
     def participants(self):
         return _multiple_children_by_tag(self, EdgeTags.Participant)
@@ -248,12 +304,13 @@ class FoundationalNode(core.Node):
 
     def _fedge(self):
         """Returns the Edge of the fparent, or None."""
-        for edge in self.incoming:
-            if (edge.parent.layer.ID == LAYER_ID and
-                edge.parent.tag == NodeTags.Foundational and
-                    not edge.attrib.get('remote')):
-                return edge
-        return None
+        epoch = self._root._epoch  # attributes and Node tags are not tracked per Node
+        if self._fparent_edge is None or self._fparent_edge[0] != epoch:
+            self._fparent_edge = (epoch, next((edge for edge in self._incoming
+                                               if edge.parent.layer.ID == LAYER_ID and
+                                               edge.parent.tag == NodeTags.Foundational and
+                                               not edge.attrib.get('remote')), None))
+        return self._fparent_edge[1]
 
     @property
     def fparent(self):
@@ -278,36 +335,65 @@ class FoundationalNode(core.Node):
         :return: a list of :class:`layer0`.Terminal objects
         """
         if visited is None:
-            return sorted(self.get_terminals(punct=punct, remotes=remotes, visited=set()),
-                          key=operator.attrgetter("position"))
+            return list(self._span(punct, remotes))
         outgoing = {e for e in set(self) - visited if remotes or not e.attrib.get("remote")}
         return [t for e in outgoing for t in e.child.get_terminals(
             punct=punct, remotes=remotes, visited=visited | outgoing)]
 
+    def _span(self, punct=True, remotes=False):
+        """Returns a tuple of the Terminals under this FNode sorted by position, as in get_terminals."""
+        if self._root._compiled is not None:  # all spans are cached
+            return self._spans[1][punct, remotes]
+        try:
+            return self._cached_span(punct, remotes, set())
+        except _CycleError:  # not cached, the result depends on where the cycle is entered
+            return tuple(sorted(self.get_terminals(punct=punct, remotes=remotes, visited=set()),
+                                key=operator.attrgetter("position")))
+
+    def _cached_span(self, punct, remotes, path):
+        spans = self._spans
+        epoch = self._root._epoch
+        if spans is None or spans[0] != epoch:
+            spans = self._spans = (epoch, {})
+        span = spans[1].get((punct, remotes))
+        if span is None:
+            if id(self) in path:
+                raise _CycleError(self.ID)
+            path.add(id(self))
+            terminals = []
+            for edge in self._outgoing:
+                if remotes or not edge.attrib.get("remote"):
+                    child = edge.child
+                    terminals += child._cached_span(punct, remotes, path) \
+                        if isinstance(child, FoundationalNode) else child.get_terminals(punct=punct, remotes=remotes)
+            path.remove(id(self))
+            span = spans[1][punct, remotes] = tuple(sorted(terminals, key=operator.attrgetter("position")))
+        return span
+
     @property
     def start_position(self):
         try:
-            return self.get_terminals()[0].position
+            return self._span()[0].position
         except IndexError:  # implicit unit or having no Terminals
             return -1
 
     @property
     def end_position(self):
         try:
-            return self.get_terminals()[-1].position
+            return self._span()[-1].position
         except IndexError:  # implicit unit or having no Terminals
             return -1
 
     @property
     def discontiguous(self):
-        terms = self.get_terminals()
+        terms = self._span()
         return any(terms[i].position + 1 != terms[i + 1].position
                    for i in range(len(terms) - 1))
 
     def get_sequences(self):
         if self.attrib.get('implicit'):
             return []
-        pos = sorted([x.position for x in self.get_terminals()])
+        pos = [x.position for x in self._span()]
 
         # all terminals which end a sequence, including the last one
         seq_closers = [pos[i] for i in range(len(pos) - 1)
@@ -320,7 +406,7 @@ class FoundationalNode(core.Node):
 
     def to_text(self):
         """Returns the text in the span of self, separated by spaces."""
-        return ' '.join(t.text for t in self.get_terminals())
+        return ' '.join(t.text for t in self._span())
 
     def is_scene(self):
         return self.state is not None or self.process is not None
@@ -355,6 +441,9 @@ class FoundationalNode(core.Node):
 
     def get_top_scene(self):
         """Returns the top-level scene this FNode is within, or None"""
+        compiled = self._root._compiled
+        if compiled is not None:
+            return compiled.layers[LAYER_ID]["top_scene"][id(self)]
         if self in self.layer.top_scenes:
             return self
         elif self.fparent is None:
@@ -376,6 +465,8 @@ class PunctNode(FoundationalNode):
 
     """
 
+    __slots__ = ()
+
     def add(self, edge_tag, node, *, edge_attrib=None):
         if node.layer.ID != layer0.LAYER_ID:
             raise ValueError("Non-terminal child (%s) for %s node (%s)" % (node.ID, NodeTags.Punctuation, self.ID))
@@ -398,6 +489,9 @@ class PunctNode(FoundationalNode):
         """
         return self.children if punct else ()
 
+    def _cached_span(self, punct, remotes, path):
+        return tuple(self.get_terminals(punct))
+
     def __str__(self):
         return self.to_text()
 
@@ -410,29 +504,49 @@ class Layer1(core.Layer):
     def __init__(self, root, attrib=None, *, orderkey=core.id_orderkey):
         super().__init__(ID=LAYER_ID, root=root, attrib=attrib,
                          orderkey=orderkey)
-        self._scenes = []
-        self._linkages = []
+        self._scenes = core._OrderedNodes(orderkey)
+        self._linkages = core._OrderedNodes(orderkey)
+        self._covered = set()  # FNodes which are scenes or embedded in scenes, see _update_top_scenes
         self._head_fnode = FoundationalNode(root=root,
                                             tag=NodeTags.Foundational,
                                             ID=self.next_id())
-        self._all = [self._head_fnode]
-        self._heads = [self._head_fnode]
+
+    def copy(self, other_passage):
+        """Creates a copied Layer1 object, with its Nodes and Edges, in other_passage.
+
+        :param other_passage: the Passage to copy self to
+
+        """
+        other = Layer1(root=other_passage, attrib=self.attrib.copy(), orderkey=self._orderkey)
+        other.extra = self.extra.copy()
+        self._copy_nodes(other_passage)  # the head FNode is created by the initializer
 
     @property
     def top_scenes(self):
-        return self._scenes[:]
+        return core.SequenceView(self._scenes)
 
     @property
     def top_linkages(self):
-        return self._linkages[:]
+        return core.SequenceView(self._linkages)
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if "_covered" not in state:  # pickled by an older version, rebuilt by Passage.__setstate__
+            self._scenes = core._OrderedNodes(self._orderkey)
+            self._linkages = core._OrderedNodes(self._orderkey)
+            self._covered = set()
 
     def next_id(self):
-        """Returns the next available ID string for this layer."""
+        """Returns the next available ID string for this layer.
+
+        This is the first unused ID from the number of Nodes in the layer onwards, so IDs of removed Nodes
+        are reused. Only IDs above the number of Nodes are checked, and they are checked by dictionary lookups
+        rather than by Passage.by_id, whose error message lists all IDs in the layer.
+        """
+        nodes = self._root._nodes
         for n in itertools.count(start=len(self._all) + 1):
             id_str = "{}{}{}".format(LAYER_ID, core.Node.ID_SEPARATOR, n)
-            try:
-                self._root.by_id(id_str)
-            except KeyError:
+            if id_str not in nodes:
                 return id_str
 
     def add_fnode_multiple(self, parent, edge_categories, *, implicit=False, edge_attrib=None):
@@ -522,57 +636,131 @@ class Layer1(core.Layer):
             linkage.add(EdgeTags.LinkArgument, arg)
         return linkage
 
-    def _check_top_scene(self, node):
-        """Checks whether a node is a scene, and a top-level one.
-
-        A top level scene is one which is not embedded in any other scene.
+    def _under_scene(self, node, memo):
+        """Checks whether a node is a scene or embedded in one (below the layer head).
 
-        :param node: the FNode to check.
+        :param node: the FNode to check, or None.
+        :param memo: dictionary from id() of FNodes to results of previous checks,
+                updated with all FNodes on the way from node upwards.
 
-        :return: True iff node is a top-level scenes.
+        :return: True iff node or one of its FNode ancestors is a scene.
 
         """
-        if not node.is_scene():
-            return False
-        while node.fparent not in (None, self._head_fnode):
-            node = node.fparent
+        path = []
+        under_scene = False
+        while node is not None and node is not self._head_fnode:
+            under_scene = memo.get(id(node))
+            if under_scene is not None:
+                break
+            memo[id(node)] = under_scene = False  # guard against cycles
+            path.append(node)
             if node.is_scene():
-                return False
-        return True
-
-    def _update_top_scene(self, node):
-        """Adds/removes the node if it's a top-level scene."""
-        if node.tag != NodeTags.Foundational:
-            return
-        if node in self._scenes and not self._check_top_scene(node):
-            self._scenes.remove(node)
-        elif node not in self._scenes and self._check_top_scene(node):
-            self._scenes.append(node)
-            # Other scenes may now become not top-level, check it
-            for ts in self._scenes[:-1]:
-                if not self._check_top_scene(ts):
-                    self._scenes.remove(ts)
-            self._scenes.sort(key=self.orderkey)
+                under_scene = True
+                break
+            node = node.fparent
+        for visited in path:
+            memo[id(visited)] = under_scene
+        return under_scene
+
+    def _rebuild(self):
+        """Recomputes the top scenes and linkages from scratch after a bulk change."""
+        super()._rebuild()
+        memo = {}
+        fnodes = [node for node in self._all if node.tag == NodeTags.Foundational]
+        self._covered = {node for node in fnodes if self._under_scene(node, memo)}
+        self._scenes.resort(self.orderkey, [node for node in fnodes if node.is_scene() and
+                                            not self._under_scene(node.fparent, memo)])
+        self._linkages.resort(self.orderkey, [node for node in self._all if node.tag == NodeTags.Linkage and
+                                              node.outgoing and all(n in self._scenes for n in node.arguments)])
+
+    def _update_top_scenes(self, node):
+        """Updates the top scenes after the scene status or the fparent of a node may have changed.
+
+        Every FNode which is a scene or embedded in one (below the layer head)
+        is kept in self._covered. A change in this status is propagated down to
+        the FNode children of the node, stopping at scenes, whose own status
+        does not depend on their ancestors. So only the affected part of the
+        node's subtree is visited. A top scene is a scene whose fparent is not
+        covered.
+
+        :param node: the Node whose status may have changed.
+
+        """
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.tag != NodeTags.Foundational:
+                continue
+            fparent = node.fparent
+            parent_covered = fparent in self._covered
+            is_scene = node.is_scene()
+            if is_scene and not parent_covered:
+                if node not in self._scenes:
+                    self._scenes.add(node)
+            elif node in self._scenes:
+                self._scenes.remove(node)
+            covered = (is_scene or parent_covered) and node is not self._head_fnode
+            if covered != (node in self._covered):
+                if covered:
+                    self._covered.add(node)
+                else:
+                    self._covered.remove(node)
+                stack += [edge.child for edge in node if edge.child.tag == NodeTags.Foundational and
+                          edge.child.fparent is node]
+
+    def _compile(self, compiled):
+        """Caches the spans, children by tag and fparent of every FNode, and finds top scenes and yields.
+
+        :return: dictionary with "top_scene": dictionary of id() of each FNode -> its top scene or None,
+                and "yield": dictionary of (id() of each Node, punct) -> frozenset of the positions of
+                its Terminals (as returned by get_terminals(punct=punct))
+
+        """
+        epoch = self._root._epoch
+        for node in reversed(compiled.order):  # children first, so that their spans are reused
+            if isinstance(node, FoundationalNode):
+                node._children_by_tag()
+                node._fedge()
+                node._spans = (epoch, {(punct, remotes): node._span(punct, remotes)
+                                       for punct in (True, False) for remotes in (True, False)})
+        scenes = {id(node) for node in self._scenes}
+        top_scene = {}
+        for node in compiled.order:  # fparents first
+            if isinstance(node, FoundationalNode):
+                fparent = node.fparent
+                if id(node) in scenes:
+                    top_scene[id(node)] = node
+                elif fparent is None:
+                    top_scene[id(node)] = None
+                else:  # the fparent comes after the node only if they are in a cycle
+                    top_scene[id(node)] = top_scene[id(fparent)] if id(fparent) in top_scene else \
+                        fparent.get_top_scene()
+        yields = {(id(node), punct): frozenset(t.position for t in node.get_terminals(punct=punct))
+                  for node in self._all for punct in (True, False)}
+        return {"top_scene": top_scene, "yield": yields}
 
     def _update_top_linkage(self, linkage):
         """Adds/removes the linkage if it's a top level linkage."""
-        if all(fnode in self._scenes for fnode in linkage.arguments):
+        if linkage.outgoing and all(fnode in self._scenes for fnode in linkage.arguments):
             if linkage not in self._linkages:
-                self._linkages.append(linkage)
-                self._linkages.sort(key=self.orderkey)
+                self._linkages.add(linkage)
         elif linkage in self._linkages:
             self._linkages.remove(linkage)
 
     def _update_edge(self, edge):
-        """Adds the Edge to the Layer, and updates top scenes and linkers."""
-        self._update_top_scene(edge.parent)
-        self._update_top_scene(edge.child)
-        for lkg in [x for x in edge.parent.parents
-                    if x.tag == NodeTags.Linkage]:
-            self._update_top_linkage(lkg)
-        for lkg in [x for x in edge.child.parents
-                    if x.tag == NodeTags.Linkage]:
-            self._update_top_linkage(lkg)
+        """Updates top scenes and linkages after an Edge was added, removed or changed."""
+        self._update_top_scenes(edge.parent)
+        self._update_top_scenes(edge.child)
+        for node in edge.parent, edge.child:
+            for linkage in node.parents:
+                if linkage.tag == NodeTags.Linkage:
+                    self._update_top_linkage(linkage)
+
+    def _remove_node(self, node):
+        super()._remove_node(node)
+        self._covered.discard(node)
+        self._scenes.discard(node)
+        self._linkages.discard(node)
 
     def _add_edge(self, edge):
         super()._add_edge(edge)
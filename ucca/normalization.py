@@ -174,7 +174,7 @@ def attach_punct(l0, l1):
 
 
 def detach_punct(l1):
-    for node in l1.all:
+    for node in l1.all.snapshot():
         if node.tag == L1Tags.Punctuation:
             destroy(node)
 
@@ -182,7 +182,7 @@ def detach_punct(l1):
 def reattach_terminals(l0, l1):
     attach_terminals(l0, l1)
     for terminal in l0.all:
-        for edge in terminal.incoming:
+        for edge in terminal.incoming.snapshot():
             if any(e.tag != ETags.Terminal for e in edge.parent):
                 node = l1.add_fnode(edge.parent, ETags.Center)
                 if copy_edge(edge, parent=node):
@@ -1,7 +1,10 @@
 import xml.etree.ElementTree as ETree
+from io import BytesIO, StringIO
 
-from ucca import layer0, layer1, convert, textutil
-from .conftest import loaded, load_xml
+import pytest
+
+from ucca import core, layer0, layer1, convert, textutil
+from .conftest import loaded, load_xml, PASSAGES
 
 """Tests convert module correctness and API."""
 
@@ -159,12 +162,205 @@ def test_to_standard():
             textutil.indent_xml(ETree.tostring(root)).splitlines())
 
 
+@pytest.mark.parametrize("create", PASSAGES)
+@pytest.mark.parametrize("indent", (True, False))
+def test_write_standard(create, indent):
+    passage = create()
+    passage.extra["remarks"] = 'a&b <c> "d"\té'
+    xml_string = ETree.tostring(convert.to_standard(passage)).decode()
+    f = StringIO()
+    convert.write_standard(passage, f, indent=indent)
+    assert f.getvalue() == (textutil.indent_xml(xml_string) if indent else xml_string)
+
+
+def test_write_standard_non_ascii():
+    passage = loaded()
+    passage.extra["remarks"] = "naïve 日本語 😀"
+    f = StringIO()
+    convert.write_standard(passage, f)
+    converted = convert.from_standard_file(BytesIO(f.getvalue().encode("ascii")))  # as character references
+    assert converted.extra["remarks"] == "naïve 日本語 😀"
+    passage.layer(layer1.LAYER_ID).extra["clé"] = "é"  # keys are written as ElementTree does
+    xml_string = ETree.tostring(convert.to_standard(passage)).decode()
+    f = StringIO()
+    convert.write_standard(passage, f)
+    assert f.getvalue() == textutil.indent_xml(xml_string)
+
+
 def test_from_standard():
     passage = loaded()
     ref = convert.from_site(load_xml("test_files/site3.xml"))
     assert passage.equals(ref, ordered=True)
 
 
+@pytest.mark.parametrize("create", PASSAGES)
+def test_from_standard_bookkeeping(create):
+    """from_standard builds in bulk, so everything maintained incrementally must come out the same."""
+    passage = create()
+    converted = convert.from_standard(convert.to_standard(passage))
+    assert passage.equals(converted, ordered=True)
+    for layer in passage.layers:
+        other = converted.layer(layer.ID)
+        assert [n.ID for n in layer.all] == [n.ID for n in other.all]
+        assert [n.ID for n in layer.heads] == [n.ID for n in other.heads]
+        for node in layer.all:
+            other_node = converted.by_id(node.ID)
+            assert [e.ID for e in node.outgoing] == [e.ID for e in other_node.outgoing]
+            assert [e.ID for e in node.incoming] == [e.ID for e in other_node.incoming]
+    if layer1.LAYER_ID in [layer.ID for layer in passage.layers]:
+        l1, other_l1 = passage.layer(layer1.LAYER_ID), converted.layer(layer1.LAYER_ID)
+        assert [n.ID for n in l1.top_scenes] == [n.ID for n in other_l1.top_scenes]
+        assert [n.ID for n in l1.top_linkages] == [n.ID for n in other_l1.top_linkages]
+
+
+@pytest.mark.parametrize("create", PASSAGES)
+def test_from_standard_file(create):
+    passage = create()
+    root = convert.to_standard(passage)
+    converted = convert.from_standard_file(BytesIO(ETree.tostring(root)))
+    assert passage.equals(converted, ordered=True)
+    assert convert.to_standard(converted).items() == root.items()
+    for layer_elem in root.iterfind("layer"):  # Edges to Nodes which come later in the file wait for them
+        nodes = layer_elem.findall("node")
+        for node_elem in nodes:
+            layer_elem.remove(node_elem)
+        layer_elem.extend(reversed(nodes))
+    assert passage.equals(convert.from_standard_file(BytesIO(ETree.tostring(root))), ordered=True)
+
+
+def test_from_standard_extra():
+    passage = loaded()
+    passage.extra.update(annotated=True, skipped=False, remarks="Fine", count=3, spans=[[1, 2]])
+    for converted in (convert.from_standard(convert.to_standard(passage)),
+                      convert.from_standard_file(BytesIO(ETree.tostring(convert.to_standard(passage))))):
+        assert converted.extra == passage.extra
+        assert converted.extra["annotated"] is True and converted.extra["skipped"] is False
+
+
+def test_from_standard_file_missing_node():
+    root = convert.to_standard(loaded())
+    next(root.iter("edge")).set("toID", "1.999")
+    with pytest.raises(KeyError):
+        convert.from_standard_file(BytesIO(ETree.tostring(root)))
+
+
+@pytest.mark.parametrize("create", PASSAGES)
+def test_from_edges(create):
+    passage = create()
+    terminals = passage.layer(layer0.LAYER_ID).all
+    units = passage.layer(layer1.LAYER_ID).all
+    index = {node.ID: i for i, node in enumerate(list(terminals) + list(units))}
+    edges = [edge for unit in units for edge in unit]
+    converted = convert.from_edges(passage.ID, [(t.text, t.punct, t.paragraph) for t in terminals],
+                                   [index[edge.parent.ID] for edge in edges],
+                                   [index[edge.child.ID] for edge in edges],
+                                   [[tuple(c) for c in edge.categories] for edge in edges],
+                                   remotes=[edge.attrib.get("remote", False) for edge in edges],
+                                   implicit=[edge.child.attrib.get("implicit", False) for edge in edges])
+    assert passage.equals(converted, ordered=True)
+    l1, other_l1 = passage.layer(layer1.LAYER_ID), converted.layer(layer1.LAYER_ID)
+    assert [type(n) for n in l1.all] == [type(n) for n in other_l1.all]
+    assert [index[n.ID] for n in l1.top_scenes] == [index[n.ID] for n in other_l1.top_scenes]
+    assert [index[n.ID] for n in l1.top_linkages] == [index[n.ID] for n in other_l1.top_linkages]
+
+
+def test_from_edges_invalid():
+    terminals = [("a", False), ("b", False)]
+    passage = convert.from_edges("1", terminals, [2, 3, 3], [3, 0, 1], ["H", "Terminal", "Terminal"])
+    assert str(passage) == "[H a b] "
+    with pytest.raises(ValueError):  # different lengths
+        convert.from_edges("1", terminals, [2, 3], [3, 0, 1], ["H", "Terminal", "Terminal"])
+    with pytest.raises(ValueError):  # parent is a terminal
+        convert.from_edges("1", terminals, [2, 0], [3, 1], ["H", "Terminal"])
+    with pytest.raises(ValueError):  # edge into the head
+        convert.from_edges("1", terminals, [2, 3], [3, 2], ["H", "A"])
+    with pytest.raises(ValueError):  # cycle
+        convert.from_edges("1", terminals, [2, 3, 4], [3, 4, 3], ["H", "A", "A"], remotes=[False, False, True])
+
+
+@pytest.mark.parametrize("create", PASSAGES)
+def test_binary(create, tmp_path):
+    passage = create()
+    passage.extra.update(remarks="é\0", score=0.5, flags=[True, None], count=2 ** 70)
+    data = convert.to_binary(passage)
+    converted = convert.from_binary(data)
+    assert passage.equals(converted, ordered=True)
+    assert converted.extra == passage.extra
+    assert convert.to_binary(converted) == data
+    standard = convert.from_standard(convert.to_standard(passage))
+    assert list(converted.refined_categories) == list(standard.refined_categories)
+    for node in standard.nodes.values():
+        other = converted.by_id(node.ID)
+        assert type(node) is type(other)
+        assert [(e.child.ID, e.categories, dict(e.extra)) for e in node] == \
+               [(e.child.ID, e.categories, dict(e.extra)) for e in other]
+    filename = str(tmp_path / "passage.pickle")  # read by the magic bytes, whatever the suffix
+    convert.passage2file(passage, filename, binary="compact")
+    assert passage.equals(convert.file2passage(filename), ordered=True)
+
+
+def _non_ascii_passage():
+    passage = core.Passage("pass1")
+    l0 = layer0.Layer0(passage)
+    l1 = layer1.Layer1(passage)
+    head = l1.add_fnode(None, layer1.EdgeTags.ParallelScene)
+    for text in ("שלום", "naïve", "日本語", "😀", "end"):
+        head.add(layer1.EdgeTags.Terminal, l0.add_terminal(text=text, punct=False))
+    return passage
+
+
+def test_binary_non_ascii():
+    passage = _non_ascii_passage()
+    data = convert.to_binary(passage)
+    arrays = convert._BinaryReader(data).arrays
+    offsets, text = arrays["string_offsets"], arrays["string_text"]
+    assert offsets[-1] == len(text), "Offsets should be of the UTF-8 text"
+    converted = convert.from_binary(data)
+    assert passage.equals(converted, ordered=True)
+    assert [t.text for t in converted.layer(layer0.LAYER_ID).all] == [t.text for t in passage.layer(layer0.LAYER_ID).all]
+
+
+def test_passage_handle_non_ascii():
+    passage = _non_ascii_passage()
+    handle = convert.PassageHandle(convert.to_binary(passage))
+    assert handle.ID == "pass1"
+    assert len(handle) == 5
+    assert handle.tokens == ["שלום", "naïve", "日本語", "😀", "end"]
+    assert handle.node_ids(layer1.LAYER_ID) == [n.ID for n in passage.layer(layer1.LAYER_ID).all]
+    assert passage.equals(handle.load(), ordered=True)
+    text = handle.load(layers=(layer0.LAYER_ID,), lazy_extra=True)
+    assert [layer.ID for layer in text.layers] == [layer0.LAYER_ID]
+    assert convert.to_text(text, sentences=False) == convert.to_text(passage, sentences=False)
+
+
+def test_binary_invalid():
+    with pytest.raises(ValueError):
+        convert.from_binary(b"<root />")
+    data = bytearray(convert.to_binary(loaded()))
+    data[len(convert.BINARY_MAGIC)] += 1  # a newer version
+    with pytest.raises(ValueError):
+        convert.from_binary(bytes(data))
+
+
+@pytest.mark.parametrize("binary", (False, "compact"))
+def test_file2passage_layers(binary, tmp_path):
+    passage = loaded()
+    passage.layer(layer0.LAYER_ID).extra["doc"] = [[1, "a"], [2, "b"]]
+    filename = str(tmp_path / "passage")
+    convert.passage2file(passage, filename, binary=binary)
+    text = convert.file2passage(filename, layers=(layer0.LAYER_ID,), lazy_extra=True)
+    assert [layer.ID for layer in text.layers] == [layer0.LAYER_ID]
+    assert convert.to_text(text, sentences=False) == convert.to_text(passage, sentences=False)
+    lazy = convert.file2passage(filename, lazy_extra=True)
+    assert passage.equals(lazy, ordered=True)
+    for layer in lazy.layers:
+        assert layer.extra == passage.layer(layer.ID).extra
+    assert lazy.layer(layer0.LAYER_ID).extra["doc"] == [[1, "a"], [2, "b"]]
+    heads = convert.file2passage(filename, layers=(layer1.LAYER_ID,))
+    assert [layer.ID for layer in heads.layers] == [layer1.LAYER_ID]
+    assert all(n.layer.ID == layer1.LAYER_ID for node in heads.nodes.values() for n in node.children)
+
+
 def test_from_text():
     sample = ["Hello . again", "nice", " ? ! end", ""]
     passage = next(convert.from_text(sample))
@@ -1,9 +1,12 @@
 """Testing code for the ucca package, unit-testing only."""
 
+import json
+import pickle
+
 import pytest
 
 from ucca import core, layer0, layer1
-from .conftest import basic, PASSAGES
+from .conftest import basic, l1_passage, PASSAGES
 
 
 def test_creation():
@@ -89,6 +92,82 @@ def test_modifying():
     assert node22[0].tag == "testx"
 
 
+def test_journal():
+    p = basic()
+    l1, l2 = p.layer("1"), p.layer("2")
+    node11, node12, node13 = l1.all
+    node22, node21 = l2.all
+    original = p.copy()
+    assert p.journal is None
+    journal = p.start_journal()
+    assert p.start_journal() is journal
+    token = journal.token
+
+    node14 = core.Node(ID="1.4", root=p, tag="4")
+    node14.add("test", node11)
+    node12.destroy()
+    node13.tag = "x"
+    node22[0].tag = "testx"
+    node22[0].add("testy")
+    node13.attrib["node"] = False
+    node13.attrib["new"] = 1
+    del l2.attrib["test"]
+    changed = p.copy()
+    assert [c.kind for c in journal.changes_since(token)] == [
+        core.Change.ADD_NODE, core.Change.ADD_EDGE,
+        core.Change.REMOVE_EDGE, core.Change.REMOVE_EDGE, core.Change.REMOVE_EDGE, core.Change.REMOVE_EDGE,
+        core.Change.REMOVE_NODE, core.Change.NODE_TAG, core.Change.EDGE_CATEGORIES, core.Change.EDGE_CATEGORIES,
+        core.Change.ATTRIB, core.Change.ATTRIB, core.Change.ATTRIB]
+    new_attrib = journal.changes_since(token)[-2]
+    assert (new_attrib.key, new_attrib.old, new_attrib.new) == ("new", core.Change.MISSING, 1)
+
+    journal.undo()
+    assert l2.attrib["test"]
+    journal.undo(token)
+    assert p.equals(original, ordered=True)
+    assert l1.all == [node11, node12, node13]
+    assert l1.heads == [node12]
+    assert node12.children == [node13, node11]
+    assert node12.parents == [node22, node21]
+    assert not journal.changes_since(token)
+    journal.redo()
+    assert "1.4" in p.nodes
+    journal.redo(token + 13)
+    assert p.equals(changed, ordered=True)
+    assert "1.2" not in p.nodes
+    with pytest.raises(ValueError):
+        journal.redo()
+
+    journal.undo(token)
+    node13.tag = "y"  # a new change discards the undone changes
+    with pytest.raises(ValueError):
+        journal.redo()
+    assert journal.token == token + 1
+    p.frozen = True
+    with pytest.raises(core.FrozenPassageError):
+        journal.undo()
+    p.frozen = False
+    p.stop_journal()
+    assert p.journal is None
+
+
+def test_journal_layer1():
+    p = l1_passage()
+    l1 = p.layer(layer1.LAYER_ID)
+    top_scenes = l1.top_scenes
+    journal = p.start_journal()
+    ps1 = top_scenes[0]
+    p_edge = next(e for e in ps1 if e.tag == layer1.EdgeTags.Process)
+    p_edge.categories = [core.Category(layer1.EdgeTags.Participant)]
+    assert ps1 not in l1.top_scenes
+    l1.add_fnode(ps1, layer1.EdgeTags.Adverbial)
+    ps1.attrib["implicit"] = True
+    assert pickle.loads(pickle.dumps(p)).journal is None
+    journal.undo(0)
+    assert l1.top_scenes == top_scenes
+    assert p.equals(l1_passage(), ordered=True)
+
+
 def test_equals():
     p1 = core.Passage("1")
     p2 = core.Passage("2")
@@ -147,6 +226,22 @@ def test_equals():
     assert not (p1.equals(p2) or p2.equals(p1))
 
 
+@pytest.mark.parametrize("create", PASSAGES)
+def test_missing_nodes(create):
+    p1 = create()
+    p2 = pickle.loads(pickle.dumps(p1))
+    assert not p1.missing_nodes(p2) and not p2.missing_nodes(p1)
+    if layer1.LAYER_ID not in p2._layers:
+        return
+    node = next(n for n in p2.layer(layer1.LAYER_ID).all if n.tag == layer1.NodeTags.Foundational)
+    added = p2.layer(layer1.LAYER_ID).add_fnode(node, layer1.EdgeTags.Linker)
+    assert not (p1.equals(p2) or p2.equals(p1))
+    assert p1.equals(p2, ignore_edge=lambda e: e.tag == layer1.EdgeTags.Linker)
+    assert node in p2.missing_nodes(p1)
+    assert not p2.missing_nodes(p1, ignore_node=lambda n: n.tag != layer1.NodeTags.Punctuation)
+    assert [e.child for e in node.missing_edges(p1.by_id(node.ID))] == [added]
+
+
 @pytest.mark.parametrize("create", PASSAGES)
 def test_copying(create):
     # we don't need such a complex passage, but it will work anyway
@@ -162,6 +257,30 @@ def test_copying(create):
     p2 = p1.copy([l0id])
     assert (p1.layer(l0id).equals(p2.layer(l0id)))
 
+    p2 = p1.copy()
+    assert p1.equals(p2, ordered=True)
+    assert p1.nodes.keys() == p2.nodes.keys()
+    for layer in p1.layers:
+        other = p2.layer(layer.ID)
+        assert [n.ID for n in layer.heads] == [n.ID for n in other.heads]
+        assert [n.ID for n in getattr(layer, "top_scenes", ())] == [n.ID for n in getattr(other, "top_scenes", ())]
+    assert p1.copy([layer1.LAYER_ID, l0id]).equals(p2, ordered=True)
+    # the copy is independent of the original
+    node = p2.layer(layer1.LAYER_ID).add_fnode(None, layer1.EdgeTags.Linker)
+    assert not p1.equals(p2)
+    assert node.ID not in p1.nodes
+
+
+def test_copying_layers():
+    p1 = basic()
+    p2 = p1.copy()
+    assert p1.equals(p2, ordered=True)
+    assert [n.ID for n in p2.layer("2").all] == ["2.2", "2.1"]
+    assert [e.ID for e in p2.by_id("1.2")] == ["1.2->1.3", "1.2->1.1"]
+    assert p2.layer("2").attrib["test"]
+    p2 = p1.copy(["2"])  # Edges to layers which are not copied are left out
+    assert not any(n.outgoing for n in p2.nodes.values())
+
 
 def test_iteration():
     p = basic()
@@ -177,3 +296,292 @@ def test_iteration():
     assert list(node21.iter(duplicates=True)) == [node21, node11, node12, node13, node11]
     assert list(node21.iter()) == [node21, node11, node12, node13]
     assert list(node22.iter(method="bfs", duplicates=True)) == [node22, node11, node12, node13, node13, node11]
+    assert list(node22.iter(method="bfs")) == [node22, node11, node12, node13]
+    assert list(node21.iter(order="post")) == [node11, node13, node12, node21]
+    assert [x.ID for x in node12.iter(obj="edges", order="post")] == ["1.2->1.3", "1.2->1.1"]
+    assert list(node21.iter(stop=lambda x: x is node12)) == [node21, node11, node12]
+    with pytest.raises(ValueError):
+        list(node21.iter(method="bfs", order="post"))
+    assert list(node21.iter()) == [node21, node11, node12, node13]  # recorded
+    node13.add("4", node22)
+    assert list(node21.iter()) == [node21, node11, node12, node13, node22]
+
+
+def test_layer_order():
+    p = basic()
+    l1, l2 = p.layer("1"), p.layer("2")
+    node11, node12, node13 = l1.all
+    node22, node21 = l2.all
+    node23 = core.Node(ID="2.3", root=p, tag="2")
+    assert [x.ID for x in l2.all] == ["2.3", "2.2", "2.1"]
+    assert [x.ID for x in l2.heads] == ["2.3", "2.2", "2.1"]
+    node21.add("test", node23)
+    assert [x.ID for x in l2.heads] == ["2.2", "2.1"]
+    node21.remove(node23)
+    assert [x.ID for x in l2.heads] == ["2.3", "2.2", "2.1"]
+    node23.destroy()
+    assert [x.ID for x in l2.all] == ["2.2", "2.1"]
+    l2.orderkey = core.id_orderkey
+    assert [x.ID for x in l2.all] == ["2.1", "2.2"]
+    assert [x.ID for x in l1.all] == ["1.1", "1.2", "1.3"]
+    node12.destroy()
+    assert [x.ID for x in l1.all] == ["1.1", "1.3"]
+    assert [x.ID for x in l1.heads] == ["1.1", "1.3"]
+
+
+@pytest.mark.parametrize("create", PASSAGES)
+def test_pickle_layer_order(create):
+    p1 = create()
+    p2 = pickle.loads(pickle.dumps(p1))
+    assert p1.equals(p2)
+    for l1, l2 in zip(p1.layers, p2.layers):
+        assert [x.ID for x in l1.all] == [x.ID for x in l2.all]
+        assert [x.ID for x in l1.heads] == [x.ID for x in l2.heads]
+
+
+def test_unpickle_list_layers():
+    p1 = basic()
+    for layer in p1.layers:
+        layer.orderkey = core.id_orderkey
+    state = pickle.dumps(p1)
+    for layer in p1.layers:  # simulate the state of a pickle from an older version
+        layer._all, layer._heads = list(layer._all), list(layer._heads)
+    for node in p1.nodes.values():
+        del node._layer
+    p2 = pickle.loads(pickle.dumps(p1))
+    assert pickle.loads(state).equals(p2)
+    assert all(node.layer is p2.layer(node.ID.split(".")[0]) for node in p2.nodes.values())
+    node = core.Node(ID="1.4", root=p2, tag="4")
+    assert p2.layer("1").all[-1] is node
+
+
+def test_node_invalid_layer():
+    p = core.Passage("1")
+    core.Layer("1", p)
+    with pytest.raises(KeyError):
+        core.Node(ID="2.1", root=p, tag="1")
+    assert "2.1" not in p.nodes
+
+
+def test_bulk():
+    p = core.Passage("1")
+    l1 = core.Layer("1", p)
+    with p.bulk():
+        node11 = core.Node(ID="1.1", root=p, tag="1")
+        node12 = core.Node(ID="1.2", root=p, tag="2")
+        node13 = core.Node(ID="1.3", root=p, tag="3")
+        with p.bulk():
+            node12.add("b", node13)
+            node12.add("a", node11)
+        assert p._bulk
+        node13.add("c", node11)
+    assert not p._bulk
+    assert [x.ID for x in l1.heads] == ["1.2"]
+    assert [x.ID for x in node12.outgoing] == ["1.2->1.1", "1.2->1.3"]
+    assert [x.ID for x in node11.incoming] == ["1.2->1.1", "1.3->1.1"]
+    with pytest.raises(ValueError):
+        with p.bulk():
+            node12.remove(node13)
+            raise ValueError()
+    assert [x.ID for x in l1.heads] == ["1.2", "1.3"]
+
+
+def test_bulk_traversal():
+    p = core.Passage("1")
+    core.Layer("1", p)
+    with p.bulk():
+        node11 = core.Node(ID="1.1", root=p, tag="1")
+        node12 = core.Node(ID="1.2", root=p, tag="2")
+        node13 = core.Node(ID="1.3", root=p, tag="3")
+        node11.add("b", node13)
+        node11.add("a", node12)
+        assert [x.ID for x in node11.iter()] == ["1.1", "1.3", "1.2"]  # not sorted yet
+    assert [x.ID for x in node11.iter()] == ["1.1", "1.2", "1.3"]
+
+
+def test_id_orderkey():
+    p = core.Passage("1")
+    core.Layer("1", p)
+    nodes = [core.Node(ID=i, root=p, tag="x") for i in ("1.10", "1.9", "1.a", "1.100000")]
+    assert [n.ID for n in p.layer("1").all] == ["1.a", "1.9", "1.10", "1.100000"]
+    edge = nodes[1].add("e", nodes[0])
+    assert core.edge_id_orderkey(edge) == (("1", 9), ("1", 10))
+    state = nodes[0].__getstate__()
+    del state["_key"]  # simulate the state of a pickle from an older version
+    node = core.Node.__new__(core.Node)
+    node.__setstate__(state)
+    assert core.id_orderkey(node) == ("1", 10)
+
+
+def test_lazy_storage():
+    p = basic()
+    node11, node12, _ = p.layer("1").all
+    edge = node12.outgoing[0]
+    for obj in (node11, edge, edge.categories[0], edge.attrib):
+        assert not hasattr(obj, "__dict__")
+    assert node11._extra is None and node11.attrib._dict is None
+    assert node11.extra == {} and node11.attrib.get("x") is None and node11.attrib.copy() == {}
+    assert node11._extra is None and node11.attrib._dict is None
+    extra = node11.extra
+    extra["x"] = 1
+    node11.attrib["y"] = 2
+    assert node11.extra == {"x": 1} and node11.attrib["y"] == 2
+    edge.extra.setdefault("z", []).append(3)
+    assert edge.extra == {"z": [3]}
+    p.layer("2").orderkey = core.id_orderkey  # the orderkey in basic() can't be pickled
+    node12.orderkey = core.edge_id_orderkey
+    p2 = pickle.loads(pickle.dumps(p))
+    assert p2.equals(p)
+    assert p2.by_id("1.1").extra == {"x": 1} and p2.by_id("1.1").attrib["y"] == 2
+    assert next(e for e in p2.by_id("1.2") if e.ID == edge.ID).extra == {"z": [3]}
+
+
+def test_categories():
+    p = basic()
+    node11, node12, node13 = p.layer("1").all
+    edge = node12.add_multiple([("A", "1", "foundational", ""), ("B", "", "refined", "A")], node11)
+    assert core.Category("A", "1", "foundational") is edge.categories[0]
+    assert core.Category("B", None, "refined", "A") is edge.categories[1]
+    with pytest.raises(AttributeError):
+        edge.categories[0].tag = "C"
+    assert {"A", "B"} <= set(p.categories)
+    assert p.refined_categories == ["A"]
+    edge.tag = "C"
+    assert edge.tags == ["C", "B"]
+    assert edge.categories[0] is core.Category("C", "1", "foundational")
+    new = edge.replace_category(edge.categories[1], tag="D")
+    assert edge.tags == ["C", "D"] and new.parent == "A"
+    with pytest.raises(ValueError):
+        edge.replace_category(core.Category("E"), tag="F")
+    copied = pickle.loads(pickle.dumps(edge.categories))
+    assert all(c1 is c2 for c1, c2 in zip(copied, edge.categories))
+
+
+def test_category_extra():
+    p = basic()
+    node11, node12, node13 = p.layer("1").all
+    edge = node12.add("A", node11)
+    with pytest.raises(TypeError):
+        edge.categories[0].extra["remark"] = "x"
+    category = edge.replace_category(edge.categories[0], extra={"remark": "x"})
+    assert category is edge.categories[0] and category is not core.Category("A")
+    category.extra["other"] = 1
+    assert dict(edge.categories[0].extra) == {"remark": "x", "other": 1}
+    assert not core.Category("A").extra
+    copied = pickle.loads(pickle.dumps(category))
+    assert copied is not category and copied.tag == "A" and copied.extra == category.extra
+    assert category.replace(extra=None) is core.Category("A")
+    key = ("Unused", "", "", "")
+    core.Category(*key)
+    assert key not in core.Category._interned, "Categories no longer used should not be kept"
+
+
+def test_views():
+    p = basic()
+    l1 = p.layer("1")
+    node11, node12, node13 = l1.all
+    all_view, outgoing = l1.all, node12.outgoing
+    assert all_view == [node11, node12, node13] and all_view == (node11, node12, node13)
+    assert all_view[1:] == [node12, node13] and isinstance(all_view[1:], list)
+    assert node13 in all_view and len(outgoing) == 2
+    with pytest.raises(TypeError):
+        all_view[0] = node12
+    with pytest.raises(AttributeError):
+        outgoing.append(None)
+    with pytest.raises(TypeError):
+        p.nodes["1.4"] = node11
+    snapshot = all_view.snapshot()
+    node14 = core.Node(ID="1.4", root=p, tag="4")
+    assert all_view[-1] is node14 and snapshot == [node11, node12, node13]
+    assert p.nodes["1.4"] is node14
+    with pytest.raises(RuntimeError):
+        for node in l1.all:
+            node.destroy()
+    for edge in node12.outgoing.snapshot():
+        node12.remove(edge)
+    assert not outgoing
+
+
+@pytest.mark.parametrize("create", PASSAGES)
+def test_to_arrays(create):
+    p = create()
+    arrays = p.to_arrays()
+    assert len(arrays) == len(p.nodes) and sorted(arrays.node_ids) == sorted(p.nodes)
+    node_tags, edge_tags = arrays.node_tags + (None,), arrays.edge_tags + (None,)
+    for i, ID in enumerate(arrays.node_ids):
+        node = p.nodes[ID]
+        assert arrays.node_index[ID] == i
+        assert arrays.layer_ids[arrays.layers[i]] == node.layer.ID
+        assert node_tags[arrays.node_tag_codes[i]] == node.tag
+        assert arrays.implicit[i] == bool(node.attrib.get("implicit"))
+        assert arrays.positions[i] == getattr(node, "position", -1)
+        edges = range(arrays.indptr[i], arrays.indptr[i + 1])
+        assert [arrays.node_ids[arrays.children[j]] for j in edges] == [e.child.ID for e in node]
+        assert all(arrays.parents[j] == i for j in edges)
+        assert [edge_tags[arrays.edge_tag_codes[j]] for j in edges] == [e.tag for e in node]
+        assert [arrays.remote[j] for j in edges] == [bool(e.attrib.get("remote")) for e in node]
+        incoming = arrays.incoming[arrays.incoming_indptr[i]:arrays.incoming_indptr[i + 1]]
+        assert all(arrays.children[j] == i for j in incoming)
+        assert sorted(arrays.node_ids[arrays.parents[j]] for j in incoming) == sorted(e.parent.ID for e in node.incoming)
+    terminals = sorted((n for n in p.nodes.values() if n.layer.ID == layer0.LAYER_ID), key=lambda n: n.position)
+    assert [arrays.node_ids[i] for i in arrays.terminals] == [t.ID for t in terminals]
+    g = arrays.to_networkx()
+    assert set(g) == set(p.nodes)
+    assert {(e.parent.ID, e.child.ID): (e.tag, bool(e.attrib.get("remote"))) for n in p.nodes.values() for e in n} == \
+        {(u, v): (d["tag"], d["remote"]) for u, v, d in g.edges(data=True)}
+
+
+def test_to_arrays_scipy():
+    pytest.importorskip("scipy")
+    p = l1_passage()
+    arrays = p.to_arrays()
+    matrix = arrays.to_scipy()
+    assert matrix.shape == (len(p.nodes), len(p.nodes)) and matrix.nnz == len(arrays.children)
+    for node in p.nodes.values():
+        i = arrays.node_index[node.ID]
+        assert sorted(arrays.node_ids[j] for j in matrix[i].indices) == sorted(e.child.ID for e in node)
+
+
+@pytest.mark.parametrize("create", PASSAGES)
+def test_freeze_compile(create):
+    p1, p2 = create(), create()
+    p2.freeze(compile=True)
+    assert p2.frozen and p2.compiled is not None
+    order, depths = p2.compiled.order, p2.compiled.depths
+    assert sorted(n.ID for n in order) == sorted(p2.nodes)
+    index = {n.ID: i for i, n in enumerate(order)}
+    for node in order:
+        assert all(index[e.parent.ID] < index[node.ID] for e in node.incoming)
+        assert depths[node.ID] == max((depths[e.parent.ID] + 1 for e in node.incoming), default=0)
+    for node1 in p1.nodes.values():
+        node2 = p2.by_id(node1.ID)
+        if isinstance(node1, layer1.FoundationalNode):
+            for punct in (True, False):
+                for remotes in (True, False):
+                    assert [t.ID for t in node1.get_terminals(punct, remotes)] == \
+                           [t.ID for t in node2.get_terminals(punct, remotes)]
+            assert (node1.start_position, node1.end_position) == (node2.start_position, node2.end_position)
+            assert getattr(node1.fparent, "ID", None) == getattr(node2.fparent, "ID", None)
+            assert node1.ftag == node2.ftag
+            assert getattr(node1.get_top_scene(), "ID", None) == getattr(node2.get_top_scene(), "ID", None)
+            assert [n.ID for n in node1.participants] == [n.ID for n in node2.participants]
+    for node in list(p2.nodes.values())[:1]:
+        with pytest.raises(core.FrozenPassageError):
+            node.destroy()
+    p2.frozen = False
+    assert p2.compiled is None
+    p2.freeze()
+    assert p2.frozen and p2.compiled is None
+
+
+def test_deferred_extra():
+    extra = core._DeferredDict(lambda key, value: json.loads(value), {"a": 1})
+    extra.defer("b", "[1, 2]")
+    extra.defer("c", "{}")
+    assert dict.__getitem__(extra, "b") == "[1, 2]"  # not decoded yet
+    assert extra["b"] == [1, 2]
+    assert dict.__getitem__(extra, "c") == "{}"
+    assert dict(extra) == {"a": 1, "b": [1, 2], "c": {}}
+    extra.defer("d", "3")
+    assert extra == {"a": 1, "b": [1, 2], "c": {}, "d": 3}
+    assert pickle.loads(pickle.dumps(extra)) == extra
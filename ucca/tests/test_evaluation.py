@@ -288,7 +288,9 @@ def check_primary_remote(scores, expected):
 @pytest.mark.parametrize("normalize", (True, False), ids=("normalize", ""))
 def test_evaluate_self(create, units, errors, normalize):
     p = create()
+    q = p.copy()
     scores = evaluate(p, p, units=units, errors=errors, normalize=normalize)
+    assert p.equals(q, ordered=True)  # evaluation does not modify the passages
     assert 1.0 == scores.average_f1()
     for eval_type, results in sorted(scores.evaluators.items()):
         for construction, stats in results.results.items():
@@ -334,3 +336,15 @@ def test_evaluate(create1, create2, f1, units=False, errors=False):
         if not before:
             assert not after
     check_primary_remote(scores, f1)
+
+
+@pytest.mark.parametrize("normalize", (True, False), ids=("normalize", ""))
+def test_evaluate_compiled(normalize):
+    expected = evaluate(passage1(), passage2(), normalize=normalize)
+    p1, p2 = passage1(), passage2()
+    for p in p1, p2:
+        p.freeze(compile=True)
+    scores = evaluate(p1, p2, normalize=normalize)  # frozen passages are normalized in copies
+    assert p1.frozen and p2.compiled is not None
+    for eval_type in LABELED, UNLABELED, WEAK_LABELED:
+        assert expected.fields(eval_type, counts=True) == scores.fields(eval_type, counts=True)
@@ -4,7 +4,7 @@ import random
 from glob import glob
 
 from ucca import layer0, layer1, convert, ioutil, diffutil
-from .conftest import loaded, multi_sent, discontiguous, l1_passage
+from .conftest import loaded, multi_sent, discontiguous, l1_passage, PASSAGES
 
 """Tests the ioutil module functions and classes."""
 
@@ -88,3 +88,121 @@ def test_shuffle_passages():
     random.shuffle(passages)
     assert len(files) == len(passages)
     _test_passages(passages)
+
+
+def _corpus_passages():
+    passages = [create() for create in PASSAGES]
+    for i, passage in enumerate(passages):
+        passage._ID = "%s_%d" % (passage.ID, i)  # make the IDs unique
+    return passages
+
+
+def test_corpus_file(tmp_path):
+    passages = _corpus_passages()
+    filename = str(tmp_path / "passages.corpus")
+    with ioutil.CorpusFile(filename, "w") as corpus:
+        corpus.extend(passages[:3])
+    with ioutil.CorpusFile(filename, "a") as corpus:
+        assert len(corpus) == 3
+        corpus.extend(passages[3:])
+        with pytest.raises(ValueError):
+            corpus.append(passages[0])
+    with open(filename, "rb") as f:
+        assert f.read(len(ioutil.CORPUS_MAGIC)) == ioutil.CORPUS_MAGIC
+    with ioutil.CorpusFile(filename) as corpus:
+        assert corpus.ids == [p.ID for p in passages]
+        assert passages[-1].ID in corpus
+        for passage in reversed(passages):
+            assert passage.equals(corpus.get(passage.ID))
+        for passage, copy in zip(passages, corpus):
+            assert passage.equals(copy)
+        with pytest.raises(KeyError):
+            corpus.get("missing")
+        with pytest.raises(ValueError):
+            corpus.append(passages[0])
+
+
+def test_corpus_file_recover(tmp_path):
+    """Test rebuilding the index of a corpus file whose writing was interrupted"""
+    passages = _corpus_passages()
+    outdir = str(tmp_path / "passages")
+    for passage in passages:
+        ioutil.write_passage(passage, outdir=outdir, verbose=False)
+    filename = str(tmp_path / "passages.corpus")
+    assert ioutil.pack_corpus([outdir], filename) == len(passages)
+    passages.sort(key=lambda p: p.ID)  # as read from the directory
+    with open(filename, "r+b") as f:
+        f.truncate(f.seek(0, os.SEEK_END) - 1)  # corrupt the trailer
+    with ioutil.CorpusFile(filename, "a") as corpus:
+        assert corpus.ids == [p.ID for p in passages]
+        assert passages[0].equals(corpus.get(passages[0].ID))
+
+
+def test_corpus_file_read_and_write(tmp_path):
+    passages = _corpus_passages()
+    filename = str(tmp_path / "passages.corpus")
+    for passage in passages:
+        ioutil.write_passage(passage, outdir=filename, verbose=False)
+    read = ioutil.read_files_and_dirs([filename, "test_files/standard3.xml"])
+    assert len(read) == len(passages) + 1
+    copies = list(read)
+    assert not read._corpora, "Corpus files should be closed once iteration ends"
+    for passage, copy in zip(passages + [loaded()], copies):
+        assert passage.equals(copy)
+    outdir = str(tmp_path / "unpacked")
+    assert len(ioutil.unpack_corpus(filename, outdir)) == len(passages)
+    for passage, copy in zip(passages, ioutil.read_files_and_dirs(outdir)):
+        assert passage.equals(copy)
+
+
+def test_open_outdir(tmp_path):
+    passages = _corpus_passages()
+    for outdir in str(tmp_path / "passages.corpus"), str(tmp_path / "passages"):
+        with ioutil.open_outdir(outdir) as out:
+            assert isinstance(out, ioutil.CorpusFile) == outdir.endswith(ioutil.CORPUS_SUFFIX)
+            for passage in passages:
+                ioutil.write_passage(passage, outdir=out, verbose=False)
+        read = sorted(ioutil.read_files_and_dirs(outdir), key=lambda p: p.ID)
+        assert len(read) == len(passages)
+        for passage, copy in zip(sorted(passages, key=lambda p: p.ID), read):
+            assert passage.equals(copy)
+
+
+def test_corpus_file_handles(tmp_path):
+    passages = _corpus_passages()
+    filename = str(tmp_path / "passages.corpus")
+    ioutil.CorpusFile(filename, "w").extend(passages)
+    with ioutil.CorpusFile(filename) as corpus:
+        assert all(offset % 8 == 0 for offset, _ in corpus._index.values()), "Passage data should be aligned"
+        handles = list(corpus.handles())
+        for passage, handle in zip(passages, handles):
+            terminals = passage.layer(layer0.LAYER_ID).all
+            assert handle.ID == passage.ID
+            assert len(handle) == len(terminals)
+            assert handle.tokens == [t.text for t in terminals]
+            assert handle.text == " ".join(t.text for t in terminals)
+            arrays = handle.layer0_arrays()
+            assert arrays["punct"].tolist() == [t.punct for t in terminals]
+            assert arrays["paragraph"].tolist() == [t.paragraph for t in terminals]
+            assert arrays["paragraph_position"].tolist() == [t.para_pos for t in terminals]
+            assert handle.node_ids(layer1.LAYER_ID) == [n.ID for n in passage.layer(layer1.LAYER_ID).all]
+            assert passage.equals(handle.load())
+    handles = list(ioutil.get_passage_handles([filename, "test_files/standard3.xml"]))
+    assert [h.ID for h in handles] == [p.ID for p in passages] + [loaded().ID]
+    assert loaded().equals(handles[-1].load())
+
+
+def test_loaded_passage_handle():
+    for passage in _corpus_passages():
+        handle = convert.PassageHandle(convert.to_binary(passage))
+        adapter = convert.LoadedPassageHandle(passage)
+        assert adapter.ID == handle.ID
+        assert len(adapter) == len(handle)
+        assert adapter.tokens == handle.tokens
+        assert adapter.text == handle.text
+        for name, values in handle.layer0_arrays().items():
+            assert adapter.layer0_arrays()[name].tolist() == values.tolist(), name
+        for layer_id in (layer0.LAYER_ID, layer1.LAYER_ID, "2"):
+            assert adapter.node_ids(layer_id) == handle.node_ids(layer_id)
+            assert adapter.degrees(layer_id) == handle.degrees(layer_id)
+        assert adapter.load() is passage
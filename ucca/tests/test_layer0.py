@@ -1,3 +1,5 @@
+import pickle
+
 from ucca import core, layer0
 
 """Tests module layer0 functionality."""
@@ -63,3 +65,17 @@ def test_layer0():
     assert [t.para_pos for t in l0.all] == [1, 1, 2]
     assert l0.words == (t1, t3)
     assert p.copy(layer0.LAYER_ID).equals(p)
+
+
+def test_columns():
+    p = core.Passage("1")
+    l0 = layer0.Layer0(p)
+    terms = [l0.add_terminal(text=text, punct=text == ".", paragraph=paragraph)
+             for text, paragraph in (("a", 1), ("b", 1), (".", 2))]
+    assert l0._texts == ["a", "b", "."]
+    assert terms[2].attrib == {"text": ".", "paragraph": 2, "paragraph_position": 1}
+    assert len({hash(t) for t in terms}) == 3
+    p_copy = pickle.loads(pickle.dumps(p))
+    assert [(t.text, t.paragraph, t.para_pos) for t in p_copy.layer(layer0.LAYER_ID).all] == \
+        [("a", 1, 1), ("b", 1, 2), (".", 2, 1)]
+    assert p_copy.equals(p)
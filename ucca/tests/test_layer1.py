@@ -1,4 +1,6 @@
-from ucca import layer1
+import pickle
+
+from ucca import convert, layer0, layer1
 from .conftest import l1_passage, discontiguous
 
 """Tests layer1 module functionality and correctness."""
@@ -155,3 +157,81 @@ def test_discontiguous():
     assert ps3.get_sequences() == [(15, 17)]
     assert a3.get_sequences() == [(16, 17)]
     assert not p3.get_sequences()
+
+
+def test_next_id():
+    p = l1_passage()
+    l1 = p.layer(layer1.LAYER_ID)
+    last = max(int(node.ID.split(".")[1]) for node in l1.all)
+    assert l1.next_id() == "1.%d" % (last + 1)
+    node = l1.add_fnode(None, layer1.EdgeTags.ParallelScene)
+    assert node.ID == "1.%d" % (last + 1)
+    node.destroy()
+    assert l1.next_id() == "1.%d" % (last + 1)  # IDs of removed Nodes are reused
+    p.by_id("1.2").destroy()
+    assert l1.next_id() == "1.%d" % (last + 1)  # only IDs from the number of Nodes onwards are checked
+    assert pickle.loads(pickle.dumps(p)).layer(layer1.LAYER_ID).next_id() == "1.%d" % (last + 1)
+    assert convert.from_standard(convert.to_standard(p)).layer(layer1.LAYER_ID).next_id() == "1.%d" % (last + 1)
+
+
+def test_top_scenes_incremental():
+    p = l1_passage()
+    l1 = p.layer(layer1.LAYER_ID)
+    top = list(l1.top_scenes)
+    scene = top[-1]
+    parent = scene.fparent
+    assert not parent.is_scene()
+    process = l1.add_fnode(parent, layer1.EdgeTags.Process)  # parent becomes a scene, covering its scene children
+    assert parent in l1.top_scenes
+    assert scene not in l1.top_scenes
+    rebuilt = pickle.loads(pickle.dumps(p)).layer(layer1.LAYER_ID)
+    rebuilt._rebuild()
+    assert [n.ID for n in rebuilt.top_scenes] == [n.ID for n in l1.top_scenes]
+    process.destroy()
+    assert l1.top_scenes == top
+
+
+def test_span_cache():
+    p = l1_passage()
+    l1 = p.layer(layer1.LAYER_ID)
+    terminals = p.layer("0").all
+    head = l1.heads[0]
+    link1, ps1, ps23, punct2 = head.children
+    p1, a1, punct1 = [x.child for x in ps1 if not x.attrib.get("remote")]
+    assert (ps1.start_position, ps1.end_position) == (2, 10)
+    assert ps1.to_text() == " ".join(t.text for t in terminals[1:10])
+    assert ps1.get_terminals(remotes=True) == ps1.get_terminals() + ps1[3].child.get_terminals()
+    a1.add(layer1.EdgeTags.Terminal, terminals[19])  # changes the spans of all ancestors
+    assert ps1.end_position == 20
+    assert ps1.discontiguous
+    assert head.end_position == 20
+    a1.remove(a1.outgoing[-1])
+    assert ps1.get_sequences() == [(2, 10)]
+    ps1[3].attrib["remote"] = False  # attribute changes invalidate all spans
+    assert ps1.end_position == 15
+    assert [t.position for t in ps1.get_terminals(punct=False)] == list(range(2, 10)) + [15]
+    terminals[2].tag = layer0.NodeTags.Punct
+    assert [t.position for t in ps1.get_terminals(punct=False)] == [2] + list(range(4, 10)) + [15]
+
+
+def test_child_index():
+    p = l1_passage()
+    l1 = p.layer(layer1.LAYER_ID)
+    head = l1.heads[0]
+    link1, ps1, ps23, punct2 = head.children
+    p1, a1, punct1 = [x.child for x in ps1 if not x.attrib.get("remote")]
+    assert ps1.process is p1
+    assert ps1.participants == [a1, ps1[3].child]
+    ps1[1].tag = layer1.EdgeTags.Adverbial
+    assert ps1.participants == [ps1[3].child]
+    assert ps1.adverbials == [a1]
+    a1.incoming[0].add(layer1.EdgeTags.Time)
+    assert ps1.times == [a1]
+    d = l1.add_fnode(ps1, layer1.EdgeTags.Adverbial)
+    assert ps1.adverbials == [a1, d]
+    assert d.fparent is ps1
+    assert d.ftag == layer1.EdgeTags.Adverbial
+    d.incoming[0].attrib["remote"] = True
+    assert d.fparent is None
+    ps1.remove(d)
+    assert ps1.adverbials == [a1]
@@ -371,14 +371,14 @@ def indent_xml(xml_as_string):
     """
     tabs = 0
     lines = str(xml_as_string).replace('><', '>\n<').splitlines()
-    s = ''
+    indented = []
     for line in lines:
         if line.startswith('</'):
             tabs -= 1
-        s += ("  " * tabs) + line + '\n'
+        indented.append(("  " * tabs) + line + '\n')
         if not (line.endswith('/>') or line.startswith('</')):
             tabs += 1
-    return s
+    return ''.join(indented)
 
 
 @contextmanager
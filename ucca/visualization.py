@@ -15,17 +15,23 @@ def draw(passage, node_ids=False):
     import networkx as nx
     warnings.filterwarnings("ignore", category=matplotlib.cbook.mplDeprecation)
     warnings.filterwarnings("ignore", category=UserWarning)
-    g = nx.DiGraph()
-    g.add_nodes_from([(n.ID, {"label": n.text, "color": "white"}) for n in passage.layer(layer0.LAYER_ID).all])
-    g.add_nodes_from([(n.ID, {"label": "IMPLICIT", "color": "white"}) for n in passage.layer(layer1.LAYER_ID).all
-                      if n.attrib.get("implicit")])
-    g.add_nodes_from([(n.ID, {"label": node_label(n) or (n.ID if node_ids else ""),
-                              "color": "gray" if n.tag == layer1.NodeTags.Linkage else
-                              ("white" if node_label(n) or (n.ID and node_ids) else "black")})
-                      for n in passage.layer(layer1.LAYER_ID).all if not n.attrib.get("implicit")])
-    g.add_edges_from([(n.ID, e.child.ID, {"label": "|".join(e.tags),
-                                          "style": "dashed" if e.attrib.get("remote") else "solid"})
-                      for layer in passage.layers for n in layer.all for e in n])
+    g = passage.to_arrays().to_networkx()
+    for node_id, data in g.nodes(data=True):
+        node = passage.nodes[node_id]
+        if node.layer.ID == layer0.LAYER_ID:
+            data.update(label=node.text, color="white")
+        elif data["implicit"]:
+            data.update(label="IMPLICIT", color="white")
+        else:
+            label = node_label(node)
+            data.update(label=label or (node_id if node_ids else ""),
+                        color="gray" if node.tag == layer1.NodeTags.Linkage else
+                        ("white" if label or (node_id and node_ids) else "black"))
+    multiple_tags = {(n.ID, e.child.ID): "|".join(e.tags) for n in passage.nodes.values() for e in n
+                     if len(e.categories) > 1}  # the graph only has the first tag of each edge
+    for parent_id, child_id, data in g.edges(data=True):
+        data.update(label=multiple_tags.get((parent_id, child_id), data["tag"] or ""),
+                    style="dashed" if data["remote"] else "solid")
     pos = topological_layout(passage)
     nx.draw(g, pos, arrows=False, font_size=10,
             node_color=[d["color"] for _, d in g.nodes(data=True)],